@@ -3,12 +3,13 @@ from datetime import datetime, timedelta, timezone
 
 import requests
 from app.config import config
-from app.dependencies import session
+from app.dependencies import read_session, session
 from fastapi import APIRouter, Depends
 from shared.constants import SEASONPASS_ADDRESS
 from shared.enums import PassType, PlanetID, TxStatus
 from shared.models.action import Block
 from shared.models.user import Claim
+from shared.utils.rpc_pool import Endpoints, get_rpc_pool
 from shared.utils.season_pass import create_jwt_token
 from sqlalchemy import desc, func, or_, select
 from sqlalchemy.orm import Session
@@ -34,21 +35,28 @@ for view in __all__:
     router.include_router(view.router)
 
 
-def get_tip(url) -> int:
+def post_query(url: str, query: str, timeout: float = None) -> dict:
     resp = requests.post(
         url,
-        json={"query": "{ nodeStatus { tip { index } } }"},
+        json={"query": query},
         headers={
             "Authorization": f"Bearer {create_jwt_token(config.headless_jwt_secret)}"
         },
-        timeout=2,
+        timeout=timeout,
     )
-    if resp.status_code != 200:
-        return 0
+    resp.raise_for_status()
+    return resp.json()
+
+
+def get_tip(urls: Endpoints) -> int:
     try:
-        return resp.json()["data"]["nodeStatus"]["tip"]["index"]
+        return get_rpc_pool(urls).get_tip(
+            lambda url: post_query(url, "{ nodeStatus { tip { index } } }", timeout=2)[
+                "data"
+            ]["nodeStatus"]["tip"]["index"]
+        )
     except Exception as e:
-        logging.warning(f"Error occurred while getting {url}: {e}")
+        logging.warning(f"Error occurred while getting {urls}: {e}")
         return 0
 
 
@@ -66,24 +74,21 @@ def check_nonce(planet: str, sess=Depends(session)):
     is_mainnet = config.stage == "mainnet"
     if planet.lower() == "odin":
         planet_id = PlanetID.ODIN if is_mainnet else PlanetID.ODIN_INTERNAL
-        url = config.converted_gql_url_map[planet_id]
+        urls = config.converted_gql_url_map[planet_id]
     elif planet.lower() == "heimdall":
         planet_id = PlanetID.HEIMDALL if is_mainnet else PlanetID.HEIMDALL_INTERNAL
-        url = config.converted_gql_url_map[planet_id]
+        urls = config.converted_gql_url_map[planet_id]
     elif planet.lower() == "thor":
         planet_id = PlanetID.THOR if is_mainnet else PlanetID.THOR_INTERNAL
-        url = config.converted_gql_url_map[planet_id]
+        urls = config.converted_gql_url_map[planet_id]
     else:
         return JSONResponse(status_code=400, content=f"{planet} is not valid planet.")
 
-    resp = requests.post(
-        url,
-        json={"query": f'query {{ nextTxNonce(address: "{SEASONPASS_ADDRESS}") }}'},
-        headers={
-            "Authorization": f"Bearer {create_jwt_token(config.headless_jwt_secret)}"
-        },
+    result = get_rpc_pool(urls).request(
+        lambda url: post_query(
+            url, f'query {{ nextTxNonce(address: "{SEASONPASS_ADDRESS}") }}'
+        )
     )
-    result = resp.json()
     next_nonce = result["data"]["nextTxNonce"]
 
     highest_nonce = sess.scalar(
@@ -104,7 +109,7 @@ def check_nonce(planet: str, sess=Depends(session)):
 
 
 @router.get("/block-status")
-def block_status(sess=Depends(session)):
+def block_status(sess=Depends(read_session)):
     stage = config.stage
     result = {}
 
@@ -144,7 +149,7 @@ def block_status(sess=Depends(session)):
 
 
 @router.get("/invalid-claim")
-def invalid_claim(sess: Session = Depends(session)):
+def invalid_claim(sess: Session = Depends(read_session)):
     now = datetime.now(tz=timezone.utc)
     invalid_claim_list = sess.scalars(
         select(Claim).where(
@@ -162,7 +167,7 @@ def invalid_claim(sess: Session = Depends(session)):
 
 
 @router.get("/failure-claim")
-def failure_claim(sess: Session = Depends(session)):
+def failure_claim(sess: Session = Depends(read_session)):
     now = datetime.now(tz=timezone.utc)
     failure_claim_list = sess.scalars(
         select(Claim).where(
@@ -180,17 +185,17 @@ def failure_claim(sess: Session = Depends(session)):
 @router.get("/balance/{planet}")
 def balance(planet: str):
     if planet.lower() == "odin":
-        url = config.converted_gql_url_map[PlanetID.ODIN]
+        urls = config.converted_gql_url_map[PlanetID.ODIN]
     elif planet.lower() == "heimdall":
-        url = config.converted_gql_url_map[PlanetID.HEIMDALL]
+        urls = config.converted_gql_url_map[PlanetID.HEIMDALL]
     elif planet.lower() == "thor":
-        url = config.converted_gql_url_map[PlanetID.THOR]
+        urls = config.converted_gql_url_map[PlanetID.THOR]
     else:
         return JSONResponse(status_code=400, content=f"{planet} is not valid planet.")
-    resp = requests.post(
-        url,
-        json={
-            "query": f"""query balanceQuery($address: Address! = \"{SEASONPASS_ADDRESS}\") {{
+    data = get_rpc_pool(urls).request(
+        lambda url: post_query(
+            url,
+            f"""query balanceQuery($address: Address! = \"{SEASONPASS_ADDRESS}\") {{
           stateQuery {{
               hourglass: balance(address: $address, currency: {{ticker: \"Item_NT_400000\", decimalPlaces: 0, minters: []}}) {{ currency {{ ticker }} quantity }}
               APPotion: balance(address: $address, currency: {{ticker: \"Item_NT_500000\", decimalPlaces: 0, minters: []}}) {{ currency {{ ticker }} quantity }}
@@ -207,13 +212,9 @@ def balance(planet: str):
               Title: balance(address: $address, currency: {{ticker: \"Item_T_49900026\", decimalPlaces: 0, minters: []}}) {{ currency {{ ticker }} quantity }}
               Costume: balance(address: $address, currency: {{ticker: \"Item_T_40100032\", decimalPlaces: 0, minters: []}}) {{ currency {{ ticker }} quantity }}
           }}
-        }}"""
-        },
-        headers={
-            "Authorization": f"Bearer {create_jwt_token(config.headless_jwt_secret)}"
-        },
+        }}""",
+        )["data"]["stateQuery"]
     )
-    data = resp.json()["data"]["stateQuery"]
     resp = {}
     for k, v in data.items():
         resp[k.lower()] = {
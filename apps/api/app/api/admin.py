@@ -2,8 +2,10 @@ from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Dict, List, Optional
 
+from app.cache import invalidate_season_caches
 from app.celery import send_to_worker
-from app.dependencies import session
+from app.dependencies import read_session, session
+from app.pagination import nulls_first, paginate
 from app.schemas.admin import BurnAssetRequest, BurnAssetResponse
 from app.utils import verify_token
 from fastapi import APIRouter, Depends, HTTPException, Query, Security
@@ -11,9 +13,10 @@ from fastapi.security import HTTPBearer
 from pydantic import BaseModel
 from shared.enums import ActionType, PassType, PlanetID, TxStatus
 from shared.models.season_pass import Exp, SeasonPass
-from shared.models.user import Claim, UserSeasonPass
-from shared.utils.season_pass import get_pass
-from sqlalchemy import desc, func, select
+from shared.models.user import Claim, ClaimRewardStat, UserSeasonPass
+from shared.utils.claim import claim_reward_stat_query
+from sqlalchemy import and_, desc, select
+from sqlalchemy.orm import contains_eager
 
 security = HTTPBearer()
 
@@ -33,6 +36,8 @@ class ClaimResponse(BaseModel):
 class PaginatedClaimResponse(BaseModel):
     total: int
     items: List[ClaimResponse]
+    next_cursor: Optional[str] = None
+    is_total_estimated: bool = False
 
 
 class SeasonPassResponse(BaseModel):
@@ -50,6 +55,8 @@ class SeasonPassResponse(BaseModel):
 class PaginatedSeasonPassResponse(BaseModel):
     total: int
     items: List[SeasonPassResponse]
+    next_cursor: Optional[str] = None
+    is_total_estimated: bool = False
 
 
 class PremiumUserResponse(BaseModel):
@@ -72,6 +79,8 @@ class PremiumUserResponse(BaseModel):
 class PaginatedPremiumUserResponse(BaseModel):
     total: int
     items: List[PremiumUserResponse]
+    next_cursor: Optional[str] = None
+    is_total_estimated: bool = False
 
 
 # 새로운 CRUD 스키마들
@@ -129,23 +138,32 @@ def get_seasons(
     pass_type: Optional[PassType] = None,
     limit: int = Query(default=20, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
-    sess=Depends(session),
+    cursor: Optional[str] = None,
+    sess=Depends(read_session),
 ):
-    """모든 시즌 패스 목록을 조회합니다.
+    """모든 시즌 패스 목록을 시작 시각 최신순으로 조회합니다.
 
     Args:
         pass_type: 특정 패스 타입의 시즌만 조회
         limit: 한 페이지당 반환할 항목 수 (기본값: 20, 최대: 100)
-        offset: 시작 위치 (기본값: 0)
+        offset: 시작 위치 (기본값: 0, cursor 사용 권장)
+        cursor: 이전 페이지 응답의 next_cursor
     """
-    base_query = select(SeasonPass).order_by(desc(SeasonPass.start_timestamp))
+    base_query = select(SeasonPass)
 
     if pass_type:
         base_query = base_query.where(SeasonPass.pass_type == pass_type)
 
-    total_count = sess.scalar(select(func.count()).select_from(base_query.subquery()))
-
-    seasons = sess.scalars(base_query.offset(offset).limit(limit)).all()
+    seasons, total_count, next_cursor = paginate(
+        sess,
+        base_query,
+        (nulls_first(SeasonPass.start_timestamp), SeasonPass.id),
+        limit,
+        cursor=cursor,
+        offset=offset,
+        # 시즌 수는 적으므로 항상 정확히 계산
+        exact_total=True,
+    )
 
     items = [
         SeasonPassResponse(
@@ -162,7 +180,12 @@ def get_seasons(
         for season in seasons
     ]
 
-    return PaginatedSeasonPassResponse(total=total_count, items=items)
+    return PaginatedSeasonPassResponse(
+        total=total_count,
+        items=items,
+        next_cursor=next_cursor,
+        is_total_estimated=False,
+    )
 
 
 @router.get("/claims", response_model=PaginatedClaimResponse)
@@ -172,7 +195,9 @@ def get_claims(
     days: Optional[int] = Query(default=7, ge=1, le=30),
     limit: int = Query(default=20, ge=1, le=100),  # 한 페이지당 기본 20개, 최대 100개
     offset: int = Query(default=0, ge=0),  # 시작 위치
-    sess=Depends(session),
+    cursor: Optional[str] = None,  # 이전 페이지의 next_cursor
+    exact_total: bool = False,
+    sess=Depends(read_session),
 ):
     """Claim 정보를 조회합니다.
 
@@ -181,10 +206,12 @@ def get_claims(
         status: 특정 상태의 Claim만 조회 (SUCCESS, FAILURE 등)
         days: 최근 몇일간의 데이터를 조회할지 (기본값: 7일, 최대 30일)
         limit: 한 페이지당 반환할 항목 수 (기본값: 20, 최대: 100)
-        offset: 시작 위치 (기본값: 0)
+        offset: 시작 위치 (기본값: 0, cursor 사용 권장)
+        cursor: 이전 페이지 응답의 next_cursor
+        exact_total: 정확한 전체 개수 계산 여부 (기본값: 추정치)
     """
     # 기본 쿼리 생성
-    base_query = select(Claim).order_by(desc(Claim.created_at))
+    base_query = select(Claim)
 
     # 날짜 필터링
     start_date = datetime.now(tz=timezone.utc) - timedelta(days=days)
@@ -198,11 +225,16 @@ def get_claims(
     if status:
         base_query = base_query.where(Claim.tx_status == status)
 
-    # 전체 결과 수 계산
-    total_count = sess.scalar(select(func.count()).select_from(base_query.subquery()))
-
-    # 페이지네이션 적용
-    claims = sess.scalars(base_query.offset(offset).limit(limit)).all()
+    # 최신순 페이지네이션 적용
+    claims, total_count, next_cursor = paginate(
+        sess,
+        base_query,
+        (Claim.created_at, Claim.id),
+        limit,
+        cursor=cursor,
+        offset=offset,
+        exact_total=exact_total,
+    )
 
     # 응답 데이터 생성
     items = [
@@ -220,7 +252,12 @@ def get_claims(
         for claim in claims
     ]
 
-    return PaginatedClaimResponse(total=total_count, items=items)
+    return PaginatedClaimResponse(
+        total=total_count,
+        items=items,
+        next_cursor=next_cursor,
+        is_total_estimated=not exact_total,
+    )
 
 
 @router.get("/premium-users", response_model=PaginatedPremiumUserResponse)
@@ -230,44 +267,52 @@ def get_premium_users(
     planet_id: Optional[str] = None,
     limit: int = Query(default=20, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
-    sess=Depends(session),
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
+    sess=Depends(read_session),
 ):
-    """프리미엄 사용자 목록을 조회합니다.
+    """프리미엄 사용자 목록을 최신순으로 조회합니다.
 
     Args:
         pass_type: 특정 패스 타입의 사용자만 조회
         season_index: 특정 시즌의 사용자만 조회
         planet_id: 특정 플래닛의 사용자만 조회
         limit: 한 페이지당 반환할 항목 수 (기본값: 20, 최대: 100)
-        offset: 시작 위치 (기본값: 0)
+        offset: 시작 위치 (기본값: 0, cursor 사용 권장)
+        cursor: 이전 페이지 응답의 next_cursor
+        exact_total: 정확한 전체 개수 계산 여부 (기본값: 추정치)
     """
-    base_query = select(UserSeasonPass).where(UserSeasonPass.is_premium == True)
-
-    if pass_type and season_index:
-        target_season = get_pass(sess, pass_type, season_index)
-        if target_season:
-            base_query = base_query.where(
-                UserSeasonPass.season_pass_id == target_season.id
-            )
-    elif pass_type:
-        season_query = select(SeasonPass.id).where(SeasonPass.pass_type == pass_type)
-        if season_index:
-            season_query = season_query.where(SeasonPass.season_index == season_index)
-        season_ids = sess.scalars(season_query).fetchall()
-        if season_ids:
-            base_query = base_query.where(UserSeasonPass.season_pass_id.in_(season_ids))
+    # Season filter goes into join condition and season is loaded with user at once.
+    season_join = SeasonPass.id == UserSeasonPass.season_pass_id
+    if pass_type:
+        season_join = and_(season_join, SeasonPass.pass_type == pass_type)
+    if season_index:
+        season_join = and_(season_join, SeasonPass.season_index == season_index)
+
+    base_query = (
+        select(UserSeasonPass)
+        .join(SeasonPass, season_join)
+        .options(contains_eager(UserSeasonPass.season_pass))
+        .where(UserSeasonPass.is_premium == True)
+    )
 
     if planet_id:
         planet_id_bytes = bytes(planet_id, "utf-8")
         base_query = base_query.where(UserSeasonPass.planet_id == planet_id_bytes)
 
-    total_count = sess.scalar(select(func.count()).select_from(base_query.subquery()))
-
-    users = sess.scalars(base_query.offset(offset).limit(limit)).all()
+    users, total_count, next_cursor = paginate(
+        sess,
+        base_query,
+        (UserSeasonPass.id,),
+        limit,
+        cursor=cursor,
+        offset=offset,
+        exact_total=exact_total,
+    )
 
     items = []
     for user in users:
-        season_pass = sess.get(SeasonPass, user.season_pass_id)
+        season_pass = user.season_pass
         season_info = (
             {
                 "id": season_pass.id,
@@ -301,7 +346,12 @@ def get_premium_users(
             )
         )
 
-    return PaginatedPremiumUserResponse(total=total_count, items=items)
+    return PaginatedPremiumUserResponse(
+        total=total_count,
+        items=items,
+        next_cursor=next_cursor,
+        is_total_estimated=not exact_total,
+    )
 
 
 @router.post("/retry-stage")
@@ -316,7 +366,7 @@ def trigger_retry_stage():
 def get_season_passes(
     pass_type: Optional[PassType] = None,
     season_index: Optional[int] = None,
-    sess=Depends(session),
+    sess=Depends(read_session),
 ):
     """시즌패스 목록을 조회합니다.
 
@@ -450,6 +500,7 @@ def create_season_pass(
 
         sess.commit()
         sess.refresh(season_pass)
+        invalidate_season_caches()
     except Exception:
         sess.rollback()
         raise
@@ -515,6 +566,7 @@ def update_season_pass(
 
         sess.commit()
         sess.refresh(season_pass)
+        invalidate_season_caches()
     except Exception:
         sess.rollback()
         raise
@@ -561,6 +613,7 @@ def delete_season_pass(season_pass_id: int, sess=Depends(session)):
         sess.query(Exp).where(Exp.season_pass_id == season_pass_id).delete()
         sess.delete(season_pass)
         sess.commit()
+        invalidate_season_caches()
 
         return {"message": "Season pass deleted successfully"}
     except Exception:
@@ -623,8 +676,16 @@ class RewardClaimsResponse(BaseModel):
 def get_reward_claims(
     year: int = Query(..., ge=2020, le=2030),
     month: int = Query(..., ge=1, le=12),
-    sess=Depends(session),
+    live: bool = False,
+    sess=Depends(read_session),
 ):
+    """월별 성공한 Claim 보상 합계를 조회합니다.
+
+    Args:
+        year: 조회할 연도
+        month: 조회할 월
+        live: 집계 테이블 대신 Claim 테이블에서 직접 합산 (검증용, 느림)
+    """
     utc_start = datetime(year, month, 1, tzinfo=timezone.utc)
     utc_end = (
         datetime(year + 1, 1, 1, tzinfo=timezone.utc)
@@ -634,39 +695,43 @@ def get_reward_claims(
 
     mainnet_planets = [PlanetID.ODIN.value, PlanetID.HEIMDALL.value]
 
-    claims = sess.scalars(
-        select(Claim).where(
-            Claim.tx_status == TxStatus.SUCCESS,
-            Claim.planet_id.in_(mainnet_planets),
-            Claim.created_at >= utc_start,
-            Claim.created_at < utc_end,
-        )
-    ).all()
+    if live:
+        rows = sess.execute(
+            claim_reward_stat_query(
+                Claim.tx_status == TxStatus.SUCCESS,
+                Claim.planet_id.in_(mainnet_planets),
+                Claim.created_at >= utc_start,
+                Claim.created_at < utc_end,
+            )
+        ).all()
+    else:
+        rows = sess.execute(
+            select(
+                ClaimRewardStat.planet_id,
+                ClaimRewardStat.month,
+                ClaimRewardStat.ticker,
+                ClaimRewardStat.decimal_places,
+                ClaimRewardStat.total_amount,
+            )
+            .where(
+                ClaimRewardStat.month == utc_start.date(),
+                ClaimRewardStat.planet_id.in_(mainnet_planets),
+            )
+            .order_by(ClaimRewardStat.planet_id, ClaimRewardStat.ticker)
+        ).all()
 
     agg: dict = {}
-    for claim in claims:
-        planet_name = PlanetID(claim.planet_id).name
-        planet_agg = agg.setdefault(planet_name, {})
-        for reward in claim.reward_list:
-            ticker = reward["ticker"]
-            dp = reward.get("decimal_places", 0)
-            amount = Decimal(str(reward["amount"]))
-            if ticker not in planet_agg:
-                planet_agg[ticker] = {"decimal_places": dp, "total_amount": Decimal(0)}
-            planet_agg[ticker]["total_amount"] += amount
+    for row in rows:
+        agg.setdefault(PlanetID(row.planet_id).name, []).append(
+            RewardClaimItem(
+                ticker=row.ticker,
+                decimal_places=row.decimal_places,
+                total_amount=row.total_amount,
+            )
+        )
 
     planets = {
-        planet: PlanetRewardClaims(
-            tokens=[
-                RewardClaimItem(
-                    ticker=t,
-                    decimal_places=v["decimal_places"],
-                    total_amount=v["total_amount"],
-                )
-                for t, v in tokens.items()
-            ]
-        )
-        for planet, tokens in agg.items()
+        planet: PlanetRewardClaims(tokens=tokens) for planet, tokens in agg.items()
     }
 
     return RewardClaimsResponse(year=year, month=month, planets=planets)
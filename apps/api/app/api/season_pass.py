@@ -1,14 +1,28 @@
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
+from pydantic import TypeAdapter
 from shared.enums import PassType, PlanetID
 from shared.models.season_pass import Level
+from shared.models.user import UserSeasonPass
 from shared.utils.season_pass import get_pass
 from sqlalchemy import select
 
-from app.dependencies import session
+from app.cache import response_cache
+from app.config import config
+from app.dependencies import read_session, session
 from app.exceptions import SeasonNotFoundError
-from app.schemas.season_pass import ExpInfoSchema, LevelInfoSchema, SeasonPassSchema
+from app.schemas.season_pass import (
+    ExpInfoSchema,
+    LeaderboardRankSchema,
+    LeaderboardSchema,
+    LevelInfoSchema,
+    SeasonPassSchema,
+    SimpleSeasonPassSchema,
+)
+
+_level_list_adapter = TypeAdapter(List[LevelInfoSchema])
+_exp_list_adapter = TypeAdapter(List[ExpInfoSchema])
 
 router = APIRouter(
     prefix="/season-pass",
@@ -16,16 +30,10 @@ router = APIRouter(
 )
 
 
-@router.get("/current", response_model=SeasonPassSchema)
-def current_season(planet_id: str, pass_type: PassType, sess=Depends(session)):
-    planet_id = PlanetID(bytes(planet_id, "utf-8"))
-    curr_season = get_pass(sess, pass_type, validate_current=True)
-    if not curr_season:
-        raise SeasonNotFoundError("No active season pass for today")
-
+def _serialize_current_season(curr_season) -> bytes:
     reward_coef = 1
 
-    return SeasonPassSchema(
+    schema = SeasonPassSchema(
         id=curr_season.id,
         pass_type=curr_season.pass_type,
         season_index=curr_season.season_index,
@@ -78,18 +86,130 @@ def current_season(planet_id: str, pass_type: PassType, sess=Depends(session)):
         # World clear pass does not have repeat reward
         repeat_last_reward=curr_season.pass_type != PassType.WORLD_CLEAR_PASS,
     )
+    return schema.model_dump_json().encode()
+
+
+@router.get("/current", response_model=SeasonPassSchema)
+def current_season(
+    request: Request, planet_id: str, pass_type: PassType, sess=Depends(session)
+):
+    planet_id = PlanetID(bytes(planet_id, "utf-8"))
+
+    def build():
+        curr_season = get_pass(sess, pass_type, validate_current=True)
+        if not curr_season:
+            raise SeasonNotFoundError("No active season pass for today")
+        return (
+            _serialize_current_season(curr_season),
+            curr_season.end_timestamp and curr_season.end_timestamp.timestamp(),
+        )
+
+    return response_cache.response(
+        request, sess, ("current", pass_type, planet_id), build
+    )
 
 
 @router.get("/level", response_model=List[LevelInfoSchema])
-def level_info(pass_type: PassType, sess=Depends(session)):
-    return sess.scalars(
-        select(Level).where(Level.pass_type == pass_type).order_by(Level.level)
-    ).fetchall()
+def level_info(request: Request, pass_type: PassType, sess=Depends(session)):
+    def build():
+        level_list = sess.scalars(
+            select(Level).where(Level.pass_type == pass_type).order_by(Level.level)
+        ).fetchall()
+        level_list = _level_list_adapter.validate_python(
+            level_list, from_attributes=True
+        )
+        return _level_list_adapter.dump_json(level_list), None
+
+    return response_cache.response(request, sess, ("level", pass_type), build)
 
 
 @router.get("/exp", response_model=List[ExpInfoSchema])
-def exp_info(pass_type: PassType, season_index: int, sess=Depends(session)):
-    current_pass = get_pass(
-        sess, pass_type=pass_type, season_index=season_index, include_exp=True
+def exp_info(
+    request: Request, pass_type: PassType, season_index: int, sess=Depends(session)
+):
+    def build():
+        target_pass = get_pass(
+            sess, pass_type=pass_type, season_index=season_index, include_exp=True
+        )
+        if not target_pass:
+            raise SeasonNotFoundError(
+                f"No season pass found for {pass_type.value} #{season_index}"
+            )
+        exp_list = _exp_list_adapter.validate_python(
+            target_pass.exp_list, from_attributes=True
+        )
+        return _exp_list_adapter.dump_json(exp_list), None
+
+    return response_cache.response(
+        request, sess, ("exp", pass_type, season_index), build
+    )
+
+
+@router.get("/leaderboard", response_model=LeaderboardSchema)
+def leaderboard(
+    request: Request,
+    planet_id: str,
+    pass_type: PassType,
+    season_index: int,
+    page: int = Query(
+        default=1,
+        ge=1,
+        le=-(-config.leaderboard_max_rank // config.leaderboard_page_size),
+    ),
+    sess=Depends(read_session),
+):
+    """
+    # Season leaderboard
+    ---
+    Avatars of given season and planet in descending order of exp, `leaderboard_page_size` avatars per page.
+    Only top `leaderboard_max_rank` avatars are served. Pages are cached for a while, so recent exp can be missed.
+    """
+    planet_id = PlanetID(bytes(planet_id, "utf-8"))
+    page_size = config.leaderboard_page_size
+    offset = (page - 1) * page_size
+    limit = min(page_size, config.leaderboard_max_rank - offset)
+
+    def build():
+        target_pass = get_pass(sess, pass_type=pass_type, season_index=season_index)
+        if not target_pass:
+            raise SeasonNotFoundError(
+                f"No season pass found for {pass_type.value} #{season_index}"
+            )
+        # Served by `ix_user_season_pass_leaderboard`
+        usp_list = sess.execute(
+            select(
+                UserSeasonPass.agent_addr,
+                UserSeasonPass.avatar_addr,
+                UserSeasonPass.level,
+                UserSeasonPass.exp,
+            )
+            .where(
+                UserSeasonPass.season_pass_id == target_pass.id,
+                UserSeasonPass.planet_id == planet_id,
+            )
+            .order_by(UserSeasonPass.exp.desc(), UserSeasonPass.id)
+            .offset(offset)
+            .limit(limit + 1)
+        ).all()
+        schema = LeaderboardSchema(
+            planet_id=planet_id,
+            season_pass=SimpleSeasonPassSchema.model_validate(target_pass),
+            page=page,
+            has_next=len(usp_list) > limit
+            and offset + limit < config.leaderboard_max_rank,
+            rank_list=[
+                LeaderboardRankSchema(
+                    rank=offset + i + 1,
+                    agent_addr=x.agent_addr,
+                    avatar_addr=x.avatar_addr,
+                    level=x.level,
+                    exp=x.exp,
+                )
+                for i, x in enumerate(usp_list[:limit])
+            ],
+        )
+        return schema.model_dump_json().encode(), None
+
+    return response_cache.response(
+        request, sess, ("leaderboard", pass_type, season_index, planet_id, page), build
     )
-    return current_pass.exp_list
@@ -2,22 +2,31 @@ import json
 import logging
 from collections import defaultdict
 from datetime import datetime, timedelta, timezone
-from typing import List
+from typing import List, Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from shared.enums import PassType, PlanetID, TxStatus
+from shared.models.action import ActionHistory, AvatarExpDaily
 from shared.models.season_pass import SeasonPass
-from shared.models.user import Claim, UserSeasonPass
+from shared.models.user import Claim, StageRefreshQueue, UserSeasonPass
 from shared.schemas.message import ClaimMessage
-from shared.utils._graphql import GQLClient
-from shared.utils.season_pass import get_level, get_max_level, get_pass
-from sqlalchemy import func, or_, select
+from shared.utils.season_pass import (
+    get_current_passes,
+    get_level,
+    get_max_level,
+    get_pass,
+)
+from sqlalchemy import and_, desc, func, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
+from starlette.responses import StreamingResponse
 
+from app.cache import CachedSeason, season_cache
 from app.celery import send_to_worker
 from app.config import config
-from app.dependencies import session
+from app.dependencies import read_session, session
 from app.exceptions import (
     InvalidSeasonError,
     InvalidUpgradeRequestError,
@@ -25,10 +34,18 @@ from app.exceptions import (
     SeasonNotFoundError,
     ServerOverloadError,
 )
+from app.pagination import paginate
+from app.schemas.season_pass import SimpleSeasonPassSchema
 from app.schemas.user import (
+    ActionHistorySchema,
+    ActionSummarySchema,
+    AvatarKeySchema,
+    BatchStatusRequestSchema,
     ClaimRequestSchema,
     ClaimResultSchema,
+    ExpDailySchema,
     UpgradeRequestSchema,
+    UserHistorySchema,
     UserSeasonPassSchema,
 )
 from app.utils import verify_token
@@ -39,6 +56,42 @@ router = APIRouter(
 )
 
 
+def enqueue_stage_refresh(
+    sess,
+    planet_id: PlanetID,
+    agent_addr: str,
+    avatar_addr: str,
+    season_pass_id: int,
+):
+    """
+    Request worker to fetch last cleared stage of avatar from chain.
+    Already queued avatar is ignored.
+    """
+    enqueue_stage_refresh_list(
+        sess,
+        [
+            {
+                "planet_id": planet_id,
+                "agent_addr": agent_addr,
+                "avatar_addr": avatar_addr,
+                "season_pass_id": season_pass_id,
+            }
+        ],
+    )
+
+
+def enqueue_stage_refresh_list(sess, value_list: List[dict]):
+    """Queue many avatars of `enqueue_stage_refresh` with one statement and one commit."""
+    if not value_list:
+        return
+    sess.execute(
+        insert(StageRefreshQueue)
+        .values(value_list)
+        .on_conflict_do_nothing(constraint="stage_refresh_queue_unique")
+    )
+    sess.commit()
+
+
 def get_default_usp(
     sess,
     planet_id: PlanetID,
@@ -49,44 +102,31 @@ def get_default_usp(
     try:
         match season_pass.pass_type:
             case PassType.WORLD_CLEAR_PASS:
-                gql_client = GQLClient(config.converted_gql_url_map, config.jwt_secret)
-                _, cleared_stage = gql_client.get_last_cleared_stage(
-                    planet_id, avatar_addr, timeout=1
+                # Cleared stage is filled by worker. Return empty status until then.
+                enqueue_stage_refresh(
+                    sess, planet_id, agent_addr, avatar_addr, season_pass.id
                 )
 
-                usp = UserSeasonPass(
-                    planet_id=planet_id,
-                    agent_addr=agent_addr,
-                    avatar_addr=avatar_addr,
-                    season_pass=season_pass,
-                    exp=cleared_stage,
-                )
-                if cleared_stage > 0:
-                    usp.level = get_level(sess, season_pass.pass_type, usp.exp)
-                sess.add(usp)
-                sess.commit()
-                sess.refresh(usp)
-
             case PassType.COURAGE_PASS | PassType.ADVENTURE_BOSS_PASS:
-                usp = UserSeasonPass(
-                    planet_id=planet_id,
-                    agent_addr=agent_addr,
-                    avatar_addr=avatar_addr,
-                    season_pass=season_pass,
-                    exp=0,
-                    level=0,
-                    is_premium=False,
-                    is_premium_plus=False,
-                    last_normal_claim=0,
-                    last_premium_claim=0,
-                )
+                pass
 
             case _:
                 raise ValueError(
                     f"{season_pass.pass_type.name} is not valid pass type to create default UserSeasonPass"
                 )
 
-        return usp
+        return UserSeasonPass(
+            planet_id=planet_id,
+            agent_addr=agent_addr,
+            avatar_addr=avatar_addr,
+            season_pass=season_pass,
+            exp=0,
+            level=0,
+            is_premium=False,
+            is_premium_plus=False,
+            last_normal_claim=0,
+            last_premium_claim=0,
+        )
     except Exception:
         sess.rollback()
         raise
@@ -125,13 +165,7 @@ def user_status(
         target = get_default_usp(sess, planet_id, agent_addr, avatar_addr, target_pass)
     elif pass_type == PassType.WORLD_CLEAR_PASS and target.exp == 0:
         # 0 cleared stage is usually not normal data.
-        _, cleared_stage = get_last_cleared_stage(
-            planet_id, target.avatar_addr, timeout=1
-        )
-        target.exp = cleared_stage
-        target.level = get_level(sess, target_pass.pass_type, target.exp)
-        sess.add(target)
-        sess.commit()
+        enqueue_stage_refresh(sess, planet_id, agent_addr, avatar_addr, target_pass.id)
 
     return target
 
@@ -145,47 +179,62 @@ def all_user_status(
     avatar_addr = avatar_addr.lower()
     resp = []
 
+    # Get current passes
+    current_passes = get_current_passes(sess)
+    if not current_passes:
+        return resp
+
+    # Get current and prev. passes with user data at once
+    usp_join = and_(
+        UserSeasonPass.season_pass_id == SeasonPass.id,
+        UserSeasonPass.planet_id == planet_id,
+        UserSeasonPass.avatar_addr == avatar_addr,
+    )
+    pass_cond = or_(
+        SeasonPass.id.in_([x.id for x in current_passes.values()]),
+        *[
+            and_(
+                SeasonPass.pass_type == x.pass_type,
+                SeasonPass.season_index == x.season_index - 1,
+            )
+            for x in current_passes.values()
+        ],
+    )
+    rows = sess.execute(
+        select(SeasonPass, UserSeasonPass)
+        .outerjoin(UserSeasonPass, usp_join)
+        .where(pass_cond)
+        .order_by(desc(SeasonPass.id))
+    ).all()
+    usp_dict = {}
+    for season_pass, usp in rows:
+        usp_dict.setdefault(
+            (season_pass.pass_type, season_pass.season_index), (season_pass, usp)
+        )
+
     for pass_type in PassType:
-        # Get current passes
-        target_pass = get_pass(sess, pass_type, validate_current=True)
+        target_pass = current_passes.get(pass_type)
         if not target_pass:
             continue
 
-        target = sess.scalar(
-            select(UserSeasonPass).where(
-                UserSeasonPass.planet_id == planet_id,
-                UserSeasonPass.season_pass_id == target_pass.id,
-                UserSeasonPass.avatar_addr == avatar_addr,
-            )
-        )
+        _, target = usp_dict[(pass_type, target_pass.season_index)]
         if not target:
             target = get_default_usp(
                 sess, planet_id, agent_addr, avatar_addr, target_pass
             )
         elif pass_type == PassType.WORLD_CLEAR_PASS and target.exp == 0:
             # 0 cleared stage is usually not normal data.
-            _, cleared_stage = get_last_cleared_stage(
-                planet_id, target.avatar_addr, timeout=1
+            enqueue_stage_refresh(
+                sess, planet_id, agent_addr, avatar_addr, target_pass.id
             )
-            target.exp = cleared_stage
-            target.level = get_level(sess, target_pass.pass_type, target.exp)
-            sess.add(target)
-            sess.commit()
-
         resp.append(target)
 
         # Get prev. pass
-        prev_pass = get_pass(sess, pass_type, season_index=target_pass.season_index - 1)
+        prev_pass, prev = usp_dict.get(
+            (pass_type, target_pass.season_index - 1), (None, None)
+        )
         if not prev_pass:
             continue
-
-        prev = sess.scalar(
-            select(UserSeasonPass).where(
-                UserSeasonPass.planet_id == planet_id,
-                UserSeasonPass.season_pass_id == prev_pass.id,
-                UserSeasonPass.avatar_addr == avatar_addr,
-            )
-        )
         if not prev:
             prev = get_default_usp(sess, planet_id, agent_addr, avatar_addr, prev_pass)
         resp.append(prev)
@@ -193,6 +242,213 @@ def all_user_status(
     return resp
 
 
+def _batch_status_item(
+    avatar: AvatarKeySchema, season: CachedSeason, usp: Optional[UserSeasonPass]
+) -> bytes:
+    item = UserSeasonPassSchema(
+        planet_id=avatar.planet_id,
+        agent_addr=usp.agent_addr if usp else avatar.agent_addr,
+        avatar_addr=avatar.avatar_addr,
+        season_pass=SimpleSeasonPassSchema.model_validate(season),
+        claim_limit_timestamp=season.claim_limit_timestamp,
+    )
+    if usp:
+        item.level = usp.level
+        item.exp = usp.exp
+        item.is_premium = usp.is_premium
+        item.is_premium_plus = usp.is_premium_plus
+        item.last_normal_claim = usp.last_normal_claim
+        item.last_premium_claim = usp.last_premium_claim
+    return item.model_dump_json().encode()
+
+
+@router.post("/status/batch", response_model=List[UserSeasonPassSchema])
+def batch_user_status(request: BatchStatusRequestSchema, sess=Depends(session)):
+    """
+    # Get current season pass status of many avatars at once
+    ---
+    Returns status of every current pass for all requested (planet, avatar) pairs.
+    Use `pass_type_list` to get only some of pass types.
+
+    Avatars without any activity get default status.
+    `WorldClearPass` status of such avatars is queued to be fetched from chain only when `resolve_missing` is set.
+
+    Response is streamed as JSON array, ordered by request and pass type.
+    """
+    current_passes = season_cache.get_current(sess)
+    if request.pass_type_list is not None:
+        current_passes = {
+            k: v for k, v in current_passes.items() if k in request.pass_type_list
+        }
+
+    usp_dict = {}
+    if current_passes:
+        key_list = list({(x.planet_id, x.avatar_addr) for x in request.avatar_list})
+        for usp in sess.scalars(
+            select(UserSeasonPass).where(
+                UserSeasonPass.season_pass_id.in_(
+                    [x.id for x in current_passes.values()]
+                ),
+                tuple_(UserSeasonPass.planet_id, UserSeasonPass.avatar_addr).in_(
+                    key_list
+                ),
+            )
+        ):
+            usp_dict[
+                (PlanetID(usp.planet_id), usp.avatar_addr, usp.season_pass_id)
+            ] = usp
+
+    # Queue missing avatars before streaming: the session must not be used by the generator.
+    world_clear = current_passes.get(PassType.WORLD_CLEAR_PASS)
+    if request.resolve_missing and world_clear:
+        enqueue_stage_refresh_list(
+            sess,
+            list(
+                {
+                    (x.planet_id, x.avatar_addr): {
+                        "planet_id": x.planet_id,
+                        "agent_addr": x.agent_addr,
+                        "avatar_addr": x.avatar_addr,
+                        "season_pass_id": world_clear.id,
+                    }
+                    for x in request.avatar_list
+                    if (x.planet_id, x.avatar_addr, world_clear.id) not in usp_dict
+                }.values()
+            ),
+        )
+
+    def stream():
+        yield b"["
+        first = True
+        for avatar in request.avatar_list:
+            for pass_type in PassType:
+                season = current_passes.get(pass_type)
+                if not season:
+                    continue
+
+                if not first:
+                    yield b","
+                first = False
+                yield _batch_status_item(
+                    avatar,
+                    season,
+                    usp_dict.get((avatar.planet_id, avatar.avatar_addr, season.id)),
+                )
+        yield b"]"
+
+    return StreamingResponse(stream(), media_type="application/json")
+
+
+@router.get("/history", response_model=UserHistorySchema)
+def user_history(
+    planet_id: str,
+    avatar_addr: str,
+    pass_type: PassType,
+    season_index: int,
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    summary: bool = False,
+    sess=Depends(read_session),
+):
+    """
+    # Get exp history of avatar
+    ---
+    Returns actions counted to give exp to avatar in given season, latest block first.
+
+    Use `next_cursor` of response as `cursor` to get next page.
+    Set `summary` to get sum of count and exp for each action type over the whole season.
+    """
+    planet_id = PlanetID(bytes(planet_id, "utf-8"))
+    avatar_addr = avatar_addr.lower()
+    target_pass = get_pass(sess, pass_type, season_index)
+    if not target_pass:
+        raise SeasonNotFoundError(
+            f"Requested Season {pass_type}:{season_index} not exists."
+        )
+
+    # Every column used here is in `idx_action_history_avatar_block`
+    avatar_cond = (
+        ActionHistory.planet_id == planet_id,
+        ActionHistory.season_id == target_pass.id,
+        ActionHistory.avatar_addr == avatar_addr,
+    )
+    history_list, _, next_cursor = paginate(
+        sess,
+        select(ActionHistory)
+        .options(
+            load_only(
+                ActionHistory.block_index,
+                ActionHistory.tx_id,
+                ActionHistory.action,
+                ActionHistory.count,
+                ActionHistory.exp,
+            )
+        )
+        .where(*avatar_cond),
+        (ActionHistory.block_index, ActionHistory.id),
+        limit,
+        cursor=cursor,
+        count=False,
+    )
+
+    summary_list = None
+    if summary:
+        summary_list = [
+            ActionSummarySchema(action=action, tx_count=tx_count, count=count, exp=exp)
+            for action, tx_count, count, exp in sess.execute(
+                select(
+                    ActionHistory.action,
+                    func.count(),
+                    func.sum(ActionHistory.count),
+                    func.sum(ActionHistory.exp),
+                )
+                .where(*avatar_cond)
+                .group_by(ActionHistory.action)
+                .order_by(ActionHistory.action)
+            )
+        ]
+
+    return UserHistorySchema(
+        planet_id=planet_id,
+        avatar_addr=avatar_addr,
+        season_pass=SimpleSeasonPassSchema.model_validate(target_pass),
+        items=[ActionHistorySchema.model_validate(x) for x in history_list],
+        next_cursor=next_cursor,
+        summary=summary_list,
+    )
+
+
+@router.get("/exp-daily", response_model=List[ExpDailySchema])
+def user_exp_daily(
+    planet_id: str,
+    avatar_addr: str,
+    pass_type: PassType,
+    season_index: int,
+    sess=Depends(read_session),
+):
+    """
+    # Get daily exp of avatar
+    ---
+    Returns exp gained by avatar in each day (UTC) of given season, in date order.
+    """
+    planet_id = PlanetID(bytes(planet_id, "utf-8"))
+    target_pass = get_pass(sess, pass_type, season_index)
+    if not target_pass:
+        raise SeasonNotFoundError(
+            f"Requested Season {pass_type}:{season_index} not exists."
+        )
+
+    return sess.scalars(
+        select(AvatarExpDaily)
+        .where(
+            AvatarExpDaily.season_pass_id == target_pass.id,
+            AvatarExpDaily.planet_id == planet_id,
+            AvatarExpDaily.avatar_addr == avatar_addr.lower(),
+        )
+        .order_by(AvatarExpDaily.date)
+    ).all()
+
+
 @router.post(
     "/upgrade",
     response_model=UserSeasonPassSchema,
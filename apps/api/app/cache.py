@@ -0,0 +1,205 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from shared.enums import PassType
+from shared.models.season_pass import Exp, Level, SeasonPass
+from shared.utils.season_pass import get_current_passes
+from sqlalchemy import func, select
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.status import HTTP_304_NOT_MODIFIED
+
+from app.config import config
+
+
+@dataclass(frozen=True)
+class CachedSeason:
+    """Detached snapshot of `SeasonPass` metadata. Safe to share between sessions."""
+
+    id: int
+    pass_type: PassType
+    season_index: int
+    start_timestamp: Optional[datetime]
+    end_timestamp: Optional[datetime]
+
+    @property
+    def claim_limit_timestamp(self) -> Optional[datetime]:
+        return self.end_timestamp + timedelta(days=7) if self.end_timestamp else None
+
+
+class SeasonVersion:
+    """
+    Version of season data in DB shared by every API process.
+
+    Caches are process local, so admin changes made through another worker or pod
+    are found by this version, checked at most once every `interval` seconds.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._version: Optional[Tuple] = None
+        self._checked_at = 0.0
+
+    @staticmethod
+    def query(sess) -> Tuple:
+        """Row count and last update of season, exp and level tables, in one statement."""
+        return tuple(
+            sess.execute(
+                select(
+                    *[
+                        select(agg).select_from(model).scalar_subquery()
+                        for model in (SeasonPass, Exp, Level)
+                        for agg in (func.count(), func.max(model.updated_at))
+                    ]
+                )
+            ).one()
+        )
+
+    def check(self, sess):
+        """Drop season caches if season data is changed since last check."""
+        now = time.time()
+        with self._lock:
+            if now - self._checked_at < self.interval:
+                return
+            self._checked_at = now
+
+        version = self.query(sess)
+        with self._lock:
+            changed = self._version is not None and self._version != version
+            self._version = version
+        if changed:
+            invalidate_season_caches()
+
+
+class SeasonCache:
+    """
+    Process local cache of current season passes.
+
+    Entries expire after `ttl` seconds or at the end of the earliest cached season,
+    whichever comes first. Admin APIs call `invalidate` when seasons are changed,
+    and other processes find the change by `SeasonVersion`.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._current: Optional[Dict[PassType, CachedSeason]] = None
+        self._expires_at = 0.0
+
+    def get_current(self, sess) -> Dict[PassType, CachedSeason]:
+        season_version.check(sess)
+        with self._lock:
+            if self._current is not None and time.time() < self._expires_at:
+                return self._current
+
+        current = {
+            pass_type: CachedSeason(
+                id=x.id,
+                pass_type=x.pass_type,
+                season_index=x.season_index,
+                start_timestamp=x.start_timestamp,
+                end_timestamp=x.end_timestamp,
+            )
+            for pass_type, x in get_current_passes(sess).items()
+        }
+        expires_at = time.time() + self.ttl
+        for season in current.values():
+            if season.end_timestamp:
+                expires_at = min(expires_at, season.end_timestamp.timestamp())
+
+        with self._lock:
+            self._current = current
+            self._expires_at = expires_at
+        return current
+
+    def invalidate(self):
+        with self._lock:
+            self._current = None
+            self._expires_at = 0.0
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    Process local cache of pre-serialized JSON responses for public read APIs.
+
+    Builder returns serialized body and optional expiry timestamp (e.g. end of season).
+    Entries are dropped after `ttl` seconds, at given expiry, by `invalidate`
+    or when `SeasonVersion` finds season data changed by other processes.
+    """
+
+    def __init__(self, ttl: int, max_age: int):
+        self.ttl = ttl
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, CachedResponse] = {}
+
+    def get(
+        self, key: Hashable, builder: Callable[[], Tuple[bytes, Optional[float]]]
+    ) -> CachedResponse:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and now < entry.expires_at:
+            return entry
+
+        body, expires_at = builder()
+        entry = CachedResponse(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            expires_at=min(now + self.ttl, expires_at or float("inf")),
+        )
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def response(
+        self,
+        request: Request,
+        sess,
+        key: Hashable,
+        builder: Callable[[], Tuple[bytes, Optional[float]]],
+    ) -> Response:
+        season_version.check(sess)
+        entry = self.get(key, builder)
+        headers = {
+            "ETag": entry.etag,
+            "Cache-Control": f"public, max-age={self.max_age}",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and entry.etag in [
+            x.strip() for x in if_none_match.split(",")
+        ]:
+            return Response(status_code=HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(
+            content=entry.body, media_type="application/json", headers=headers
+        )
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+
+season_version = SeasonVersion(interval=config.season_version_interval)
+season_cache = SeasonCache(ttl=config.season_cache_ttl)
+response_cache = ResponseCache(
+    ttl=config.response_cache_ttl, max_age=config.response_cache_max_age
+)
+
+
+def invalidate_season_caches():
+    """Drop all cached data derived from season pass. Call this after changing seasons."""
+    season_cache.invalidate()
+    response_cache.invalidate()
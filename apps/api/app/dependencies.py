@@ -1,5 +1,11 @@
-from sqlalchemy import create_engine
+import logging
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import scoped_session, sessionmaker
+from starlette.requests import Request
 
 from app.config import config
 
@@ -13,6 +19,76 @@ engine = create_engine(
     pool_pre_ping=True  
 )
 
+replica_engine = (
+    create_engine(
+        str(config.pg_replica_dsn),
+        echo=config.db_echo,
+        pool_size=config.replica_pool_size,
+        max_overflow=config.replica_max_overflow,
+        pool_timeout=10,
+        pool_recycle=3600,
+        pool_pre_ping=True,
+    )
+    if config.pg_replica_dsn
+    else None
+)
+
+# Seconds behind primary. 0 when all received WAL is replayed.
+REPLICA_LAG_QUERY = text(
+    """SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END"""
+)
+
+
+class ReplicaLagChecker:
+    """Caches replica lag for a while so that every request does not ask replica."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._lag: Optional[float] = None
+        self._checked_at = 0.0
+
+    def get_lag(self, target_engine) -> Optional[float]:
+        """Returns replica lag in seconds, or `None` if replica is not available."""
+        with self._lock:
+            if time.time() - self._checked_at < self.interval:
+                return self._lag
+            # Only one request checks lag. Others use previous value meanwhile.
+            self._checked_at = time.time()
+
+        try:
+            with target_engine.connect() as conn:
+                lag = float(conn.scalar(REPLICA_LAG_QUERY))
+        except Exception as e:
+            logging.warning(f"Replica is not available: {e}")
+            lag = None
+
+        with self._lock:
+            self._lag = lag
+        return lag
+
+
+replica_lag_checker = ReplicaLagChecker(interval=config.replica_lag_check_interval)
+
+
+def get_read_engine(path: str):
+    """
+    Select engine for read only route.
+    Replica is used when it exists and its lag is in tolerance of the route, otherwise primary.
+    """
+    if replica_engine is None:
+        return engine
+
+    max_lag = config.replica_max_lag_map.get(path, config.replica_max_lag)
+    lag = replica_lag_checker.get_lag(replica_engine)
+    if lag is None or lag > max_lag:
+        return engine
+    return replica_engine
+
 
 def session():
     sess = scoped_session(sessionmaker(engine))
@@ -20,3 +96,18 @@ def session():
         yield sess
     finally:
         sess.close()
+
+
+def read_session(request: Request):
+    """
+    Session for read only endpoints. Do not write anything using this session.
+    Lag tolerance can be set per route path using `replica_max_lag_map` setting.
+    """
+    route = request.scope.get("route")
+    sess = scoped_session(
+        sessionmaker(get_read_engine(route.path if route else request.url.path))
+    )
+    try:
+        yield sess
+    finally:
+        sess.close()
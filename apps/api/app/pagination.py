@@ -0,0 +1,109 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, Select, desc, func, literal, select, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    return (
+        base64.urlsafe_b64encode(
+            json.dumps(
+                [x.isoformat() if isinstance(x, datetime) else x for x in values]
+            ).encode()
+        )
+        .decode()
+        .rstrip("=")
+    )
+
+
+def nulls_first(column):
+    """
+    Sort key of nullable timestamp `column`, keeping NULLs first in descending order like PostgreSQL.
+    Rows are still read by `column.key`, so cursor of NULL row is decoded back to `infinity`.
+    """
+    return func.coalesce(column, literal("infinity", column.type)).label(column.key)
+
+
+def _decode_value(value: Any, column_type) -> Any:
+    if not isinstance(column_type, DateTime):
+        return value
+    return "infinity" if value is None else datetime.fromisoformat(value)
+
+
+def decode_cursor(cursor: str, key_columns: Sequence) -> List[Any]:
+    try:
+        values = json.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        )
+        if len(values) != len(key_columns):
+            raise ValueError("Cursor does not match to sort key")
+        return [_decode_value(x, col.type) for col, x in zip(key_columns, values)]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, stmt: Select):
+        self.statement = stmt
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw):
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+
+def estimate_count(sess, stmt: Select) -> int:
+    """
+    Get planner's estimated row count of query instead of counting all rows.
+    Planner estimation is based on `pg_class.reltuples` and column statistics, so it can be off after massive changes until `ANALYZE`.
+    """
+    plan = sess.execute(Explain(stmt)).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def paginate(
+    sess,
+    stmt: Select,
+    key_columns: Sequence,
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+    exact_total: bool = False,
+    count: bool = True,
+) -> Tuple[list, Optional[int], Optional[str]]:
+    """
+    Paginate query in descending order of `key_columns`.
+
+    Next page is fetched using `cursor` from previous page. `offset` is only kept for old clients and ignored when cursor is given.
+    Returns (rows, total, next_cursor). `total` is exact only when `exact_total` is set,
+    and `None` when `count` is unset to skip counting.
+    `key_columns` must be unique together (e.g. (created_at, id)) and should be covered by index.
+    """
+    total = None
+    if exact_total:
+        total = sess.scalar(select(func.count()).select_from(stmt.subquery()))
+    elif count:
+        total = estimate_count(sess, stmt)
+
+    page_stmt = stmt.order_by(*[desc(x) for x in key_columns])
+    if cursor:
+        page_stmt = page_stmt.where(
+            tuple_(*key_columns) < tuple_(*decode_cursor(cursor, key_columns))
+        )
+    elif offset:
+        page_stmt = page_stmt.offset(offset)
+
+    rows = sess.scalars(page_stmt.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], x.key) for x in key_columns])
+    return rows, total, next_cursor
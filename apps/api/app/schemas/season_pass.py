@@ -3,7 +3,7 @@ from typing import List, Optional
 
 from pydantic import BaseModel as BaseSchema
 from pydantic import model_validator
-from shared.enums import ActionType, PassType
+from shared.enums import ActionType, PassType, PlanetID
 
 
 class ItemInfoSchema(BaseSchema):
@@ -117,3 +117,19 @@ class UpdateSeasonPassSchema(BaseSchema):
     reward_list: Optional[List[RewardSchema]] = None
     instant_exp: Optional[int] = None
     exp_list: Optional[List[CreateExpSchema]] = None
+
+
+class LeaderboardRankSchema(BaseSchema):
+    rank: int
+    agent_addr: str
+    avatar_addr: str
+    level: int
+    exp: int
+
+
+class LeaderboardSchema(BaseSchema):
+    planet_id: PlanetID
+    season_pass: SimpleSeasonPassSchema
+    page: int
+    has_next: bool
+    rank_list: List[LeaderboardRankSchema]
@@ -1,9 +1,9 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import List, Optional
 
 from pydantic import BaseModel as BaseSchema
 from pydantic import Field, model_validator
-from shared.enums import PassType, PlanetID
+from shared.enums import ActionType, PassType, PlanetID
 
 from app.config import config
 from app.schemas.season_pass import ClaimSchema, SimpleSeasonPassSchema
@@ -88,3 +88,67 @@ class ClaimRequestSchema(BaseSchema):
 class ClaimResultSchema(BaseSchema):
     user: UserSeasonPassSchema
     reward_list: List[ClaimSchema] = []
+
+
+class AvatarKeySchema(BaseSchema):
+    planet_id: PlanetID | str
+    avatar_addr: str
+    agent_addr: str = ""
+
+    @model_validator(mode="after")
+    def sanitize(self):
+        self.agent_addr = self.agent_addr.lower()
+        self.avatar_addr = self.avatar_addr.lower()
+        if isinstance(self.planet_id, str):
+            self.planet_id = PlanetID(bytes(self.planet_id, "utf-8"))
+        return self
+
+
+class BatchStatusRequestSchema(BaseSchema):
+    avatar_list: List[AvatarKeySchema] = Field(min_length=1)
+    pass_type_list: Optional[List[PassType]] = None
+    resolve_missing: bool = False
+
+    @model_validator(mode="after")
+    def limit(self):
+        if len(self.avatar_list) > config.batch_status_limit:
+            raise ValueError(
+                f"Too many avatars: {len(self.avatar_list)} > {config.batch_status_limit}"
+            )
+        return self
+
+
+class ActionHistorySchema(BaseSchema):
+    block_index: int
+    tx_id: str
+    action: ActionType
+    count: int
+    exp: int
+
+    class Config:
+        from_attributes = True
+
+
+class ActionSummarySchema(BaseSchema):
+    action: ActionType
+    tx_count: int
+    count: int
+    exp: int
+
+
+class UserHistorySchema(BaseSchema):
+    planet_id: PlanetID
+    avatar_addr: str
+    season_pass: SimpleSeasonPassSchema
+    items: List[ActionHistorySchema]
+    next_cursor: Optional[str] = None
+    summary: Optional[List[ActionSummarySchema]] = None
+
+
+class ExpDailySchema(BaseSchema):
+    date: date
+    exp: int
+    action_count: int
+
+    class Config:
+        from_attributes = True
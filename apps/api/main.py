@@ -12,11 +12,9 @@ from app.exceptions import (
 )
 from fastapi import FastAPI
 from fastapi.security import HTTPBearer
-from requests import ReadTimeout
 from starlette.requests import Request
 from starlette.responses import FileResponse, JSONResponse
 from starlette.status import (
-    HTTP_204_NO_CONTENT,
     HTTP_400_BAD_REQUEST,
     HTTP_404_NOT_FOUND,
     HTTP_500_INTERNAL_SERVER_ERROR,
@@ -52,8 +50,6 @@ def handle_exceptions(request: Request, e: Exception):
         status_code = HTTP_400_BAD_REQUEST
     elif type(e) == ServerOverloadError:
         status_code = HTTP_503_SERVICE_UNAVAILABLE
-    elif type(e) == ReadTimeout:
-        status_code = HTTP_204_NO_CONTENT
     else:
         status_code = HTTP_500_INTERNAL_SERVER_ERROR
 
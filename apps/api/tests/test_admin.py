@@ -2,9 +2,12 @@ from datetime import datetime, timedelta, timezone
 
 import jwt
 import pytest
-from shared.enums import ActionType, PassType, TxStatus
+from shared.enums import ActionType, PassType, PlanetID, TxStatus
+from shared.models.season_pass import SeasonPass
+from shared.models.user import Claim
+from sqlalchemy import event
 
-from .conftest import TEST_AVATAR_ADDR
+from .conftest import TEST_AGENT_ADDR, TEST_AVATAR_ADDR, engine
 
 
 @pytest.mark.parametrize("status", [None, TxStatus.SUCCESS, TxStatus.FAILURE])
@@ -114,6 +117,128 @@ def test_get_claims_invalid_params(client, valid_token):
     assert resp.status_code == 422
 
 
+def test_get_claims_cursor(client, valid_token, test_session):
+    """커서 기반 페이지네이션"""
+    now = datetime.now(tz=timezone.utc)
+    test_session.add_all(
+        [
+            Claim(
+                uuid=f"claim{i}",
+                agent_addr=TEST_AGENT_ADDR,
+                avatar_addr=TEST_AVATAR_ADDR,
+                planet_id=PlanetID.ODIN,
+                tx_status=TxStatus.SUCCESS,
+                reward_list=[],
+                # 같은 시각의 Claim도 빠짐없이 조회되어야 함
+                created_at=now - timedelta(hours=i // 2),
+            )
+            for i in range(5)
+        ]
+    )
+    test_session.commit()
+
+    headers = {"Authorization": f"Bearer {valid_token}"}
+    uuid_list = []
+    cursor = None
+    for _ in range(3):
+        params = {"limit": 2, "exact_total": True}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client.get("/api/admin/claims", headers=headers, params=params)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["total"] == 5
+        assert data["is_total_estimated"] is False
+        uuid_list.extend(x["uuid"] for x in data["items"])
+        cursor = data["next_cursor"]
+
+    assert cursor is None
+    assert sorted(uuid_list) == [f"claim{i}" for i in range(5)]
+    assert len(set(uuid_list)) == 5
+
+    # 추정 개수
+    resp = client.get("/api/admin/claims", headers=headers, params={"limit": 2})
+    assert resp.json()["is_total_estimated"] is True
+    assert resp.json()["total"] >= 0
+
+    resp = client.get(
+        "/api/admin/claims", headers=headers, params={"cursor": "invalid"}
+    )
+    assert resp.status_code == 400
+
+
+def test_get_seasons_cursor(client, valid_token, test_session):
+    """시작 시각 최신순 조회, 같은 시각이나 시작 시각이 없는 시즌도 빠짐없이 조회"""
+    now = datetime.now(tz=timezone.utc)
+    start_list = [now, now, None, now - timedelta(days=30), None]
+    test_session.add_all(
+        [
+            SeasonPass(
+                pass_type=PassType.COURAGE_PASS,
+                season_index=i,
+                start_timestamp=start,
+                reward_list=[],
+                instant_exp=0,
+            )
+            for i, start in enumerate(start_list)
+        ]
+    )
+    test_session.commit()
+
+    headers = {"Authorization": f"Bearer {valid_token}"}
+    season_list = []
+    cursor = None
+    for _ in range(3):
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client.get("/api/admin/seasons", headers=headers, params=params)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["total"] == 5
+        assert data["is_total_estimated"] is False
+        season_list.extend(x["season_index"] for x in data["items"])
+        cursor = data["next_cursor"]
+
+    assert cursor is None
+    # 시작 시각이 없는 시즌이 먼저, 같은 시각은 id 역순
+    assert season_list == [4, 2, 1, 0, 3]
+
+
+def test_get_premium_users(client, valid_token, test_users):
+    """프리미엄 사용자 조회 시 시즌 정보를 한 번에 조회"""
+    statements = []
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    headers = {"Authorization": f"Bearer {valid_token}"}
+    event.listen(engine, "before_cursor_execute", count_query)
+    try:
+        resp = client.get(
+            "/api/admin/premium-users",
+            headers=headers,
+            params={"pass_type": PassType.COURAGE_PASS.value, "season_index": 1},
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", count_query)
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert len(data["items"]) == 1
+    assert data["items"][0]["season_info"]["season_index"] == 1
+    # count + page
+    assert len(statements) == 2
+
+    # 없는 시즌은 결과 없음
+    resp = client.get(
+        "/api/admin/premium-users",
+        headers=headers,
+        params={"pass_type": PassType.COURAGE_PASS.value, "season_index": 3},
+    )
+    assert resp.json()["items"] == []
+
+
 # 시즌패스 관리 API 테스트
 def test_get_season_passes(client, valid_token, test_session):
     """시즌패스 목록 조회 테스트"""
@@ -350,6 +475,11 @@ def test_create_season_pass_success(client, valid_token, test_session):
     assert data["instant_exp"] == 1000
     assert len(data["exp_list"]) == 2
 
+    # 시즌 파티션은 API 요청 중이 아닌 워커의 파티션 태스크가 생성
+    from shared.utils.partition import get_action_history_partitions
+
+    assert get_action_history_partitions(test_session) == []
+
 
 def test_create_season_pass_duplicate(client, valid_token, test_session):
     """중복 시즌패스 생성 실패 테스트"""
@@ -784,3 +914,57 @@ def test_burn_asset_different_currencies(client, valid_token, monkeypatch):
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == "success"
+
+
+def test_get_reward_claims(client, valid_token, test_session):
+    """월별 보상 합계는 집계 테이블과 Claim 직접 합산 결과가 같아야 함"""
+    from shared.utils.claim import add_claim_reward_stat
+
+    now = datetime.now(tz=timezone.utc)
+    claim_list = [
+        Claim(
+            uuid=f"claim{i}",
+            agent_addr=TEST_AGENT_ADDR,
+            avatar_addr=TEST_AVATAR_ADDR,
+            planet_id=planet_id,
+            tx_status=TxStatus.SUCCESS,
+            reward_list=[
+                {"ticker": "FAV__CRYSTAL", "amount": 1.5, "decimal_places": 18},
+                {"ticker": "Item_500000", "amount": 2},
+            ],
+            created_at=now,
+        )
+        for i, planet_id in enumerate(
+            [PlanetID.ODIN, PlanetID.ODIN, PlanetID.HEIMDALL, PlanetID.ODIN_INTERNAL]
+        )
+    ]
+    test_session.add_all(claim_list)
+    test_session.commit()
+    add_claim_reward_stat(test_session, [x.id for x in claim_list])
+    test_session.commit()
+
+    headers = {"Authorization": f"Bearer {valid_token}"}
+    params = {"year": now.year, "month": now.month}
+    resp = client.get("/api/admin/stats/reward-claims", headers=headers, params=params)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert set(data["planets"].keys()) == {"ODIN", "HEIMDALL"}
+    odin = {x["ticker"]: x for x in data["planets"]["ODIN"]["tokens"]}
+    assert float(odin["FAV__CRYSTAL"]["total_amount"]) == 3.0
+    assert odin["FAV__CRYSTAL"]["decimal_places"] == 18
+    assert float(odin["Item_500000"]["total_amount"]) == 4
+    assert odin["Item_500000"]["decimal_places"] == 0
+
+    live_resp = client.get(
+        "/api/admin/stats/reward-claims",
+        headers=headers,
+        params={**params, "live": True},
+    )
+    assert live_resp.status_code == 200
+    live = live_resp.json()["planets"]
+    for planet, tokens in data["planets"].items():
+        assert sorted(
+            (x["ticker"], float(x["total_amount"])) for x in tokens["tokens"]
+        ) == sorted(
+            (x["ticker"], float(x["total_amount"])) for x in live[planet]["tokens"]
+        )
@@ -3,6 +3,9 @@ from datetime import datetime, timedelta, timezone
 import pytest
 from shared.enums import ActionType, PassType, PlanetID
 from shared.models.season_pass import Exp, Level, SeasonPass
+from sqlalchemy import update
+
+from app.exceptions import SeasonNotFoundError
 
 
 @pytest.mark.usefixtures("test_session")
@@ -317,3 +320,176 @@ def test_schema_backward_compatibility():
     assert schema.end_timestamp is not None
     assert len(schema.reward_list) == 1
     assert schema.repeat_last_reward == True
+
+
+def _add_current_season(test_session, season_id=1):
+    season_data = SeasonPass(
+        id=season_id,
+        pass_type=PassType.COURAGE_PASS,
+        season_index=season_id,
+        start_timestamp=datetime.now(tz=timezone.utc) - timedelta(days=1),
+        end_timestamp=datetime.now(tz=timezone.utc) + timedelta(days=1),
+        instant_exp=1000,
+        reward_list=[
+            {
+                "level": 1,
+                "normal": [{"ticker": "Item_1001", "amount": 10}],
+                "premium": [{"ticker": "FAV__CRYSTAL", "amount": 200.0}],
+            }
+        ],
+    )
+    test_session.add(season_data)
+    test_session.commit()
+    return season_data
+
+
+def test_current_season_etag(client, test_session):
+    """ETag 일치 시 304 응답"""
+    _add_current_season(test_session)
+    params = {
+        "planet_id": PlanetID.ODIN.value.decode(),
+        "pass_type": PassType.COURAGE_PASS.value,
+    }
+
+    resp = client.get("/api/season-pass/current", params=params)
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert resp.headers["Cache-Control"].startswith("public, max-age=")
+    assert resp.json()["reward_list"][0]["normal"]["item"] == [
+        {"id": 1001, "amount": 10}
+    ]
+
+    resp = client.get(
+        "/api/season-pass/current", params=params, headers={"If-None-Match": etag}
+    )
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["ETag"] == etag
+
+    resp = client.get(
+        "/api/season-pass/current",
+        params=params,
+        headers={"If-None-Match": '"outdated"'},
+    )
+    assert resp.status_code == 200
+
+
+def test_current_season_cache_invalidation(client, test_session, valid_token):
+    """어드민에서 시즌 변경 시 캐시 무효화"""
+    _add_current_season(test_session)
+    params = {
+        "planet_id": PlanetID.ODIN.value.decode(),
+        "pass_type": PassType.COURAGE_PASS.value,
+    }
+    resp = client.get("/api/season-pass/current", params=params)
+    etag = resp.headers["ETag"]
+
+    resp = client.delete(
+        "/api/admin/season-passes/1",
+        headers={"Authorization": f"Bearer {valid_token}"},
+    )
+    assert resp.status_code == 200
+
+    # 캐시된 응답 대신 새로 조회하여 시즌 없음 에러
+    with pytest.raises(SeasonNotFoundError):
+        client.get(
+            "/api/season-pass/current",
+            params=params,
+            headers={"If-None-Match": etag},
+        )
+
+
+def test_current_season_cache_changed_by_other_process(
+    client, test_session, monkeypatch
+):
+    """다른 프로세스에서 변경한 시즌도 버전 확인으로 캐시 무효화"""
+    from app.cache import season_version
+
+    monkeypatch.setattr(season_version, "interval", 0)
+    _add_current_season(test_session)
+    params = {
+        "planet_id": PlanetID.ODIN.value.decode(),
+        "pass_type": PassType.COURAGE_PASS.value,
+    }
+    resp = client.get("/api/season-pass/current", params=params)
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+
+    # Change made by other API process: local caches are not invalidated
+    test_session.execute(
+        update(SeasonPass).where(SeasonPass.id == 1).values(reward_list=[])
+    )
+    test_session.commit()
+
+    resp = client.get(
+        "/api/season-pass/current", params=params, headers={"If-None-Match": etag}
+    )
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+    assert resp.json()["reward_list"] == []
+
+
+def test_exp_info_not_found(client, test_session):
+    with pytest.raises(SeasonNotFoundError):
+        client.get(
+            "/api/season-pass/exp",
+            params={"pass_type": PassType.COURAGE_PASS.value, "season_index": 1},
+        )
+
+
+def test_leaderboard(client, test_session, monkeypatch):
+    """경험치 순 리더보드를 페이지 단위로 조회. 최대 순위까지만 제공"""
+    from shared.models.user import UserSeasonPass
+
+    from app.config import config
+
+    monkeypatch.setattr(config, "leaderboard_page_size", 2)
+    monkeypatch.setattr(config, "leaderboard_max_rank", 3)
+    _add_current_season(test_session)
+    test_session.add_all(
+        [
+            UserSeasonPass(
+                planet_id=PlanetID.ODIN,
+                agent_addr=f"0xagent{i}",
+                avatar_addr=f"0xavatar{i}",
+                season_pass_id=1,
+                exp=exp,
+                level=exp // 100,
+            )
+            for i, exp in enumerate([100, 500, 300, 500, 0])
+        ]
+        + [
+            UserSeasonPass(
+                planet_id=PlanetID.HEIMDALL,
+                agent_addr="0xagent",
+                avatar_addr="0xavatar",
+                season_pass_id=1,
+                exp=1000,
+                level=10,
+            )
+        ]
+    )
+    test_session.commit()
+
+    params = {
+        "planet_id": PlanetID.ODIN.value.decode(),
+        "pass_type": PassType.COURAGE_PASS.value,
+        "season_index": 1,
+    }
+    resp = client.get("/api/season-pass/leaderboard", params=params)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["has_next"] is True
+    assert [(x["rank"], x["avatar_addr"], x["exp"]) for x in data["rank_list"]] == [
+        (1, "0xavatar1", 500),
+        (2, "0xavatar3", 500),
+    ]
+
+    resp = client.get("/api/season-pass/leaderboard", params={**params, "page": 2})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["has_next"] is False
+    assert [(x["rank"], x["avatar_addr"]) for x in data["rank_list"]] == [
+        (3, "0xavatar2")
+    ]
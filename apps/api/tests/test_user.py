@@ -0,0 +1,402 @@
+from datetime import datetime, timedelta, timezone
+
+from shared.enums import PassType, PlanetID
+from shared.models.season_pass import SeasonPass
+from shared.models.user import UserSeasonPass
+from sqlalchemy import event, select
+
+from .conftest import TEST_AGENT_ADDR, TEST_AVATAR_ADDR, engine
+
+
+def _add_seasons(test_session):
+    now = datetime.now(tz=timezone.utc)
+    season_list = [
+        SeasonPass(
+            id=1,
+            pass_type=PassType.COURAGE_PASS,
+            season_index=1,
+            start_timestamp=now - timedelta(days=3),
+            end_timestamp=now - timedelta(days=1),
+            instant_exp=100,
+            reward_list=[],
+        ),
+        SeasonPass(
+            id=2,
+            pass_type=PassType.COURAGE_PASS,
+            season_index=2,
+            start_timestamp=now - timedelta(days=1),
+            end_timestamp=now + timedelta(days=1),
+            instant_exp=100,
+            reward_list=[],
+        ),
+        SeasonPass(
+            id=3,
+            pass_type=PassType.ADVENTURE_BOSS_PASS,
+            season_index=1,
+            start_timestamp=now - timedelta(days=1),
+            end_timestamp=now + timedelta(days=1),
+            instant_exp=0,
+            reward_list=[],
+        ),
+    ]
+    test_session.add_all(season_list)
+    test_session.commit()
+    return season_list
+
+
+def test_all_user_status(client, test_session):
+    """현재/이전 시즌 상태를 한 번에 조회"""
+    _add_seasons(test_session)
+    test_session.add(
+        UserSeasonPass(
+            planet_id=PlanetID.ODIN,
+            agent_addr=TEST_AGENT_ADDR,
+            avatar_addr=TEST_AVATAR_ADDR,
+            season_pass_id=1,
+            is_premium=True,
+            exp=300,
+            level=3,
+        )
+    )
+    test_session.commit()
+
+    resp = client.get(
+        "/api/user/status/all",
+        params={
+            "planet_id": PlanetID.ODIN.value.decode(),
+            "agent_addr": TEST_AGENT_ADDR,
+            "avatar_addr": TEST_AVATAR_ADDR,
+        },
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [
+        (x["season_pass"]["pass_type"], x["season_pass"]["season_index"]) for x in data
+    ] == [
+        (PassType.COURAGE_PASS.value, 2),
+        (PassType.COURAGE_PASS.value, 1),
+        (PassType.ADVENTURE_BOSS_PASS.value, 1),
+    ]
+    # Current season is synthesized default
+    assert data[0]["exp"] == 0
+    assert data[0]["is_premium"] is False
+    # Prev. season comes from DB
+    assert data[1]["exp"] == 300
+    assert data[1]["level"] == 3
+    assert data[1]["is_premium"] is True
+
+
+def test_all_user_status_query_count(client, test_session):
+    """시즌 수와 관계없이 쿼리 수가 고정되어야 함"""
+    _add_seasons(test_session)
+    statements = []
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_query)
+    try:
+        resp = client.get(
+            "/api/user/status/all",
+            params={
+                "planet_id": PlanetID.ODIN.value.decode(),
+                "agent_addr": TEST_AGENT_ADDR,
+                "avatar_addr": TEST_AVATAR_ADDR,
+            },
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", count_query)
+
+    assert resp.status_code == 200
+    assert len(resp.json()) == 3
+    assert len(statements) <= 2
+
+
+def test_all_user_status_no_season(client, test_session):
+    resp = client.get(
+        "/api/user/status/all",
+        params={
+            "planet_id": PlanetID.ODIN.value.decode(),
+            "agent_addr": TEST_AGENT_ADDR,
+            "avatar_addr": TEST_AVATAR_ADDR,
+        },
+    )
+    assert resp.status_code == 200
+    assert resp.json() == []
+
+
+def test_batch_user_status(client, test_session):
+    """여러 아바타의 현재 시즌 상태를 한 번에 조회"""
+    _add_seasons(test_session)
+    test_session.add(
+        UserSeasonPass(
+            planet_id=PlanetID.ODIN,
+            agent_addr=TEST_AGENT_ADDR,
+            avatar_addr=TEST_AVATAR_ADDR,
+            season_pass_id=2,
+            exp=500,
+            level=5,
+        )
+    )
+    test_session.commit()
+
+    resp = client.post(
+        "/api/user/status/batch",
+        json={
+            "avatar_list": [
+                {
+                    "planet_id": PlanetID.ODIN.value.decode(),
+                    "avatar_addr": TEST_AVATAR_ADDR.upper(),
+                },
+                {
+                    "planet_id": PlanetID.HEIMDALL.value.decode(),
+                    "avatar_addr": TEST_AVATAR_ADDR,
+                },
+            ],
+            "pass_type_list": [PassType.COURAGE_PASS.value],
+        },
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert len(data) == 2
+    assert data[0]["planet_id"] == PlanetID.ODIN.value.decode()
+    assert data[0]["exp"] == 500
+    assert data[0]["level"] == 5
+    assert data[0]["season_pass"]["id"] == 2
+    assert data[1]["planet_id"] == PlanetID.HEIMDALL.value.decode()
+    assert data[1]["exp"] == 0
+
+
+def test_batch_user_status_too_many(client, test_session):
+    from app.config import config
+
+    resp = client.post(
+        "/api/user/status/batch",
+        json={
+            "avatar_list": [
+                {"planet_id": PlanetID.ODIN.value.decode(), "avatar_addr": f"0x{i}"}
+                for i in range(config.batch_status_limit + 1)
+            ]
+        },
+    )
+    assert resp.status_code == 422
+
+
+def test_world_clear_status_enqueue(client, test_session):
+    """월드 클리어 패스 기본 상태는 즉시 반환하고 갱신 대기열에 등록"""
+    from shared.models.user import StageRefreshQueue
+
+    now = datetime.now(tz=timezone.utc)
+    test_session.add(
+        SeasonPass(
+            id=1,
+            pass_type=PassType.WORLD_CLEAR_PASS,
+            season_index=1,
+            start_timestamp=now - timedelta(days=1),
+            end_timestamp=now + timedelta(days=1),
+            instant_exp=0,
+            reward_list=[],
+        )
+    )
+    test_session.commit()
+
+    params = {
+        "planet_id": PlanetID.ODIN.value.decode(),
+        "agent_addr": TEST_AGENT_ADDR,
+        "avatar_addr": TEST_AVATAR_ADDR,
+        "pass_type": PassType.WORLD_CLEAR_PASS.value,
+        "season_index": 1,
+    }
+    for _ in range(2):
+        resp = client.get("/api/user/status", params=params)
+        assert resp.status_code == 200
+        assert resp.json()["exp"] == 0
+
+    queue = test_session.scalars(select(StageRefreshQueue)).all()
+    assert len(queue) == 1
+    assert queue[0].avatar_addr == TEST_AVATAR_ADDR
+    assert queue[0].season_pass_id == 1
+    assert test_session.scalar(select(UserSeasonPass)) is None
+
+
+def test_batch_user_status_resolve_missing(client, test_session):
+    """누락된 월드 클리어 상태는 응답 전에 한 번에 갱신 대기열에 등록"""
+    from shared.models.user import StageRefreshQueue
+
+    now = datetime.now(tz=timezone.utc)
+    test_session.add(
+        SeasonPass(
+            id=1,
+            pass_type=PassType.WORLD_CLEAR_PASS,
+            season_index=1,
+            start_timestamp=now - timedelta(days=1),
+            end_timestamp=now + timedelta(days=1),
+            instant_exp=0,
+            reward_list=[],
+        )
+    )
+    test_session.commit()
+
+    avatar_list = [
+        {
+            "planet_id": PlanetID.ODIN.value.decode(),
+            "agent_addr": TEST_AGENT_ADDR,
+            "avatar_addr": f"{TEST_AVATAR_ADDR}{i}",
+        }
+        for i in range(3)
+    ]
+    resp = client.post(
+        "/api/user/status/batch",
+        json={"avatar_list": avatar_list + avatar_list[:1], "resolve_missing": True},
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert len(data) == 4
+    assert all(x["exp"] == 0 for x in data)
+
+    queue = test_session.scalars(
+        select(StageRefreshQueue).order_by(StageRefreshQueue.avatar_addr)
+    ).all()
+    assert [x.avatar_addr for x in queue] == [
+        f"{TEST_AVATAR_ADDR}{i}" for i in range(3)
+    ]
+    assert all(x.season_pass_id == 1 for x in queue)
+
+
+def test_user_history(client, test_session):
+    """아바타의 시즌 경험치 획득 이력을 최신 블록부터 페이지 단위로 조회"""
+    from shared.enums import ActionType
+    from shared.models.action import ActionHistory
+
+    _add_seasons(test_session)
+    test_session.add_all(
+        [
+            ActionHistory(
+                planet_id=PlanetID.ODIN,
+                season_id=2,
+                block_index=100 + i,
+                tx_id=f"tx{i}",
+                agent_addr=TEST_AGENT_ADDR,
+                avatar_addr=TEST_AVATAR_ADDR,
+                action=ActionType.HAS if i % 2 else ActionType.SWEEP,
+                count=i + 1,
+                exp=(i + 1) * 10,
+            )
+            for i in range(5)
+        ]
+        # Other season and planet must not be shown
+        + [
+            ActionHistory(
+                planet_id=PlanetID.ODIN,
+                season_id=1,
+                block_index=10,
+                tx_id="prev",
+                agent_addr=TEST_AGENT_ADDR,
+                avatar_addr=TEST_AVATAR_ADDR,
+                action=ActionType.HAS,
+                count=1,
+                exp=10,
+            ),
+            ActionHistory(
+                planet_id=PlanetID.HEIMDALL,
+                season_id=2,
+                block_index=200,
+                tx_id="heimdall",
+                agent_addr=TEST_AGENT_ADDR,
+                avatar_addr=TEST_AVATAR_ADDR,
+                action=ActionType.HAS,
+                count=1,
+                exp=10,
+            ),
+        ]
+    )
+    test_session.commit()
+
+    params = {
+        "planet_id": PlanetID.ODIN.value.decode(),
+        "avatar_addr": TEST_AVATAR_ADDR.upper(),
+        "pass_type": PassType.COURAGE_PASS.value,
+        "season_index": 2,
+        "limit": 3,
+    }
+    resp = client.get("/api/user/history", params={**params, "summary": True})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [x["tx_id"] for x in data["items"]] == ["tx4", "tx3", "tx2"]
+    assert data["next_cursor"] is not None
+    assert {
+        x["action"]: (x["tx_count"], x["count"], x["exp"]) for x in data["summary"]
+    } == {
+        ActionType.HAS.value: (2, 6, 60),
+        ActionType.SWEEP.value: (3, 9, 90),
+    }
+
+    # Total is not returned, so it must not be estimated
+    statements = []
+
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record_query)
+    try:
+        resp = client.get(
+            "/api/user/history", params={**params, "cursor": data["next_cursor"]}
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record_query)
+    assert not [x for x in statements if x.lstrip().upper().startswith("EXPLAIN")]
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [x["tx_id"] for x in data["items"]] == ["tx1", "tx0"]
+    assert data["next_cursor"] is None
+    assert data["summary"] is None
+
+
+def test_user_exp_daily(client, test_session):
+    """일별 경험치 집계는 이력 추가 시 함께 누적"""
+    from shared.enums import ActionType
+    from shared.models.action import ActionHistory
+    from shared.utils.leaderboard import add_avatar_exp_daily
+
+    _add_seasons(test_session)
+    now = datetime.now(tz=timezone.utc)
+    for created_at_list in ([now - timedelta(days=1), now], [now]):
+        history_list = [
+            ActionHistory(
+                planet_id=PlanetID.ODIN,
+                season_id=2,
+                block_index=100,
+                tx_id="tx",
+                agent_addr=TEST_AGENT_ADDR,
+                avatar_addr=TEST_AVATAR_ADDR,
+                action=ActionType.HAS,
+                count=1,
+                exp=10,
+                created_at=created_at,
+            )
+            for created_at in created_at_list
+        ]
+        test_session.add_all(history_list)
+        test_session.flush()
+        add_avatar_exp_daily(test_session, 2, [x.id for x in history_list])
+        test_session.commit()
+
+    resp = client.get(
+        "/api/user/exp-daily",
+        params={
+            "planet_id": PlanetID.ODIN.value.decode(),
+            "avatar_addr": TEST_AVATAR_ADDR.upper(),
+            "pass_type": PassType.COURAGE_PASS.value,
+            "season_index": 2,
+        },
+    )
+    assert resp.status_code == 200
+    assert resp.json() == [
+        {
+            "date": (now - timedelta(days=1)).date().isoformat(),
+            "exp": 10,
+            "action_count": 1,
+        },
+        {"date": now.date().isoformat(), "exp": 20, "action_count": 2},
+    ]
@@ -1,6 +1,10 @@
 from sqlalchemy import (
+    DDL,
+    JSON,
     BigInteger,
     Column,
+    Date,
+    DateTime,
     Enum,
     ForeignKey,
     Index,
@@ -8,6 +12,7 @@ from sqlalchemy import (
     LargeBinary,
     Text,
     UniqueConstraint,
+    event,
 )
 from sqlalchemy.dialects.postgresql import ENUM
 from sqlalchemy.orm import Mapped, relationship
@@ -35,14 +40,86 @@ class Block(AutoIdMixin, TimeStampMixin, Base):
     )
 
 
+class BlockRangeLedger(AutoIdMixin, TimeStampMixin, Base):
+    """
+    Block ranges processed out of order during parallel catch-up.
+    Ranges contiguous to `Block.last_processed_index` are merged into it and removed.
+    """
+
+    __tablename__ = "block_range_ledger"
+    pass_type = Column(Enum(PassType), nullable=False)
+    planet_id = Column(LargeBinary(length=12), nullable=False)
+    start_index = Column(BigInteger, nullable=False, doc="First block of range")
+    last_index = Column(BigInteger, nullable=False, doc="Last processed block of range")
+
+    __table_args__ = (
+        UniqueConstraint(
+            "planet_id", "pass_type", "start_index", name="block_range_ledger_unique"
+        ),
+    )
+
+
+class TrackerStream(AutoIdMixin, TimeStampMixin, Base):
+    """
+    Queue of parsed block messages between block fetcher and applier of trackers.
+    Rows are appended in block order per (planet, pass type) and deleted once applied.
+    """
+
+    __tablename__ = "tracker_stream"
+    pass_type = Column(Enum(PassType), nullable=False)
+    planet_id = Column(LargeBinary(length=12), nullable=False)
+    block_index = Column(BigInteger, nullable=False)
+    # Not JSONB: consumers depend on order of action types in the message
+    message = Column(JSON, nullable=False, doc="`TrackerMessage` of the block")
+
+    __table_args__ = (
+        UniqueConstraint(
+            "planet_id", "pass_type", "block_index", name="tracker_stream_unique"
+        ),
+    )
+
+
+class TrackerLease(AutoIdMixin, TimeStampMixin, Base):
+    """
+    Ownership of (planet, pass type) cursor in `block` by a tracker replica.
+    Lease not renewed until `expires_at` can be taken by other replica.
+    """
+
+    __tablename__ = "tracker_lease"
+    pass_type = Column(Enum(PassType), nullable=False)
+    planet_id = Column(LargeBinary(length=12), nullable=False)
+    owner = Column(Text, nullable=False, doc="ID of tracker replica holding the lease")
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("planet_id", "pass_type", name="tracker_lease_unique"),
+    )
+
+
+class TrackerReplica(AutoIdMixin, TimeStampMixin, Base):
+    """Heartbeat of running tracker replicas to share leases evenly."""
+
+    __tablename__ = "tracker_replica"
+    replica_id = Column(Text, nullable=False, unique=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+
 class ActionHistory(AutoIdMixin, TimeStampMixin, Base):
+    """
+    Partitioned by `season_id`. Each season has its own partition (see `shared.utils.partition`)
+    and rows of season without partition go to `action_history_default`.
+    """
+
     __tablename__ = "action_history"
     planet_id = Column(
         LargeBinary(length=12),
         nullable=False,
         doc="An identifier to distinguish network & planet",
     )
-    season_id = Column(Integer, ForeignKey("season_pass.id"), nullable=False)
+    # Partition key must be a part of primary key
+    season_id = Column(
+        Integer, ForeignKey("season_pass.id"), nullable=False, primary_key=True
+    )
     season: Mapped["SeasonPass"] = relationship("SeasonPass", foreign_keys=[season_id])
     block_index = Column(Integer, nullable=False)
     tx_id = Column(Text, nullable=False)
@@ -52,9 +129,68 @@ class ActionHistory(AutoIdMixin, TimeStampMixin, Base):
     count = Column(Integer, nullable=False)
     exp = Column(Integer, nullable=False)
 
-    __table_args__ = (Index("idx_season_avatar", "season_id", "avatar_addr"),)
+    __table_args__ = (
+        Index("idx_season_avatar", "season_id", "avatar_addr"),
+        # Covers avatar history API so that it can be served by index only scan
+        Index(
+            "idx_action_history_avatar_block",
+            "planet_id",
+            "season_id",
+            "avatar_addr",
+            "block_index",
+            "id",
+            postgresql_include=["tx_id", "action", "count", "exp"],
+        ),
+        # Rows are appended in block order, so BRIN is enough for range scan
+        Index(
+            "brin_action_history_block_index", "block_index", postgresql_using="brin"
+        ),
+        Index(
+            "brin_action_history_created_at", "created_at", postgresql_using="brin"
+        ),
+        {"postgresql_partition_by": "LIST (season_id)"},
+    )
+
+
+event.listen(
+    ActionHistory.__table__,
+    "after_create",
+    DDL(
+        "CREATE TABLE IF NOT EXISTS action_history_default "
+        "PARTITION OF action_history DEFAULT"
+    ),
+)
+
 
 
+class AvatarExpDaily(AutoIdMixin, TimeStampMixin, Base):
+    """
+    Daily sum of exp in `action_history` per avatar.
+    Consumers add exp of new histories in the same transaction (see `shared.utils.leaderboard`).
+    """
+
+    __tablename__ = "avatar_exp_daily"
+    planet_id = Column(
+        LargeBinary(length=12),
+        nullable=False,
+        doc="An identifier to distinguish network & planet",
+    )
+    season_pass_id = Column(Integer, ForeignKey("season_pass.id"), nullable=False)
+    avatar_addr = Column(Text, nullable=False)
+    date = Column(Date, nullable=False, doc="Date of history creation in UTC")
+    exp = Column(Integer, nullable=False, default=0)
+    action_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "season_pass_id",
+            "planet_id",
+            "avatar_addr",
+            "date",
+            name="avatar_exp_daily_unique",
+        ),
+    )
+
 class AdventureBossHistory(AutoIdMixin, TimeStampMixin, Base):
     __tablename__ = "adventure_boss_history"
     planet_id = Column(
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, LargeBinary, PrimaryKeyConstraint
 
-from shared.models.base import Base
+from shared.models.base import Base, TimeStampMixin
 
 
 class BattleHistory(Base):
@@ -15,3 +15,17 @@ class BattleHistory(Base):
     __table_args__ = (
         PrimaryKeyConstraint("planet_id", "battle_id", name="pk_battle_history"),
     )
+
+
+class BattleHistoryWatermark(Base, TimeStampMixin):
+    __tablename__ = "battle_history_watermark"
+    planet_id = Column(
+        LargeBinary(length=12),
+        primary_key=True,
+        doc="An identifier to distinguish network & planet",
+    )
+    pruned_below = Column(
+        Integer,
+        nullable=False,
+        doc="Battles under this ID are removed from battle_history and treated as already counted",
+    )
@@ -3,10 +3,13 @@ from datetime import timedelta
 from sqlalchemy import (
     Boolean,
     Column,
+    Date,
+    DateTime,
     ForeignKey,
     Index,
     Integer,
     LargeBinary,
+    Numeric,
     Text,
     UniqueConstraint,
 )
@@ -87,6 +90,20 @@ class UserSeasonPass(AutoIdMixin, TimeStampMixin, Base):
 
     __table_args__ = (
         Index("avatar_season", "avatar_addr", "season_pass_id"),
+        Index(
+            "ix_user_season_pass_premium",
+            "season_pass_id",
+            "planet_id",
+            postgresql_where=is_premium,
+        ),
+        # For leaderboard. `id` breaks ties of same exp.
+        Index(
+            "ix_user_season_pass_leaderboard",
+            "season_pass_id",
+            "planet_id",
+            exp.desc(),
+            "id",
+        ),
         UniqueConstraint(
             "planet_id", "season_pass_id", "avatar_addr", name="user_season_pass_unique"
         ),
@@ -120,4 +137,66 @@ class Claim(AutoIdMixin, TimeStampMixin, Base):
 
     __table_args__ = (
         UniqueConstraint("planet_id", "nonce", name="claim_planet_nonce_unique"),
+        # For keyset pagination of admin claim list
+        Index("ix_claim_created_at_id", "created_at", "id"),
+    )
+
+
+class ClaimRewardStat(AutoIdMixin, TimeStampMixin, Base):
+    """
+    Monthly sum of rewards of successful claims.
+    Tx tracker adds rewards of claims when it changes them to success.
+    """
+
+    __tablename__ = "claim_reward_stat"
+    planet_id = Column(
+        LargeBinary(length=12),
+        nullable=False,
+        doc="An identifier to distinguish network & planet",
+    )
+    month = Column(Date, nullable=False, doc="First day of month in UTC")
+    ticker = Column(Text, nullable=False)
+    decimal_places = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Numeric, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "month",
+            "planet_id",
+            "ticker",
+            "decimal_places",
+            name="claim_reward_stat_unique",
+        ),
+    )
+
+
+class StageRefreshQueue(AutoIdMixin, TimeStampMixin, Base):
+    """
+    Avatars waiting for last cleared stage to be fetched from chain.
+    API enqueues avatars without valid world clear pass data and worker resolves them in batch.
+    """
+
+    __tablename__ = "stage_refresh_queue"
+    planet_id = Column(
+        LargeBinary(length=12),
+        nullable=False,
+        doc="An identifier to distinguish network & planet",
+    )
+    agent_addr = Column(Text, nullable=False)
+    avatar_addr = Column(Text, nullable=False)
+    season_pass_id = Column(Integer, ForeignKey("season_pass.id"), nullable=False)
+    retry_count = Column(Integer, nullable=False, default=0)
+    claimed_until = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        doc="Worker resolving this avatar. Other workers skip it until this time.",
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "planet_id",
+            "season_pass_id",
+            "avatar_addr",
+            name="stage_refresh_queue_unique",
+        ),
     )
@@ -11,13 +11,24 @@ from gql.transport.requests import RequestsHTTPTransport
 from graphql import DocumentNode, ExecutionResult
 
 from shared.enums import PlanetID
+from shared.utils.rpc_pool import Endpoints, RPCPool, get_rpc_pool
 
 
 class GQLClient:
-    def __init__(self, gql_url_map: Dict[PlanetID, str], jwt_secret: str = None):
+    def __init__(
+        self,
+        gql_url_map: Dict[PlanetID, Endpoints],
+        jwt_secret: str = None,
+        stage_broadcast: int = 1,
+    ):
+        """
+        :param gql_url_map: URL or list of URLs of each planet. Requests are routed by `RPCPool`.
+        :param stage_broadcast: Number of endpoints to send each staged transaction to.
+        """
         self.gql_url_map = gql_url_map
         self.client = None
         self.ds = None
+        self.stage_broadcast = stage_broadcast
         self.__jwt_secret = jwt_secret
 
     def __create_token(self) -> str:
@@ -37,17 +48,24 @@ class GQLClient:
     def __create_header(self):
         return {"Authorization": f"Bearer {self.__create_token()}"}
 
-    def reset(self, planet_id: PlanetID):
+    def rpc(self, planet_id: PlanetID) -> RPCPool:
+        return get_rpc_pool(self.gql_url_map[planet_id])
+
+    def __connect(self, url: str) -> Tuple[Client, DSLSchema]:
         transport = RequestsHTTPTransport(
-            url=self.gql_url_map[planet_id],
+            url=url,
             verify=True,
             retries=2,
             headers=self.__create_header(),
         )
-        self.client = Client(transport=transport, fetch_schema_from_transport=True)
-        with self.client as _:
-            assert self.client.schema is not None
-            self.ds = DSLSchema(self.client.schema)
+        client = Client(transport=transport, fetch_schema_from_transport=True)
+        with client as _:
+            assert client.schema is not None
+            return client, DSLSchema(client.schema)
+
+    def reset(self, planet_id: PlanetID):
+        """Connect to the best endpoint of planet."""
+        self.client, self.ds = self.__connect(self.rpc(planet_id).ranked()[0].url)
 
     def execute(self, query: DocumentNode) -> Union[Dict[str, Any], ExecutionResult]:
         with self.client as sess:
@@ -62,17 +80,22 @@ class GQLClient:
         :param str address: 9c Address to get next Nonce.
         :return: Next tx Nonce. In case of any error, `-1` will be returned.
         """
-        self.reset(planet_id)
-        query = dsl_gql(
-            DSLQuery(
-                self.ds.StandaloneQuery.transaction.select(
-                    self.ds.TransactionHeadlessQuery.nextTxNonce.args(
-                        address=address,
+
+        def fetch(url: str):
+            client, ds = self.__connect(url)
+            query = dsl_gql(
+                DSLQuery(
+                    ds.StandaloneQuery.transaction.select(
+                        ds.TransactionHeadlessQuery.nextTxNonce.args(
+                            address=address,
+                        )
                     )
                 )
             )
-        )
-        resp = self.execute(query)
+            with client as sess:
+                return sess.execute(query)
+
+        resp = self.rpc(planet_id).request(fetch)
 
         if "errors" in resp:
             logging.error(f"GQL failed to get next Nonce: {resp['errors']}")
@@ -175,16 +198,26 @@ class GQLClient:
     def stage(
         self, planet_id: PlanetID, signed_tx: bytes
     ) -> Tuple[bool, str, Optional[str]]:
-        self.reset(planet_id)
-        query = dsl_gql(
-            DSLMutation(
-                self.ds.StandaloneMutation.stageTransaction.args(payload=signed_tx.hex())
+        """
+        Stage transaction to `stage_broadcast` best endpoints of planet at once.
+        Succeeds if any of them accepts the transaction.
+        """
+
+        def send(url: str):
+            client, ds = self.__connect(url)
+            query = dsl_gql(
+                DSLMutation(
+                    ds.StandaloneMutation.stageTransaction.args(payload=signed_tx.hex())
+                )
             )
-        )
-        result = self.execute(query)
-        if "errors" in result:
-            return False, result["errors"][0]["message"], None
-        return True, "", result["stageTransaction"]
+            with client as sess:
+                return sess.execute(query)
+
+        result_list = self.rpc(planet_id).broadcast(send, self.stage_broadcast)
+        for result in result_list:
+            if "errors" not in result:
+                return True, "", result["stageTransaction"]
+        return False, result_list[0]["errors"][0]["message"], None
 
     def get_last_cleared_stage(
         self, planet_id: PlanetID, avatar_addr: str, timeout: int = None
@@ -192,16 +225,23 @@ class GQLClient:
         query = f"""{{ stateQuery {{ avatar(avatarAddress: "{avatar_addr}") {{ 
         worldInformation {{ lastClearedStage {{ worldId stageId }} }} 
         }} }} }}"""
-        resp = requests.post(
-            self.gql_url_map[planet_id],
-            json={"query": query},
-            headers={"Authorization": f"Bearer {self.__create_token()}"},
-            timeout=timeout,
-        )
-        if resp.status_code != 200:
+
+        def fetch(url: str):
+            resp = requests.post(
+                url,
+                json={"query": query},
+                headers={"Authorization": f"Bearer {self.__create_token()}"},
+                timeout=timeout,
+            )
+            resp.raise_for_status()
+            return resp.json()
+
+        try:
+            result = self.rpc(planet_id).request(fetch)
+        except Exception as e:
             return 0, 0
         try:
-            result = resp.json()["data"]["stateQuery"]["avatar"]["worldInformation"][
+            result = result["data"]["stateQuery"]["avatar"]["worldInformation"][
                 "lastClearedStage"
             ]
         except Exception as e:
@@ -0,0 +1,54 @@
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from shared.enums import PlanetID
+from shared.models.arena import BattleHistory, BattleHistoryWatermark
+
+
+def get_battle_watermark(sess, planet_id: PlanetID) -> int:
+    """Returns lowest battle ID still kept in `battle_history`. Battles under it are already counted."""
+    return (
+        sess.scalar(
+            select(BattleHistoryWatermark.pruned_below).where(
+                BattleHistoryWatermark.planet_id == planet_id
+            )
+        )
+        or 0
+    )
+
+
+def prune_battle_history(sess, planet_id: PlanetID, keep: int) -> int:
+    """
+    Delete battles of planet except latest `keep` battles and raise watermark of the planet.
+    Arena battle IDs only increase, so battles under the watermark are old ones submitted again.
+
+    Returns number of deleted battles. Caller must commit.
+    """
+    cutoff = sess.scalar(
+        select(BattleHistory.battle_id)
+        .where(BattleHistory.planet_id == planet_id)
+        .order_by(BattleHistory.battle_id.desc())
+        .offset(keep)
+        .limit(1)
+    )
+    if cutoff is None:
+        return 0
+
+    sess.execute(
+        insert(BattleHistoryWatermark)
+        .values(planet_id=planet_id, pruned_below=cutoff + 1)
+        .on_conflict_do_update(
+            index_elements=[BattleHistoryWatermark.planet_id],
+            set_={
+                "pruned_below": cutoff + 1,
+                "updated_at": func.now(),
+            },
+            where=BattleHistoryWatermark.pruned_below < cutoff + 1,
+        )
+    )
+    return sess.execute(
+        delete(BattleHistory).where(
+            BattleHistory.planet_id == planet_id,
+            BattleHistory.battle_id <= cutoff,
+        )
+    ).rowcount
@@ -0,0 +1,58 @@
+from typing import Iterable
+
+from sqlalchemy import Date, Integer, Numeric, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
+
+from shared.models.user import Claim, ClaimRewardStat
+
+
+def claim_reward_stat_query(*where):
+    """
+    Sum rewards of claims in SQL, grouped by (planet, month, ticker, decimal_places).
+    Month is the first day of month of claim creation in UTC.
+    """
+    reward = func.jsonb_array_elements(Claim.reward_list).table_valued("value")
+    month = cast(func.date_trunc("month", func.timezone("UTC", Claim.created_at)), Date)
+    ticker = reward.c.value.op("->>")(literal_column("'ticker'"))
+    decimal_places = func.coalesce(
+        cast(reward.c.value.op("->>")(literal_column("'decimal_places'")), Integer), 0
+    )
+    amount = cast(reward.c.value.op("->>")(literal_column("'amount'")), Numeric)
+    return (
+        select(
+            Claim.planet_id,
+            month.label("month"),
+            ticker.label("ticker"),
+            decimal_places.label("decimal_places"),
+            func.sum(amount).label("total_amount"),
+        )
+        .select_from(Claim)
+        .join(reward, literal_column("true"))
+        .where(*where)
+        .group_by(Claim.planet_id, month, ticker, decimal_places)
+    )
+
+
+def add_claim_reward_stat(sess, claim_ids: Iterable[int]):
+    """
+    Add rewards of given claims to monthly stat.
+    Call this in the same transaction with changing claims to success, and only once per claim.
+    """
+    claim_ids = list(claim_ids)
+    if not claim_ids:
+        return
+
+    stmt = insert(ClaimRewardStat).from_select(
+        ["planet_id", "month", "ticker", "decimal_places", "total_amount"],
+        claim_reward_stat_query(Claim.id.in_(claim_ids)),
+    )
+    sess.execute(
+        stmt.on_conflict_do_update(
+            constraint="claim_reward_stat_unique",
+            set_={
+                "total_amount": ClaimRewardStat.total_amount
+                + stmt.excluded.total_amount,
+                "updated_at": func.now(),
+            },
+        )
+    )
@@ -0,0 +1,102 @@
+from typing import Iterable
+
+from sqlalchemy import Date, cast, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from shared.models.action import ActionHistory, AvatarExpDaily
+
+
+def avatar_exp_daily_query(*where):
+    """
+    Sum exp of action histories in SQL, grouped by (planet, season, avatar, date).
+    Date is the date of history creation in UTC.
+    """
+    date = cast(func.timezone("UTC", ActionHistory.created_at), Date)
+    return (
+        select(
+            ActionHistory.planet_id,
+            ActionHistory.season_id.label("season_pass_id"),
+            ActionHistory.avatar_addr,
+            date.label("date"),
+            func.sum(ActionHistory.exp).label("exp"),
+            func.count().label("action_count"),
+        )
+        .where(*where)
+        .group_by(
+            ActionHistory.planet_id,
+            ActionHistory.season_id,
+            ActionHistory.avatar_addr,
+            date,
+        )
+        # Keep lock order same between concurrent consumers
+        .order_by(
+            ActionHistory.season_id,
+            ActionHistory.planet_id,
+            ActionHistory.avatar_addr,
+            date,
+        )
+    )
+
+
+def add_avatar_exp_daily(sess, season_id: int, history_ids: Iterable[int]):
+    """
+    Add exp of given action histories of the season to daily stat.
+    Call this in the same transaction with adding histories, after flush and only once per history.
+    """
+    history_ids = list(history_ids)
+    if not history_ids:
+        return
+
+    stmt = insert(AvatarExpDaily).from_select(
+        ["planet_id", "season_pass_id", "avatar_addr", "date", "exp", "action_count"],
+        # Season filter lets only the partition of the season be scanned
+        avatar_exp_daily_query(
+            ActionHistory.season_id == season_id, ActionHistory.id.in_(history_ids)
+        ),
+    )
+    sess.execute(
+        stmt.on_conflict_do_update(
+            constraint="avatar_exp_daily_unique",
+            set_={
+                "exp": AvatarExpDaily.exp + stmt.excluded.exp,
+                "action_count": AvatarExpDaily.action_count
+                + stmt.excluded.action_count,
+                "updated_at": func.now(),
+            },
+        )
+    )
+
+
+def rebuild_avatar_exp_daily(sess, planet_id: bytes, season_id: int, avatar_list):
+    """
+    Recalculate daily stat of given avatars from their whole action histories.
+    Use this after changing or deleting existing histories.
+    """
+    avatar_list = list(avatar_list)
+    if not avatar_list:
+        return
+
+    sess.execute(
+        delete(AvatarExpDaily).where(
+            AvatarExpDaily.season_pass_id == season_id,
+            AvatarExpDaily.planet_id == planet_id,
+            AvatarExpDaily.avatar_addr.in_(avatar_list),
+        )
+    )
+    sess.execute(
+        insert(AvatarExpDaily).from_select(
+            [
+                "planet_id",
+                "season_pass_id",
+                "avatar_addr",
+                "date",
+                "exp",
+                "action_count",
+            ],
+            avatar_exp_daily_query(
+                ActionHistory.planet_id == planet_id,
+                ActionHistory.season_id == season_id,
+                ActionHistory.avatar_addr.in_(avatar_list),
+            ),
+        )
+    )
@@ -0,0 +1,88 @@
+from typing import List, Optional
+
+from sqlalchemy import text
+
+ACTION_HISTORY_TABLE = "action_history"
+ACTION_HISTORY_DEFAULT_PARTITION = "action_history_default"
+
+
+def action_history_partition(season_id: int) -> str:
+    return f"action_history_s{int(season_id)}"
+
+
+def get_action_history_partitions(sess) -> List[str]:
+    """Returns names of all season partitions attached to `action_history`."""
+    return sess.scalars(
+        text(
+            """SELECT child.relname FROM pg_inherits
+JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+WHERE parent.relname = :parent AND child.relname != :default"""
+        ),
+        {"parent": ACTION_HISTORY_TABLE, "default": ACTION_HISTORY_DEFAULT_PARTITION},
+    ).all()
+
+
+def ensure_action_history_partition(sess, season_id: int) -> bool:
+    """
+    Create partition of given season if not exists.
+    Rows of the season already saved in default partition are moved to new partition.
+
+    Returns `True` if new partition is created. Caller must commit.
+    """
+    name = action_history_partition(season_id)
+    if sess.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is not None:
+        return False
+
+    # Attaching partition to default partition having rows of the season fails.
+    # Create detached table, move rows and attach.
+    sess.execute(
+        text(
+            f"CREATE TABLE {name} "
+            f"(LIKE {ACTION_HISTORY_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    sess.execute(
+        text(
+            f"""WITH moved AS (
+    DELETE FROM {ACTION_HISTORY_DEFAULT_PARTITION} WHERE season_id = :season_id RETURNING *
+)
+INSERT INTO {name} SELECT * FROM moved"""
+        ),
+        {"season_id": season_id},
+    )
+    # Let attach skip full scan
+    sess.execute(
+        text(
+            f"ALTER TABLE {name} ADD CONSTRAINT {name}_season_check "
+            f"CHECK (season_id = {int(season_id)})"
+        )
+    )
+    sess.execute(
+        text(
+            f"ALTER TABLE {ACTION_HISTORY_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES IN ({int(season_id)})"
+        )
+    )
+    sess.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_season_check"))
+    return True
+
+
+def detach_action_history_partition(
+    sess, season_id: int, archive_schema: Optional[str] = None
+) -> bool:
+    """
+    Detach partition of finished season from `action_history`.
+    Detached table is kept as is, or moved to `archive_schema` if given.
+
+    Returns `True` if partition is detached. Caller must commit.
+    """
+    name = action_history_partition(season_id)
+    if name not in get_action_history_partitions(sess):
+        return False
+
+    sess.execute(text(f"ALTER TABLE {ACTION_HISTORY_TABLE} DETACH PARTITION {name}"))
+    if archive_schema:
+        sess.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"'))
+        sess.execute(text(f'ALTER TABLE {name} SET SCHEMA "{archive_schema}"'))
+    return True
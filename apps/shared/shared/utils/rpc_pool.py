@@ -0,0 +1,264 @@
+"""
+Pool of GraphQL endpoints of a planet.
+
+Requests go to the endpoint with the best observed latency and error rate, and fail over to the next one.
+Idempotent reads are hedged: if the first endpoint has not answered by its p95 latency,
+the same request is sent to the next endpoint and whichever answers first is used.
+Endpoints lagging more than `max_tip_lag` blocks behind the highest tip are ejected until they catch up.
+
+Pools are shared per endpoint list in a process, so every caller feeds the same statistics.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+T = TypeVar("T")
+Endpoints = Union[str, Sequence[str]]
+
+# Weight of the latest sample in latency and error rate averages
+EWMA_WEIGHT = 0.2
+# Error rate of an endpoint is halved every this seconds without new error
+ERROR_HALF_LIFE = 30
+LATENCY_SAMPLES = 100
+# Hedge delay is p95 of latency once this many samples are observed
+HEDGE_MIN_SAMPLES = 20
+DEFAULT_HEDGE_DELAY = 1.0
+MIN_HEDGE_DELAY = 0.05
+MAX_TIP_LAG = 10
+# Tips observed before this many seconds are not used to eject endpoints
+TIP_MAX_AGE = 60
+TIP_TIMEOUT = 5
+MAX_WORKERS = 32
+
+
+def endpoint_list(endpoints: Endpoints) -> List[str]:
+    """Endpoints of a planet from `gql_url_map` value, which is a URL or list of URLs."""
+    if isinstance(endpoints, str):
+        return [endpoints]
+    return list(endpoints)
+
+
+class Endpoint:
+    def __init__(self, url: str):
+        self.url = url
+        self.latency: Optional[float] = None
+        self.samples: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.error_rate = 0.0
+        self.error_at = 0.0
+        # (tip, observed at) of the last observed tip
+        self.tip: Optional[Tuple[int, float]] = None
+        self.ejected = False
+
+    def record(self, latency: Optional[float], now: float):
+        """Record a request. `latency` is `None` for failed one."""
+        error_rate = self.current_error_rate(now)
+        if latency is None:
+            self.error_rate = error_rate + EWMA_WEIGHT * (1 - error_rate)
+            self.error_at = now
+            return
+        self.error_rate = error_rate * (1 - EWMA_WEIGHT)
+        self.error_at = now
+        self.samples.append(latency)
+        self.latency = (
+            latency
+            if self.latency is None
+            else self.latency + EWMA_WEIGHT * (latency - self.latency)
+        )
+
+    def current_error_rate(self, now: float) -> float:
+        return self.error_rate * 0.5 ** ((now - self.error_at) / ERROR_HALF_LIFE)
+
+    def score(self, now: float) -> float:
+        """Expected cost of a request. Lower is better and unmeasured endpoint goes first."""
+        latency = self.latency
+        if latency is None:
+            # Never answered. Try it first unless it has failed.
+            latency = DEFAULT_HEDGE_DELAY if self.error_rate else 0.0
+        return latency / max(1 - self.current_error_rate(now), 0.01)
+
+    def hedge_delay(self) -> float:
+        if len(self.samples) < HEDGE_MIN_SAMPLES:
+            return DEFAULT_HEDGE_DELAY
+        samples = sorted(self.samples)
+        return max(samples[int(len(samples) * 0.95) - 1], MIN_HEDGE_DELAY)
+
+
+class RPCPool:
+    def __init__(self, urls: Endpoints, max_tip_lag: int = MAX_TIP_LAG):
+        self.endpoints = [Endpoint(x) for x in endpoint_list(urls)]
+        if not self.endpoints:
+            raise ValueError("RPC pool needs at least one endpoint")
+        self.max_tip_lag = max_tip_lag
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=MAX_WORKERS, thread_name_prefix="rpc"
+        )
+
+    @property
+    def urls(self) -> List[str]:
+        return [x.url for x in self.endpoints]
+
+    def ranked(self) -> List[Endpoint]:
+        """Endpoints not ejected, from the best one."""
+        now = time.monotonic()
+        with self._lock:
+            return sorted(
+                (x for x in self.endpoints if not x.ejected),
+                key=lambda x: x.score(now),
+            )
+
+    def _call(self, endpoint: Endpoint, func: Callable[[str], T]) -> T:
+        started = time.monotonic()
+        try:
+            result = func(endpoint.url)
+        except Exception:
+            now = time.monotonic()
+            with self._lock:
+                endpoint.record(None, now)
+            raise
+        now = time.monotonic()
+        with self._lock:
+            endpoint.record(now - started, now)
+        return result
+
+    def request(self, func: Callable[[str], T], hedge: bool = True) -> T:
+        """
+        Call `func` with URL of the best endpoint and returns its result.
+        Failed request is retried on the next endpoint until every endpoint fails.
+        Only set `hedge` for idempotent requests, because the same request can be sent to two endpoints.
+        """
+        candidates = iter(self.ranked())
+        pending: Dict[Future, Endpoint] = {}
+        hedged = False
+        error: Optional[Exception] = None
+
+        def send() -> bool:
+            endpoint = next(candidates, None)
+            if endpoint is None:
+                return False
+            pending[self._executor.submit(self._call, endpoint, func)] = endpoint
+            return True
+
+        send()
+        while pending:
+            timeout = None
+            if hedge and not hedged and len(pending) == 1:
+                timeout = next(iter(pending.values())).hedge_delay()
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Slow answer. Race it with the next endpoint.
+                hedged = True
+                send()
+                continue
+            for future in done:
+                pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+            if not pending:
+                send()
+        if error is None:
+            raise RuntimeError("No available endpoint")
+        raise error
+
+    def broadcast(self, func: Callable[[str], T], count: int) -> List[T]:
+        """
+        Call `func` with URLs of best `count` endpoints at once and returns results of successful ones.
+        Raises the last error if all of them fail.
+        """
+        futures = [
+            self._executor.submit(self._call, x, func)
+            for x in self.ranked()[: max(count, 1)]
+        ]
+        results = []
+        error: Optional[Exception] = None
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                error = e
+        if not results:
+            raise error
+        return results
+
+    def observe_tip(self, url: str, tip: int):
+        """Record tip of an endpoint and eject endpoints lagging behind the highest tip."""
+        now = time.monotonic()
+        with self._lock:
+            for endpoint in self.endpoints:
+                if endpoint.url == url:
+                    endpoint.tip = (tip, now)
+            recent = [
+                x
+                for x in self.endpoints
+                if x.tip is not None and now - x.tip[1] <= TIP_MAX_AGE
+            ]
+            highest = max(x.tip[0] for x in recent)
+            for endpoint in recent:
+                ejected = highest - endpoint.tip[0] > self.max_tip_lag
+                if ejected != endpoint.ejected:
+                    logging.warning(
+                        f"{'Eject' if ejected else 'Restore'} {endpoint.url}: "
+                        f"tip {endpoint.tip[0]}, highest tip {highest}"
+                    )
+                    endpoint.ejected = ejected
+
+    def tip(self, max_age: float) -> Optional[int]:
+        """
+        Lowest tip of endpoints not ejected observed in last `max_age` seconds, or `None` if nothing.
+        Every routed endpoint has blocks under this tip.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tips = [
+                x.tip[0]
+                for x in self.endpoints
+                if not x.ejected and x.tip is not None and now - x.tip[1] <= max_age
+            ]
+        return min(tips) if tips else None
+
+    def get_tip(self, fetch_tip: Callable[[str], int]) -> int:
+        """Fetch tip of every endpoint at once and returns `tip` of the pool."""
+        started = time.monotonic()
+        futures = {
+            self._executor.submit(self._call, x, fetch_tip): x for x in self.endpoints
+        }
+        done, _ = wait(futures, timeout=TIP_TIMEOUT)
+        error: Optional[Exception] = None
+        for future in done:
+            try:
+                self.observe_tip(futures[future].url, future.result())
+            except Exception as e:
+                error = e
+        tip = self.tip(time.monotonic() - started)
+        if tip is None:
+            raise error or TimeoutError("No endpoint answered tip")
+        return tip
+
+
+_pools: Dict[Tuple[str, ...], RPCPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_rpc_pool(urls: Endpoints) -> RPCPool:
+    """Shared pool of given endpoints."""
+    key = tuple(endpoint_list(urls))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = RPCPool(key)
+        return pool
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Tuple
+from typing import Dict, Iterable, Optional, Tuple
 
 import jwt
 from sqlalchemy import and_, desc, or_, select
@@ -9,6 +9,41 @@ from shared.enums import PassType
 from shared.models.season_pass import Level, SeasonPass
 
 
+def current_pass_condition(now: Optional[datetime] = None):
+    """
+    Returns SQL condition to select season passes active at given time.
+    Both start and end timestamps are inclusive and `None` means unbounded.
+    """
+    if now is None:
+        now = datetime.now(tz=timezone.utc)
+    return or_(  # match least one of following conditions
+        # All time infinite
+        and_(
+            SeasonPass.start_timestamp.is_(None),
+            SeasonPass.end_timestamp.is_(None),
+        ),
+        # Finite season with both start and end
+        and_(
+            SeasonPass.start_timestamp.isnot(None),
+            SeasonPass.start_timestamp <= now,
+            SeasonPass.end_timestamp.isnot(None),
+            SeasonPass.end_timestamp >= now,
+        ),
+        # Infinite season with start
+        and_(
+            SeasonPass.start_timestamp.isnot(None),
+            SeasonPass.start_timestamp <= now,
+            SeasonPass.end_timestamp.is_(None),
+        ),
+        # Finite season without start
+        and_(
+            SeasonPass.start_timestamp.is_(None),
+            SeasonPass.end_timestamp.isnot(None),
+            SeasonPass.end_timestamp >= now,
+        ),
+    )
+
+
 def get_pass(
     sess,
     pass_type: PassType,
@@ -22,35 +57,7 @@ def get_pass(
         stmt = stmt.where(SeasonPass.season_index == season_index)
 
     if validate_current:
-        now = datetime.now(tz=timezone.utc)
-        stmt = stmt.where(
-            or_(  # match least one of following conditions
-                # All time infinite
-                and_(
-                    SeasonPass.start_timestamp.is_(None),
-                    SeasonPass.end_timestamp.is_(None),
-                ),
-                # Finite season with both start and end
-                and_(
-                    SeasonPass.start_timestamp.isnot(None),
-                    SeasonPass.start_timestamp <= now,
-                    SeasonPass.end_timestamp.isnot(None),
-                    SeasonPass.end_timestamp >= now,
-                ),
-                # Infinite season with start
-                and_(
-                    SeasonPass.start_timestamp.isnot(None),
-                    SeasonPass.start_timestamp <= now,
-                    SeasonPass.end_timestamp.is_(None),
-                ),
-                # Finite season without start
-                and_(
-                    SeasonPass.start_timestamp.is_(None),
-                    SeasonPass.end_timestamp.isnot(None),
-                    SeasonPass.end_timestamp >= now,
-                ),
-            )
-        )
+        stmt = stmt.where(current_pass_condition())
 
     if include_exp:
         stmt = stmt.options(joinedload(SeasonPass.exp_list))
@@ -58,6 +65,24 @@ def get_pass(
     return sess.scalar(stmt.order_by(desc(SeasonPass.id)))
 
 
+def get_current_passes(
+    sess, pass_types: Optional[Iterable[PassType]] = None
+) -> Dict[PassType, SeasonPass]:
+    """
+    Returns current season pass of each pass type with single query.
+    Same as calling `get_pass(sess, pass_type, validate_current=True)` for every pass type.
+    """
+    stmt = select(SeasonPass).where(current_pass_condition())
+    if pass_types is not None:
+        stmt = stmt.where(SeasonPass.pass_type.in_(list(pass_types)))
+
+    current_passes = {}
+    for season_pass in sess.scalars(stmt.order_by(desc(SeasonPass.id))).fetchall():
+        # Latest one wins like `get_pass`
+        current_passes.setdefault(season_pass.pass_type, season_pass)
+    return current_passes
+
+
 def get_max_level(sess, pass_type: PassType) -> Tuple[Level, int]:
     """
     Returns max level of season pass and repeating exp.
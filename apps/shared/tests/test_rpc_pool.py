@@ -0,0 +1,180 @@
+import threading
+import time
+
+import pytest
+from shared.utils import rpc_pool
+from shared.utils.rpc_pool import RPCPool, endpoint_list, get_rpc_pool
+
+A = "http://a/graphql"
+B = "http://b/graphql"
+C = "http://c/graphql"
+
+
+class StandIn:
+    """Plain callable standing in for GraphQL endpoints. Records called URLs."""
+
+    def __init__(self, delay=None, fail=()):
+        self.delay = delay or {}
+        self.fail = set(fail)
+        self.called = []
+        self._lock = threading.Lock()
+
+    def __call__(self, url: str) -> str:
+        with self._lock:
+            self.called.append(url)
+        time.sleep(self.delay.get(url, 0))
+        if url in self.fail:
+            raise ConnectionError(url)
+        return url
+
+
+def warm_up(pool: RPCPool, latency: dict):
+    for endpoint in pool.endpoints:
+        endpoint.record(latency[endpoint.url], time.monotonic())
+
+
+def test_endpoint_list():
+    assert endpoint_list(A) == [A]
+    assert endpoint_list((A, B)) == [A, B]
+    with pytest.raises(ValueError):
+        RPCPool([])
+
+
+def test_get_rpc_pool_shared():
+    assert get_rpc_pool([A, B]) is get_rpc_pool((A, B))
+    assert get_rpc_pool(A) is not get_rpc_pool([A, B])
+
+
+def test_request_routes_to_best():
+    pool = RPCPool([A, B, C])
+    warm_up(pool, {A: 0.3, B: 0.1, C: 0.2})
+    func = StandIn()
+
+    assert pool.request(func, hedge=False) == B
+    assert [x.url for x in pool.ranked()] == [B, C, A]
+
+
+def test_request_unmeasured_first():
+    pool = RPCPool([A, B])
+    warm_up(pool, {A: 0.1, B: 0.1})
+    pool.endpoints.append(rpc_pool.Endpoint(C))
+    assert pool.request(StandIn(), hedge=False) == C
+
+
+def test_request_failover():
+    pool = RPCPool([A, B, C])
+    warm_up(pool, {A: 0.1, B: 0.2, C: 0.3})
+    func = StandIn(fail={A, B})
+
+    assert pool.request(func, hedge=False) == C
+    assert func.called == [A, B, C]
+    # Failing endpoints go back after some errors
+    for _ in range(3):
+        assert pool.request(func, hedge=False) == C
+    assert [x.url for x in pool.ranked()][0] == C
+
+
+def test_request_all_failed():
+    pool = RPCPool([A, B])
+    func = StandIn(fail={A, B})
+    with pytest.raises(ConnectionError):
+        pool.request(func, hedge=False)
+    assert sorted(func.called) == [A, B]
+
+
+def test_request_hedged(monkeypatch):
+    monkeypatch.setattr(rpc_pool, "DEFAULT_HEDGE_DELAY", 0.05)
+    pool = RPCPool([A, B])
+    warm_up(pool, {A: 0.01, B: 0.02})
+    func = StandIn(delay={A: 1})
+
+    started = time.monotonic()
+    assert pool.request(func) == B
+    assert time.monotonic() - started < 0.5
+    assert func.called == [A, B]
+
+
+def test_request_not_hedged(monkeypatch):
+    monkeypatch.setattr(rpc_pool, "DEFAULT_HEDGE_DELAY", 0.05)
+    pool = RPCPool([A, B])
+    warm_up(pool, {A: 0.01, B: 0.02})
+    func = StandIn(delay={A: 0.2})
+
+    assert pool.request(func, hedge=False) == A
+    assert func.called == [A]
+
+
+def test_hedge_delay():
+    endpoint = rpc_pool.Endpoint(A)
+    assert endpoint.hedge_delay() == rpc_pool.DEFAULT_HEDGE_DELAY
+    for x in range(100):
+        endpoint.record((x + 1) / 1000, time.monotonic())
+    assert endpoint.hedge_delay() == pytest.approx(0.095)
+
+
+def test_eject_lagging_endpoint():
+    pool = RPCPool([A, B, C], max_tip_lag=10)
+    pool.observe_tip(A, 100)
+    pool.observe_tip(B, 95)
+    pool.observe_tip(C, 80)
+
+    assert [x.url for x in pool.endpoints if x.ejected] == [C]
+    assert C not in [x.url for x in pool.ranked()]
+    # Lowest tip of routed endpoints
+    assert pool.tip(60) == 95
+    # Ejected endpoint is not used even if the others fail
+    func = StandIn(fail={A, B})
+    with pytest.raises(ConnectionError):
+        pool.request(func, hedge=False)
+    assert C not in func.called
+
+    # Restored when caught up
+    pool.observe_tip(C, 99)
+    assert not any(x.ejected for x in pool.endpoints)
+    assert pool.tip(60) == 95
+
+
+def test_tip_max_age():
+    pool = RPCPool([A])
+    assert pool.tip(60) is None
+    pool.observe_tip(A, 100)
+    pool.endpoints[0].tip = (100, time.monotonic() - 10)
+    assert pool.tip(5) is None
+    assert pool.tip(60) == 100
+
+
+def test_get_tip():
+    pool = RPCPool([A, B, C], max_tip_lag=10)
+    tips = {A: 100, B: 98, C: 50}
+    assert pool.get_tip(lambda url: tips[url]) == 98
+    assert [x.url for x in pool.endpoints if x.ejected] == [C]
+
+
+def test_get_tip_failed():
+    pool = RPCPool([A, B])
+
+    def fetch_tip(url: str) -> int:
+        if url == A:
+            raise ConnectionError(url)
+        return 100
+
+    assert pool.get_tip(fetch_tip) == 100
+    with pytest.raises(ConnectionError):
+        RPCPool([A]).get_tip(fetch_tip)
+
+
+def test_broadcast():
+    pool = RPCPool([A, B, C])
+    warm_up(pool, {A: 0.3, B: 0.1, C: 0.2})
+    func = StandIn()
+
+    assert pool.broadcast(func, 2) == [B, C]
+    assert sorted(func.called) == [B, C]
+
+
+def test_broadcast_partial_failure():
+    pool = RPCPool([A, B, C])
+    warm_up(pool, {A: 0.3, B: 0.1, C: 0.2})
+    assert pool.broadcast(StandIn(fail={B}), 3) == [C, A]
+    with pytest.raises(ConnectionError):
+        pool.broadcast(StandIn(fail={A, B, C}), 3)
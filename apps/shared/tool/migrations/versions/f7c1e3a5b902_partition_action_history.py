@@ -0,0 +1,140 @@
+"""Partition action_history by season
+
+Revision ID: f7c1e3a5b902
+Revises: e4b8d2a6c731
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f7c1e3a5b902"
+down_revision: Union[str, None] = "e4b8d2a6c731"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    "id, planet_id, season_id, block_index, tx_id, agent_addr, avatar_addr, "
+    "action, count, exp, created_at, updated_at"
+)
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE action_history RENAME TO action_history_old")
+    op.execute(
+        "ALTER TABLE action_history_old RENAME CONSTRAINT action_history_pkey TO action_history_old_pkey"
+    )
+    op.execute("ALTER INDEX idx_season_avatar RENAME TO idx_season_avatar_old")
+    op.execute(
+        "ALTER INDEX ix_action_history_action RENAME TO ix_action_history_action_old"
+    )
+    op.execute(
+        """CREATE TABLE action_history (
+    id INTEGER NOT NULL DEFAULT nextval('action_history_id_seq'),
+    planet_id BYTEA NOT NULL,
+    season_id INTEGER NOT NULL
+        CONSTRAINT action_history_season_id_fkey REFERENCES season_pass (id),
+    block_index INTEGER NOT NULL,
+    tx_id TEXT NOT NULL,
+    agent_addr TEXT NOT NULL,
+    avatar_addr TEXT NOT NULL,
+    action actiontype NOT NULL,
+    count INTEGER NOT NULL,
+    exp INTEGER NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (id, season_id)
+) PARTITION BY LIST (season_id)"""
+    )
+    op.execute("ALTER SEQUENCE action_history_id_seq OWNED BY action_history.id")
+    op.execute(
+        "CREATE TABLE action_history_default PARTITION OF action_history DEFAULT"
+    )
+
+    # One partition for each season
+    conn = op.get_bind()
+    for (season_id,) in conn.execute(sa.text("SELECT id FROM season_pass ORDER BY id")):
+        op.execute(
+            f"CREATE TABLE action_history_s{season_id} "
+            f"PARTITION OF action_history FOR VALUES IN ({season_id})"
+        )
+
+    op.execute(
+        f"INSERT INTO action_history ({COLUMNS}) SELECT {COLUMNS} FROM action_history_old"
+    )
+    op.execute("DROP TABLE action_history_old")
+
+    # Indexes on partitioned table are created on every partition
+    op.create_index(
+        "idx_season_avatar",
+        "action_history",
+        ["season_id", "avatar_addr"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_action_history_action"), "action_history", ["action"], unique=False
+    )
+    op.create_index(
+        "brin_action_history_block_index",
+        "action_history",
+        ["block_index"],
+        unique=False,
+        postgresql_using="brin",
+    )
+    op.create_index(
+        "brin_action_history_created_at",
+        "action_history",
+        ["created_at"],
+        unique=False,
+        postgresql_using="brin",
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE action_history RENAME TO action_history_partitioned")
+    op.execute(
+        "ALTER TABLE action_history_partitioned RENAME CONSTRAINT action_history_pkey TO action_history_partitioned_pkey"
+    )
+    op.drop_index(
+        "brin_action_history_created_at", table_name="action_history_partitioned"
+    )
+    op.drop_index(
+        "brin_action_history_block_index", table_name="action_history_partitioned"
+    )
+    op.drop_index("ix_action_history_action", table_name="action_history_partitioned")
+    op.drop_index("idx_season_avatar", table_name="action_history_partitioned")
+    op.execute(
+        """CREATE TABLE action_history (
+    season_id INTEGER NOT NULL
+        CONSTRAINT action_history_season_id_fkey REFERENCES season_pass (id),
+    agent_addr TEXT NOT NULL,
+    avatar_addr TEXT NOT NULL,
+    action actiontype NOT NULL,
+    count INTEGER NOT NULL,
+    exp INTEGER NOT NULL,
+    id INTEGER NOT NULL DEFAULT nextval('action_history_id_seq'),
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    planet_id BYTEA NOT NULL,
+    block_index INTEGER NOT NULL,
+    tx_id TEXT NOT NULL,
+    PRIMARY KEY (id)
+)"""
+    )
+    op.execute("ALTER SEQUENCE action_history_id_seq OWNED BY action_history.id")
+    op.execute(
+        f"INSERT INTO action_history ({COLUMNS}) SELECT {COLUMNS} FROM action_history_partitioned"
+    )
+    op.execute("DROP TABLE action_history_partitioned")
+    op.create_index(
+        "idx_season_avatar",
+        "action_history",
+        ["season_id", "avatar_addr"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_action_history_action"), "action_history", ["action"], unique=False
+    )
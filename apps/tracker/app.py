@@ -2,43 +2,82 @@ import signal
 import sys
 import threading
 import time
-from typing import Callable
+from functools import partial
+from typing import Callable, Optional
 
 import structlog
+from shared.enums import PassType
 
 from app.config import config
+from app.consumers.adventure_boss_consumer import consume_adventure_boss_message
+from app.consumers.world_clear_consumer import consume_world_clear_message
+from app.trackers.adv_boss_tracker import fetch_adv_boss_message
 from app.trackers.adv_boss_tracker import (
     track_missing_blocks as track_adv_boss_missing_blocks,
 )
+from app.trackers.courage_tracker import (
+    apply_courage_message,
+    fetch_courage_message,
+    get_recent_battle_filter,
+)
 from app.trackers.courage_tracker import (
     track_missing_blocks as track_courage_missing_blocks,
 )
 from app.trackers.tx_tracker import track_tx
+from app.trackers.world_clear_tracker import fetch_world_clear_message
 from app.trackers.world_clear_tracker import (
     track_missing_blocks as track_world_clear_missing_blocks,
 )
+from app.utils.lease import release_all_leases, renew_leases_cycle, start_leases
+from app.utils.scheduler import AdaptiveScheduler
+from app.utils.stage_cost import load_stage_sheets, refresh_stage_sheets
+from app.utils.stream import apply_blocks, ingest_blocks
+from app.utils.tip_watcher import start_tip_watchers, wait_for_new_tip
 
 logger = structlog.get_logger(__name__)
 running = True
 
 
-def runner(name: str, func: Callable, interval: int):
+def runner(
+    name: str,
+    func: Callable,
+    interval: int,
+    scheduler: Optional[AdaptiveScheduler] = None,
+):
+    """
+    Calls `func` every `interval` seconds.
+    With `scheduler`, `func` is a block tracker taking batch size and returning its progress,
+    and the scheduler decides batch size and delay of each cycle.
+    """
     logger.info(f"Starting {name} tracker")
 
     while running:
+        delay = interval
         try:
-            func()
-            logger.info(f"{name} tracker completed cycle")
+            if scheduler is None:
+                func()
+            else:
+                delay = scheduler.update(func(scheduler.batch_size))
+            logger.info(f"{name} tracker completed cycle", next_cycle_in=delay)
         except Exception as e:
             logger.error(f"Error in {name} tracker", exc_info=e)
 
-        time.sleep(interval)
+        if scheduler is None:
+            time.sleep(delay)
+        else:
+            # Block trackers wake up as soon as a new tip is pushed
+            wait_for_new_tip(delay)
 
 
 def signal_handler(sig, frame):
     global running
     logger.info("Shutting down trackers...")
     running = False
+    try:
+        # Let other replicas take over now instead of after lease expires
+        release_all_leases()
+    except Exception as e:
+        logger.error("Error releasing leases", exc_info=e)
     sys.exit(0)
 
 
@@ -48,19 +87,29 @@ def main():
     signal.signal(signal.SIGTERM, signal_handler)
 
     all_trackers = {
+        "AdventureBossTracker": (track_adv_boss_missing_blocks, 8),
+        "CourageTracker": (track_courage_missing_blocks, 8),
+        "WorldClearTracker": (track_world_clear_missing_blocks, 8),
+        "TxTracker": (track_tx, 10),
+    }
+
+    # (pass type, fetch message, consume message) of block trackers for stream mode
+    stream_trackers = {
         "AdventureBossTracker": (
-            lambda: track_adv_boss_missing_blocks(),
-            8,
+            PassType.ADVENTURE_BOSS_PASS,
+            fetch_adv_boss_message,
+            consume_adventure_boss_message,
         ),
         "CourageTracker": (
-            lambda: track_courage_missing_blocks(),
-            8,
+            PassType.COURAGE_PASS,
+            fetch_courage_message,
+            apply_courage_message,
         ),
         "WorldClearTracker": (
-            lambda: track_world_clear_missing_blocks(),
-            8,
+            PassType.WORLD_CLEAR_PASS,
+            fetch_world_clear_message,
+            consume_world_clear_message,
         ),
-        "TxTracker": (track_tx, 10),
     }
 
     enabled_tracker_names = config.enabled_trackers
@@ -68,16 +117,82 @@ def main():
     
     trackers = []
     for name in enabled_tracker_names:
-        if name in all_trackers:
+        if config.stream_enabled and name in stream_trackers:
+            pass_type, fetch, consume = stream_trackers[name]
+            interval = all_trackers[name][1]
+            trackers.append(
+                (
+                    f"{name}Ingest",
+                    partial(ingest_blocks, pass_type, fetch),
+                    interval,
+                    None,
+                )
+            )
+            trackers.append(
+                (
+                    f"{name}Apply",
+                    partial(apply_blocks, pass_type, consume),
+                    config.stream_apply_interval,
+                    None,
+                )
+            )
+        elif name in all_trackers:
             func, interval = all_trackers[name]
-            trackers.append((name, func, interval))
+            scheduler = None
+            if config.adaptive_schedule and name in stream_trackers:
+                scheduler = AdaptiveScheduler(
+                    interval,
+                    min_batch=config.min_batch_blocks,
+                    max_batch=config.max_batch_blocks,
+                )
+            trackers.append((name, func, interval, scheduler))
         else:
             logger.warning(f"Unknown tracker '{name}' specified in config, skipping")
 
+    if "CourageTracker" in enabled_tracker_names:
+        # Load known battles before the first block, not in the middle of tracking
+        for planet_id in config.enabled_planets:
+            get_recent_battle_filter(planet_id)
+        # Courage consumer only reads loaded StageSheet. Keep it fresh in background.
+        load_stage_sheets()
+        trackers.append(
+            (
+                "StageSheetRefresher",
+                refresh_stage_sheets,
+                config.stage_sheet_refresh_interval,
+                None,
+            )
+        )
+
+    if config.lease_enabled:
+        # Cursors of enabled block trackers are shared with other replicas
+        lease_keys = [
+            (planet_id, stream_trackers[name][0])
+            for name in enabled_tracker_names
+            if name in stream_trackers
+            for planet_id in config.enabled_planets
+        ]
+        start_leases(lease_keys)
+        try:
+            renew_leases_cycle()
+        except Exception as e:
+            logger.error("Error acquiring leases", exc_info=e)
+        trackers.append(
+            (
+                "LeaseRenewer",
+                renew_leases_cycle,
+                config.lease_renew_interval,
+                None,
+            )
+        )
+
+    if config.tip_subscription:
+        start_tip_watchers()
+
     threads = []
-    for name, func, interval in trackers:
+    for name, func, interval, scheduler in trackers:
         thread = threading.Thread(
-            target=runner, args=(name, func, interval), daemon=True
+            target=runner, args=(name, func, interval, scheduler), daemon=True
         )
         thread.start()
         threads.append(thread)
@@ -1,5 +1,5 @@
 import base64
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from pydantic import AmqpDsn, PostgresDsn, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -12,7 +12,8 @@ class Settings(BaseSettings):
     celery_result_backend: str = "redis://127.0.0.1:6379/0"
     headless_jwt_secret: Optional[str] = None
     arena_service_jwt_public_key: str
-    gql_url_map: dict[str, str] = {
+    # URL or list of URLs of each planet. Requests are routed by latency, errors and tip lag.
+    gql_url_map: dict[str, Union[str, List[str]]] = {
         "0x000000000000": "https://odin-rpc.nine-chronicles.com/graphql",
         "0x000000000001": "https://heimdall-rpc.nine-chronicles.com/graphql",
         "0x000000000003": "https://thor-rpc.nine-chronicles.com/graphql",
@@ -24,9 +25,51 @@ class Settings(BaseSettings):
         "TxTracker",
     ]
     enabled_planets: List[str] = ["0x000000000000", "0x000000000001", "0x000000000003"]
+    # Local cache of fetched blocks. Disabled if not set.
+    block_cache_dir: Optional[str] = None
+    block_cache_segment_blocks: int = 10000
+    # Verify arena battle tokens of a block in a process pool when there are at least
+    # `battle_verify_pool_min` of them. Disabled if workers is 0.
+    battle_verify_workers: int = 0
+    battle_verify_pool_min: int = 64
+    # Latest battle IDs of each planet kept in memory to skip known battles without DB.
+    recent_battle_window: int = 100000
+    # Local copy of StageSheet with its ETag to start without CDN. Disabled if not set.
+    stage_sheet_dir: Optional[str] = None
+    stage_sheet_refresh_interval: int = 300
+    # Parallel catch-up of courage pass when it is behind at least `catchup_min_blocks`.
+    # Up to `catchup_cycle_blocks` are processed per cycle in chunks. Disabled if workers is 0.
+    catchup_workers: int = 0
+    catchup_min_blocks: int = 1000
+    catchup_chunk_blocks: int = 200
+    catchup_cycle_blocks: int = 10000
+    # Run block trackers again without sleep while behind, with batch growing with lag
+    # up to `max_batch_blocks`. At tip, wait for next block from observed block interval.
+    adaptive_schedule: bool = True
+    min_batch_blocks: int = 100
+    max_batch_blocks: int = 1000
+    # Receive tip by `tipChanged` subscription instead of polling `nodeStatus`.
+    # Polling is used while subscription is down or silent for `tip_stale_seconds`.
+    tip_subscription: bool = False
+    tip_stale_seconds: int = 30
+    # Fetch and apply blocks of block trackers in separate threads through `tracker_stream` table.
+    # Parallel catch-up is not used in this mode.
+    stream_enabled: bool = False
+    stream_max_depth: int = 1000
+    stream_ingest_blocks: int = 100
+    stream_apply_blocks: int = 100
+    stream_apply_interval: int = 1
+    # Share (planet, pass type) cursors of block trackers with other replicas
+    # by leases in `tracker_lease`.
+    # Lease of a dead replica is taken over after `lease_ttl` seconds.
+    lease_enabled: bool = False
+    lease_ttl: int = 15
+    lease_renew_interval: int = 5
+    # ID of this replica in leases. Host name and process ID if not set.
+    replica_id: Optional[str] = None
 
     @property
-    def converted_gql_url_map(self) -> dict[PlanetID, str]:
+    def converted_gql_url_map(self) -> dict[PlanetID, Union[str, List[str]]]:
         return {PlanetID(k.encode()): v for k, v in self.gql_url_map.items()}
 
     @property
@@ -6,6 +6,8 @@ from shared.enums import ActionType, PassType, PlanetID
 from shared.models.action import AdventureBossHistory, Block
 from shared.models.season_pass import Level
 from shared.schemas.message import TrackerMessage
+from shared.utils.leaderboard import add_avatar_exp_daily
+from shared.utils.rpc_pool import get_rpc_pool
 from shared.utils.season_pass import get_pass
 from sqlalchemy import create_engine, select
 from sqlalchemy.orm import scoped_session, sessionmaker
@@ -13,6 +15,7 @@ from sqlalchemy.orm import scoped_session, sessionmaker
 from app.config import config
 from app.utils.exp import apply_exp
 from app.utils.gql import get_explore_floor
+from app.utils.lease import check_lease
 from app.utils.season_pass import apply_exp, fetch_adv_boss_history, verify_season_pass
 
 AP_PER_ACTION = 2
@@ -21,6 +24,16 @@ logger = structlog.get_logger(__name__)
 engine = create_engine(str(config.pg_dsn))
 
 
+def fetch_explore_floor(
+    planet_id: bytes, block_index: int, season: int, avatar_addr: str
+) -> int:
+    return get_rpc_pool(config.gql_url_map[planet_id.decode()]).request(
+        lambda url: get_explore_floor(
+            url, block_index, season, avatar_addr, config.headless_jwt_secret
+        )
+    )
+
+
 def consume_adventure_boss_message(message: TrackerMessage):
     """
     Receive action data from adv_boss_tracker and give adv.boss exp. to avatar.
@@ -61,12 +74,16 @@ def consume_adventure_boss_message(message: TrackerMessage):
         block_index = message.block
         planet_id = PlanetID(bytes(message.planet_id, "utf-8"))
         
+        # Lock cursor, so a block is never applied twice during lease handover
         existing_block = sess.scalar(
-            select(Block).where(
+            select(Block)
+            .where(
                 Block.planet_id == planet_id,
                 Block.pass_type == PassType.ADVENTURE_BOSS_PASS,
             )
+            .with_for_update()
         )
+        check_lease(sess, message.planet_id, PassType.ADVENTURE_BOSS_PASS)
 
         # Skip blocks before season starts
         if current_pass is None:
@@ -112,6 +129,7 @@ def consume_adventure_boss_message(message: TrackerMessage):
                 for action in action_data:
                     all_avatar_dict[action["season_index"]].add(action["avatar_addr"])
 
+        history_list = []
         explore_dict = {}
         for season_index, avatars in all_avatar_dict.items():
             explore_dict[season_index] = fetch_adv_boss_history(
@@ -120,7 +138,7 @@ def consume_adventure_boss_message(message: TrackerMessage):
 
         for type_id, action_data in message.action_data.items():
             if type_id == "wanted":
-                apply_exp(
+                history_list += apply_exp(
                     sess,
                     planet_id,
                     user_season_dict,
@@ -141,15 +159,14 @@ def consume_adventure_boss_message(message: TrackerMessage):
                     else:
                         # Get current floor data from chain
                         # NOTE: Do not save this to DB because this can make confusion to explore action
-                        current_floor = get_explore_floor(
-                            config.gql_url_map[planet_id.decode()],
+                        current_floor = fetch_explore_floor(
+                            planet_id,
                             block_index,
                             action["season_index"],
                             action["avatar_addr"],
-                            config.headless_jwt_secret,
                         )
                         action["count_base"] = current_floor
-                apply_exp(
+                history_list += apply_exp(
                     sess,
                     planet_id,
                     user_season_dict,
@@ -162,12 +179,11 @@ def consume_adventure_boss_message(message: TrackerMessage):
             elif type_id == "explore_adventure_boss":
                 # Get floor data before explore
                 for action in action_data:
-                    current_floor = get_explore_floor(
-                        config.gql_url_map[planet_id.decode()],
+                    current_floor = fetch_explore_floor(
+                        planet_id,
                         block_index,
                         action["season_index"],
                         action["avatar_addr"],
-                        config.headless_jwt_secret,
                     )
                     explore_data = explore_dict.get(action["season_index"], {}).get(
                         action["avatar_addr"], None
@@ -179,12 +195,11 @@ def consume_adventure_boss_message(message: TrackerMessage):
                         explore_data.floor = current_floor
                     else:
                         # FIXME: 이렇게 하면 상태를 엄청 많이 가져와야 하는데 지금 이거 말고는 어떻게 할 수 있는 방법이 없다...
-                        current_floor = get_explore_floor(
-                            config.gql_url_map[planet_id.decode()],
+                        current_floor = fetch_explore_floor(
+                            planet_id,
                             block_index,
                             action["season_index"],
                             action["avatar_addr"],
-                            config.headless_jwt_secret,
                         )
                         explore_data = AdventureBossHistory(
                             planet_id=planet_id,
@@ -195,7 +210,7 @@ def consume_adventure_boss_message(message: TrackerMessage):
                         )
                         action["count_base"] = AP_PER_ACTION * min(current_floor + 1, 5)
                     sess.add(explore_data)
-                apply_exp(
+                history_list += apply_exp(
                     sess,
                     planet_id,
                     user_season_dict,
@@ -208,6 +223,10 @@ def consume_adventure_boss_message(message: TrackerMessage):
 
         sess.add_all(list(user_season_dict.values()))
         
+        # Flush new histories to get their ids
+        sess.flush()
+        add_avatar_exp_daily(sess, current_pass.id, [x.id for x in history_list])
+
         existing_block.last_processed_index = block_index
         
         sess.commit()
@@ -1,18 +1,24 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import requests
 import structlog
 from app.config import config
+from app.utils.catchup import is_block_in_ledger, record_progress
+from app.utils.lease import check_lease
 from app.utils.season_pass import apply_exp, verify_season_pass
 from app.utils.stage_cost import get_stage_cost_ap
 from app.utils.stake import StakeAPCoef
 from shared.enums import ActionType, PassType, PlanetID
 from shared.models.action import ActionHistory, Block
+from shared.models.arena import BattleHistory
 from shared.models.season_pass import Level
 from shared.models.user import UserSeasonPass
 from shared.schemas.message import TrackerMessage
+from shared.utils.leaderboard import add_avatar_exp_daily
+from shared.utils.rpc_pool import get_rpc_pool
 from shared.utils.season_pass import create_jwt_token, get_pass
 from sqlalchemy import create_engine, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import scoped_session, sessionmaker
 
@@ -25,6 +31,106 @@ ap_coef = StakeAPCoef(jwt_secret=config.headless_jwt_secret)
 coef_dict = {}
 
 
+def courage_action_type(type_id: str) -> Optional[ActionType]:
+    """Returns action type giving brave exp for given action type id, or `None` if it gives nothing."""
+    if (
+        "random_buff" in type_id
+        or "raid_reward" in type_id
+        or "infinite_tower_battle" == type_id
+        or "event_dungeon_battle_sweep" == type_id
+    ):
+        return None
+    if "raid7" == type_id:
+        return ActionType.RAID
+    if "battle" == type_id:
+        return ActionType.ARENA
+    if "hack_and_slash_sweep10" == type_id:
+        return ActionType.SWEEP
+    if "event_dungeon_battle6" == type_id:
+        return ActionType.EVENT
+    return ActionType.HAS
+
+
+def load_ap_coef(planet_id: PlanetID):
+    """Fetch AP coefficient sheet of planet. Call once per block before `get_sweep_count`."""
+    ap_coef.set_url(gql_url=config.gql_url_map[planet_id.decode()])
+
+
+def get_stake_coef(
+    planet_id: PlanetID, agent_addr: str, block_index: Optional[int] = None
+) -> int:
+    """
+    AP coefficient of agent by its stake deposit, in percent.
+    Stake state at `block_index` if given, otherwise the latest one.
+    Call `load_ap_coef` before this.
+    """
+    gql_url = config.gql_url_map[planet_id.decode()]
+    index_arg = "" if block_index is None else f"(index: {block_index})"
+    data = get_rpc_pool(gql_url).request(
+        lambda url: requests.post(
+            url,
+            json={
+                "query": f"""{{ stateQuery{index_arg} {{ stakeState(address: "{agent_addr}") {{ deposit }} }} }}"""
+            },
+            headers={
+                "Authorization": f"Bearer {create_jwt_token(config.headless_jwt_secret)}"
+            },
+        ).json()["data"]["stateQuery"]["stakeState"]
+    )
+    if data is None:
+        return 100
+    return ap_coef.get_ap_coef(float(data["deposit"]))
+
+
+def get_sweep_count(planet_id: PlanetID, d: Dict, coef: Optional[int] = None) -> int:
+    """
+    Convert used AP of sweep to play count using stake status of agent and AP cost of stage.
+    Latest stake status of agent is used if `coef` is not given.
+    """
+    if coef is None:
+        coef = coef_dict.get(d["agent_addr"])
+        if not coef:
+            coef = get_stake_coef(planet_id, d["agent_addr"])
+            coef_dict[d["agent_addr"]] = coef
+
+    stage_id = d.get("stage_id")
+    cost_ap = (
+        get_stage_cost_ap(planet_id, stage_id) if stage_id else DEFAULT_AP_PER_ADVENTURE
+    )
+    return d["count_base"] // (cost_ap * coef / 100)
+
+
+def save_new_battles(sess, planet_id: PlanetID, action_data: Dict[str, List[Dict]]):
+    """
+    Save battles of action data to `battle_history` and drop ones saved before.
+    Saved in the same transaction with exp, so a battle is counted exactly once
+    even if another tracker applies the block again.
+    """
+    battle_id_list = [
+        d["battle_id"]
+        for data_list in action_data.values()
+        for d in data_list
+        if "battle_id" in d
+    ]
+    if not battle_id_list:
+        return
+
+    new_battle_set = set(
+        sess.scalars(
+            insert(BattleHistory)
+            .values([{"planet_id": planet_id, "battle_id": x} for x in battle_id_list])
+            .on_conflict_do_nothing()
+            .returning(BattleHistory.battle_id)
+        )
+    )
+    for type_id, data_list in action_data.items():
+        action_data[type_id] = [
+            d
+            for d in data_list
+            if "battle_id" not in d or d["battle_id"] in new_battle_set
+        ]
+
+
 def handle_sweep(
     sess,
     planet_id: PlanetID,
@@ -33,35 +139,12 @@ def handle_sweep(
     level_dict: Dict[int, int],
     block_index: int,
     action_data: List[Dict],
-):
-    gql_url = config.gql_url_map[planet_id.decode()]
-    ap_coef.set_url(gql_url=gql_url)
+) -> List[ActionHistory]:
+    """Give sweep exp to avatars by play count and returns added action histories."""
+    history_list = []
+    load_ap_coef(planet_id)
     for d in action_data:
-        coef = coef_dict.get(d["agent_addr"])
-        if not coef:
-            resp = requests.post(
-                gql_url,
-                json={
-                    "query": f"""{{ stateQuery {{ stakeState(address: "{d['agent_addr']}") {{ deposit }} }} }}"""
-                },
-                headers={
-                    "Authorization": f"Bearer {create_jwt_token(config.headless_jwt_secret)}"
-                },
-            )
-            data = resp.json()["data"]["stateQuery"]["stakeState"]
-            if data is None:
-                coef = 100
-            else:
-                coef = ap_coef.get_ap_coef(float(data["deposit"]))
-            coef_dict[d["agent_addr"]] = coef
-
-        stage_id = d.get("stage_id")
-        cost_ap = (
-            get_stage_cost_ap(planet_id, stage_id)
-            if stage_id
-            else DEFAULT_AP_PER_ADVENTURE
-        )
-        real_count = d["count_base"] // (cost_ap * coef / 100)
+        real_count = get_sweep_count(planet_id, d)
 
         if exp * real_count < 0:
             logger.warning(
@@ -77,24 +160,29 @@ def handle_sweep(
                 target.level = lvl
                 break
 
-        sess.add(
-            ActionHistory(
-                planet_id=planet_id,
-                block_index=block_index,
-                tx_id=d.get("tx_id", "0" * 64),
-                season_id=target.season_pass_id,
-                agent_addr=target.agent_addr,
-                avatar_addr=target.avatar_addr,
-                action=ActionType.SWEEP,
-                count=real_count,
-                exp=exp * real_count,
-            )
+        history = ActionHistory(
+            planet_id=planet_id,
+            block_index=block_index,
+            tx_id=d.get("tx_id", "0" * 64),
+            season_id=target.season_pass_id,
+            agent_addr=target.agent_addr,
+            avatar_addr=target.avatar_addr,
+            action=ActionType.SWEEP,
+            count=real_count,
+            exp=exp * real_count,
         )
+        sess.add(history)
+        history_list.append(history)
+    return history_list
 
 
-def consume_courage_message(message: TrackerMessage):
+def consume_courage_message(
+    message: TrackerMessage, ledger_start: Optional[int] = None
+):
     """
     Receive action data from block_tracker and give brave exp. to avatar.
+    In parallel catch-up, `ledger_start` is the first block of the range this block belongs to.
+    Progress is recorded to the range in ledger instead of moving `Block.last_processed_index`.
 
     {
         "planet_id": str,
@@ -140,57 +228,50 @@ def consume_courage_message(message: TrackerMessage):
         block_index = message.block
         planet_id = PlanetID(bytes(message.planet_id, "utf-8"))
 
-        existing_block = sess.scalar(
-            select(Block).where(
-                Block.planet_id == planet_id,
-                Block.pass_type == PassType.COURAGE_PASS,
-            )
+        stmt = select(Block).where(
+            Block.planet_id == planet_id,
+            Block.pass_type == PassType.COURAGE_PASS,
         )
+        if ledger_start is None:
+            # Lock cursor, so a block is never applied twice during lease handover.
+            # Not in catch-up: its workers apply blocks concurrently and skip by ledger.
+            stmt = stmt.with_for_update()
+        existing_block = sess.scalar(stmt)
+        # Catch-up is fenced here too: its workers may outlive the lease
+        check_lease(sess, message.planet_id, PassType.COURAGE_PASS)
 
         if existing_block.last_processed_index >= block_index:
             logger.warning(
                 f"Planet {planet_id.name} : Block {block_index} already applied. Skip."
             )
             return
+        # Ranges applied by catch-up may be left unmerged, e.g. when catch-up is turned off
+        # or stream is turned on. Check ledger in every path to apply a block once.
+        if is_block_in_ledger(sess, planet_id, PassType.COURAGE_PASS, block_index):
+            logger.warning(
+                f"Planet {planet_id.name} : Block {block_index} already applied by catch-up. Skip."
+            )
+            if ledger_start is None:
+                existing_block.last_processed_index = block_index
+                sess.commit()
+            return
 
+        save_new_battles(sess, planet_id, message.action_data)
         user_season_dict = verify_season_pass(
-            sess, planet_id, current_pass, message.action_data
+            sess,
+            planet_id,
+            current_pass,
+            message.action_data,
+            lock=ledger_start is not None,
         )
+        history_list = []
         for type_id, action_data in message.action_data.items():
-            if (
-                "random_buff" in type_id
-                or "raid_reward" in type_id
-                or "infinite_tower_battle" == type_id
-                or "event_dungeon_battle_sweep" == type_id
-            ):
+            action_type = courage_action_type(type_id)
+            if action_type is None:
                 continue
 
-            if "raid7" == type_id:
-                apply_exp(
-                    sess,
-                    planet_id,
-                    user_season_dict,
-                    ActionType.RAID,
-                    current_pass.exp_dict[ActionType.RAID],
-                    level_dict,
-                    block_index,
-                    action_data,
-                )
-                logger.info(f"{len(action_data)} Raid applied.")
-            elif "battle" == type_id:
-                apply_exp(
-                    sess,
-                    planet_id,
-                    user_season_dict,
-                    ActionType.ARENA,
-                    current_pass.exp_dict[ActionType.ARENA],
-                    level_dict,
-                    block_index,
-                    action_data,
-                )
-                logger.info(f"{len(action_data)} Arena applied.")
-            elif "hack_and_slash_sweep10" == type_id:
-                handle_sweep(
+            if action_type == ActionType.SWEEP:
+                history_list += handle_sweep(
                     sess,
                     planet_id,
                     user_season_dict,
@@ -199,42 +280,38 @@ def consume_courage_message(message: TrackerMessage):
                     block_index,
                     action_data,
                 )
-                logger.info(f"{len(action_data)} Sweep applied.")
-            elif "event_dungeon_battle6" == type_id:
-                event_exp = current_pass.exp_dict.get(ActionType.EVENT)
-                if event_exp is None:
+            else:
+                exp = current_pass.exp_dict.get(action_type)
+                if exp is None and action_type == ActionType.EVENT:
                     logger.warning(
                         f"ActionType.EVENT exp not found for season pass {current_pass.id}, "
                         f"skipping {len(action_data)} event dungeon actions"
                     )
                     continue
-                apply_exp(
-                    sess,
-                    planet_id,
-                    user_season_dict,
-                    ActionType.EVENT,
-                    event_exp,
-                    level_dict,
-                    block_index,
-                    action_data,
-                )
-                logger.info(f"{len(action_data)} Event Dungeon applied.")
-            else:
-                apply_exp(
+                history_list += apply_exp(
                     sess,
                     planet_id,
                     user_season_dict,
-                    ActionType.HAS,
-                    current_pass.exp_dict[ActionType.HAS],
+                    action_type,
+                    current_pass.exp_dict[action_type],
                     level_dict,
                     block_index,
                     action_data,
                 )
-                logger.info(f"{len(action_data)} HackAndSlash applied.")
+            logger.info(f"{len(action_data)} {action_type.value} applied.")
 
         sess.add_all(list(user_season_dict.values()))
 
-        existing_block.last_processed_index = block_index
+        # Flush new histories to get their ids
+        sess.flush()
+        add_avatar_exp_daily(sess, current_pass.id, [x.id for x in history_list])
+
+        if ledger_start is None:
+            existing_block.last_processed_index = block_index
+        else:
+            record_progress(
+                sess, planet_id, PassType.COURAGE_PASS, ledger_start, block_index
+            )
 
         sess.commit()
         logger.info(
@@ -12,6 +12,7 @@ from sqlalchemy import create_engine, desc, select
 from sqlalchemy.orm import scoped_session, sessionmaker
 
 from app.config import config
+from app.utils.lease import check_lease
 from app.utils.season_pass import verify_season_pass
 
 logger = structlog.get_logger(__name__)
@@ -49,12 +50,16 @@ def consume_world_clear_message(message: TrackerMessage):
         block_index = message.block
         planet_id = PlanetID(bytes(message.planet_id, "utf-8"))
         
+        # Lock cursor, so a block is never applied twice during lease handover
         existing_block = sess.scalar(
-            select(Block).where(
+            select(Block)
+            .where(
                 Block.planet_id == planet_id,
                 Block.pass_type == PassType.WORLD_CLEAR_PASS,
             )
+            .with_for_update()
         )
+        check_lease(sess, message.planet_id, PassType.WORLD_CLEAR_PASS)
 
         # Skip blocks before season starts
         if current_pass is None:
@@ -0,0 +1,483 @@
+"""
+Recalculate brave exp of block range from chain and fix saved action histories.
+
+    python -m app.reprocess --planet-id 0x000000000000 --start 1000 --end 2000 [--apply]
+
+Only courage pass is supported. Exp of courage pass only depends on actions in each block
+and stake status at the block for sweep, so it can be replayed from any block.
+Adventure boss and world clear pass depend on avatar state at the block and cannot be replayed this way.
+Nothing is written without `--apply`.
+"""
+import argparse
+import bisect
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Set, Tuple
+
+import structlog
+from shared.enums import ActionType, PassType, PlanetID
+from shared.models.action import ActionHistory, Block
+from shared.models.arena import BattleHistory
+from shared.models.season_pass import Level, SeasonPass
+from shared.models.user import UserSeasonPass
+from shared.utils.arena import get_battle_watermark
+from shared.utils.leaderboard import rebuild_avatar_exp_daily
+from shared.utils.rpc_pool import RPCPool, get_rpc_pool
+from shared.utils.season_pass import get_pass
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from app.config import config
+from app.consumers.courage_consumer import (
+    courage_action_type,
+    engine,
+    get_stake_coef,
+    get_sweep_count,
+    load_ap_coef,
+)
+from app.trackers.courage_tracker import parse_courage_actions
+from app.utils.block_cache import fetch_block_range_cached
+from app.utils.stage_cost import load_stage_sheets
+
+logger = structlog.get_logger(__name__)
+
+COURAGE_ACTION_TYPES = [
+    ActionType.HAS,
+    ActionType.SWEEP,
+    ActionType.ARENA,
+    ActionType.RAID,
+    ActionType.EVENT,
+]
+
+# (block_index, tx_id, avatar_addr, action)
+HistoryKey = Tuple[int, str, str, ActionType]
+
+
+@dataclass
+class ReprocessResult:
+    block_count: int = 0
+    inserted: int = 0
+    deleted: int = 0
+    exp_delta: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    def merge(self, other: "ReprocessResult"):
+        self.block_count += other.block_count
+        self.inserted += other.inserted
+        self.deleted += other.deleted
+        for avatar_addr, delta in other.exp_delta.items():
+            self.exp_delta[avatar_addr] += delta
+
+
+def fetch_blocks(
+    planet_id: str,
+    rpc: RPCPool,
+    start: int,
+    end: int,
+    batch_size: int,
+    concurrency: int,
+) -> Dict[int, Tuple[List[dict], List[str]]]:
+    """Fetch courage transactions of blocks in [start, end) with `concurrency` range queries at once."""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(
+                fetch_block_range_cached,
+                planet_id,
+                rpc,
+                index,
+                min(batch_size, end - index),
+                PassType.COURAGE_PASS,
+            )
+            for index in range(start, end, batch_size)
+        ]
+        block_dict = {}
+        for future in futures:
+            block_dict.update(future.result())
+    return block_dict
+
+
+def load_counted_battles(
+    sess, planet_id: PlanetID, battle_id_list: List[int]
+) -> Set[int]:
+    """Returns IDs of given battles counted by tracker, which are saved or under the watermark."""
+    if not battle_id_list:
+        return set()
+    watermark = get_battle_watermark(sess, planet_id)
+    saved = set(
+        sess.scalars(
+            select(BattleHistory.battle_id).where(
+                BattleHistory.planet_id == planet_id,
+                BattleHistory.battle_id.in_(battle_id_list),
+            )
+        )
+    )
+    return {x for x in battle_id_list if x < watermark or x in saved}
+
+
+def build_history(
+    sess,
+    planet_id: PlanetID,
+    season: SeasonPass,
+    block_dict: Dict[int, Tuple[List[dict], List[str]]],
+    battle_set: Set[int],
+    existing: Dict[HistoryKey, List[ActionHistory]],
+) -> Dict[HistoryKey, List[dict]]:
+    """
+    Build action histories courage consumer would save for given blocks.
+    Arena battles are deduplicated with `battle_set` instead of `battle_history` table
+    because saved battles of the range are already in the table.
+    Counted battle is from before the range unless its first appearance in the range has
+    saved history, so a battle submitted again in the range is not counted twice.
+    """
+    action_list = [
+        (block_index, type_id, entry, battle_id)
+        for block_index in sorted(block_dict)
+        for type_id, entry, battle_id in parse_courage_actions(*block_dict[block_index])
+    ]
+    counted_battles = load_counted_battles(
+        sess,
+        planet_id,
+        list({int(x[3]) for x in action_list if x[3] is not None} - battle_set),
+    )
+
+    exp_dict = season.exp_dict
+    history_dict = defaultdict(list)
+    ap_coef_loaded = False
+    # (agent_addr, block_index) -> AP coefficient by stake at the block
+    coef_dict = {}
+    for block_index, type_id, entry, battle_id in action_list:
+        if battle_id is not None:
+            battle_id = int(battle_id)
+            if battle_id in battle_set:
+                continue
+            battle_set.add(battle_id)
+            key = (block_index, entry["tx_id"], entry["avatar_addr"], ActionType.ARENA)
+            if battle_id in counted_battles and key not in existing:
+                continue
+
+        action_type = courage_action_type(type_id)
+        if action_type is None or action_type not in exp_dict:
+            continue
+
+        if action_type == ActionType.SWEEP:
+            # Coefficient sheet rarely changes: fetch once per chunk
+            if not ap_coef_loaded:
+                load_ap_coef(planet_id)
+                ap_coef_loaded = True
+            coef_key = (entry["agent_addr"], block_index)
+            if coef_key not in coef_dict:
+                coef_dict[coef_key] = get_stake_coef(
+                    planet_id, entry["agent_addr"], block_index
+                )
+            count = int(get_sweep_count(planet_id, entry, coef_dict[coef_key]))
+            if exp_dict[action_type] * count < 0:
+                continue
+        else:
+            count = entry["count_base"]
+
+        history_dict[
+            (block_index, entry["tx_id"], entry["avatar_addr"], action_type)
+        ].append(
+            {
+                "planet_id": planet_id,
+                "season_id": season.id,
+                "block_index": block_index,
+                "tx_id": entry["tx_id"],
+                "agent_addr": entry["agent_addr"],
+                "avatar_addr": entry["avatar_addr"],
+                "action": action_type,
+                "count": count,
+                "exp": exp_dict[action_type] * count,
+            }
+        )
+    return history_dict
+
+
+def load_history(
+    sess, planet_id: PlanetID, season: SeasonPass, start: int, end: int
+) -> Dict[HistoryKey, List[ActionHistory]]:
+    history_dict = defaultdict(list)
+    for history in sess.scalars(
+        select(ActionHistory).where(
+            ActionHistory.planet_id == planet_id,
+            ActionHistory.season_id == season.id,
+            ActionHistory.block_index >= start,
+            ActionHistory.block_index < end,
+            ActionHistory.action.in_(COURAGE_ACTION_TYPES),
+        )
+    ):
+        history_dict[
+            (
+                history.block_index,
+                history.tx_id,
+                history.avatar_addr,
+                history.action,
+            )
+        ].append(history)
+    return history_dict
+
+
+def block_time_getter(existing: Dict[HistoryKey, List[ActionHistory]]):
+    """
+    Returns function giving time the first history of block was saved.
+    Block without saved history gets time of the nearest block with one,
+    so daily stat of replaced histories stays on the day blocks were applied.
+    """
+    block_time = {}
+    for history_list in existing.values():
+        for x in history_list:
+            if (
+                x.block_index not in block_time
+                or x.created_at < block_time[x.block_index]
+            ):
+                block_time[x.block_index] = x.created_at
+    block_list = sorted(block_time)
+
+    def get(block_index: int) -> datetime:
+        if not block_list:
+            return datetime.now(tz=timezone.utc)
+        i = bisect.bisect_left(block_list, block_index)
+        nearest = min(
+            block_list[max(i - 1, 0) : i + 1], key=lambda x: abs(x - block_index)
+        )
+        return block_time[nearest]
+
+    return get
+
+
+def apply_diff(
+    sess,
+    planet_id: PlanetID,
+    season: SeasonPass,
+    level_dict: Dict[int, int],
+    expected: Dict[HistoryKey, List[dict]],
+    existing: Dict[HistoryKey, List[ActionHistory]],
+) -> ReprocessResult:
+    """
+    Replace saved histories differ from expected ones and fix exp and level of avatars.
+    Caller decides whether commit or rollback.
+    """
+    result = ReprocessResult()
+    delete_ids = []
+    insert_rows = []
+    agent_dict = {}
+    block_time = block_time_getter(existing)
+    for key in expected.keys() | existing.keys():
+        expected_list = expected.get(key, [])
+        existing_list = existing.get(key, [])
+        if sorted((x["count"], x["exp"]) for x in expected_list) == sorted(
+            (x.count, x.exp) for x in existing_list
+        ):
+            continue
+
+        delete_ids.extend(x.id for x in existing_list)
+        # Keep time of replaced histories: daily stat is grouped by `created_at`
+        insert_rows.extend(
+            {**x, "created_at": block_time(key[0])} for x in expected_list
+        )
+        for x in existing_list:
+            agent_dict[x.avatar_addr] = x.agent_addr
+            result.exp_delta[x.avatar_addr] -= x.exp
+        for x in expected_list:
+            agent_dict[x["avatar_addr"]] = x["agent_addr"]
+            result.exp_delta[x["avatar_addr"]] += x["exp"]
+
+    if delete_ids:
+        sess.execute(
+            delete(ActionHistory).where(
+                ActionHistory.season_id == season.id, ActionHistory.id.in_(delete_ids)
+            )
+        )
+    if insert_rows:
+        sess.execute(insert(ActionHistory), insert_rows)
+    result.deleted = len(delete_ids)
+    result.inserted = len(insert_rows)
+    if not agent_dict:
+        return result
+
+    # Lock rows so that concurrent consumer does not overwrite fixed exp
+    usp_dict = {
+        x.avatar_addr: x
+        for x in sess.scalars(
+            select(UserSeasonPass)
+            .where(
+                UserSeasonPass.planet_id == planet_id,
+                UserSeasonPass.season_pass_id == season.id,
+                UserSeasonPass.avatar_addr.in_(list(agent_dict)),
+            )
+            .with_for_update()
+        )
+    }
+    for avatar_addr, delta in result.exp_delta.items():
+        usp = usp_dict.get(avatar_addr)
+        if usp is None:
+            usp = UserSeasonPass(
+                planet_id=planet_id,
+                season_pass_id=season.id,
+                agent_addr=agent_dict[avatar_addr],
+                avatar_addr=avatar_addr,
+                level=0,
+                exp=0,
+            )
+            sess.add(usp)
+        usp.exp = max(usp.exp + delta, 0)
+        usp.level = max(
+            (lvl for lvl, exp in level_dict.items() if usp.exp >= exp), default=0
+        )
+
+    rebuild_avatar_exp_daily(sess, planet_id, season.id, agent_dict.keys())
+    return result
+
+
+def reprocess(
+    planet_id: PlanetID,
+    start: int,
+    end: int,
+    season_index: int = None,
+    apply: bool = False,
+    chunk_size: int = 5000,
+    batch_size: int = 100,
+    concurrency: int = 8,
+) -> ReprocessResult:
+    """
+    Recalculate courage pass histories of blocks in [start, end).
+    Each chunk of blocks is fetched in parallel and committed separately when `apply` is set,
+    so stopped reprocess can be started again from any block.
+    """
+    rpc = get_rpc_pool(config.gql_url_map[planet_id.decode()])
+    sess = scoped_session(sessionmaker(bind=engine))
+    total = ReprocessResult()
+    try:
+        season = get_pass(
+            sess,
+            PassType.COURAGE_PASS,
+            season_index=season_index,
+            validate_current=season_index is None,
+            include_exp=True,
+        )
+        if season is None:
+            raise ValueError("Target courage pass season not found")
+        last_block = sess.scalar(
+            select(Block.last_processed_index).where(
+                Block.planet_id == planet_id,
+                Block.pass_type == PassType.COURAGE_PASS,
+            )
+        )
+        if last_block is None or end > last_block + 1:
+            raise ValueError(
+                f"Blocks after last processed block {last_block} are not processed yet"
+            )
+        # Without block time, season of block is only known by saved histories
+        other_season_id = sess.scalar(
+            select(ActionHistory.season_id)
+            .where(
+                ActionHistory.planet_id == planet_id,
+                ActionHistory.season_id != season.id,
+                ActionHistory.block_index >= start,
+                ActionHistory.block_index < end,
+                ActionHistory.action.in_(COURAGE_ACTION_TYPES),
+            )
+            .limit(1)
+        )
+        if other_season_id is not None:
+            raise ValueError(
+                f"Blocks overlap with histories of other season {other_season_id}"
+            )
+        level_dict = {
+            x.level: x.exp
+            for x in sess.scalars(
+                select(Level).where(Level.pass_type == PassType.COURAGE_PASS)
+            )
+        }
+
+        battle_set = set()
+        for chunk_start in range(start, end, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, end)
+            block_dict = fetch_blocks(
+                planet_id.decode(),
+                rpc,
+                chunk_start,
+                chunk_end,
+                batch_size,
+                concurrency,
+            )
+            existing = load_history(sess, planet_id, season, chunk_start, chunk_end)
+            result = apply_diff(
+                sess,
+                planet_id,
+                season,
+                level_dict,
+                build_history(
+                    sess, planet_id, season, block_dict, battle_set, existing
+                ),
+                existing,
+            )
+            result.block_count = chunk_end - chunk_start
+            if apply:
+                sess.commit()
+            else:
+                sess.rollback()
+            total.merge(result)
+            logger.info(
+                f"Blocks {chunk_start}~{chunk_end - 1} reprocessed",
+                planet_id=planet_id.decode(),
+                inserted=result.inserted,
+                deleted=result.deleted,
+                avatar_count=len(result.exp_delta),
+                dry_run=not apply,
+            )
+    finally:
+        sess.close()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recalculate courage pass exp of block range. Dry run without --apply."
+    )
+    parser.add_argument("--planet-id", required=True, help="e.g. 0x000000000000")
+    parser.add_argument(
+        "--pass-type",
+        type=PassType,
+        default=PassType.COURAGE_PASS,
+        help="Only CouragePass is supported",
+    )
+    parser.add_argument("--start", type=int, required=True, help="First block index")
+    parser.add_argument(
+        "--end", type=int, required=True, help="Last block index (exclusive)"
+    )
+    parser.add_argument(
+        "--season-index", type=int, default=None, help="Current season if not given"
+    )
+    parser.add_argument("--apply", action="store_true", help="Write changes to DB")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.pass_type != PassType.COURAGE_PASS:
+        parser.error(f"{args.pass_type.value} cannot be reprocessed from blocks")
+
+    # Sweep count needs CostAP of stages
+    load_stage_sheets([args.planet_id])
+    result = reprocess(
+        PlanetID(args.planet_id.encode()),
+        args.start,
+        args.end,
+        season_index=args.season_index,
+        apply=args.apply,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+    )
+    print(
+        f"{'Applied' if args.apply else 'Dry run'}: {result.block_count} blocks, "
+        f"{result.inserted} histories inserted, {result.deleted} histories deleted, "
+        f"{len(result.exp_delta)} avatars changed "
+        f"(total exp {sum(result.exp_delta.values()):+d})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Fast decoder of action payloads in `ncTransactions` result.
+
+Each action is decoded into a slotted record of its type, keeping only the fields trackers use.
+Decoder of each `type_id` is resolved by prefix once and kept in `_DECODER_TABLE`,
+so the per-action cost is one JSON parse, one dict lookup and one record creation.
+`orjson` is used if installed.
+"""
+import json
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.schemas.action import AP_PER_STONE
+
+try:
+    from orjson import loads
+except ImportError:
+    loads = json.loads
+
+
+class ActionRecord:
+    """Base of decoded actions. Fields not used by a type are class level `None`."""
+
+    __slots__ = ()
+
+    type_id: str
+    avatar_addr: str
+    world_id: Optional[int] = None
+    stage_id: Optional[int] = None
+    season_index: Optional[int] = None
+    count_base: int = 1
+
+
+@dataclass(slots=True)
+class HackAndSlash(ActionRecord):
+    type_id: str
+    avatar_addr: str
+    world_id: int
+    stage_id: int
+    # This includes AP and AP Potion usage + Staking modification.
+    count_base: int
+
+
+@dataclass(slots=True)
+class HackAndSlashSweep(ActionRecord):
+    type_id: str
+    avatar_addr: str
+    world_id: int
+    stage_id: int
+    # !!! WARNING: This is used AP, not play count !!!
+    count_base: int
+
+
+@dataclass(slots=True)
+class HackAndSlashRandomBuff(ActionRecord):
+    type_id: str
+    avatar_addr: str
+
+
+@dataclass(slots=True)
+class Battle(ActionRecord):
+    type_id: str
+    avatar_addr: str
+    arena_provider: Optional[str]
+    memo: Optional[str]
+
+
+@dataclass(slots=True)
+class Raid(ActionRecord):
+    type_id: str
+    avatar_addr: str
+
+
+@dataclass(slots=True)
+class EventDungeonBattle(ActionRecord):
+    type_id: str
+    avatar_addr: str
+
+
+@dataclass(slots=True)
+class EventDungeonBattleSweep(ActionRecord):
+    type_id: str
+    avatar_addr: str
+
+
+@dataclass(slots=True)
+class Wanted(ActionRecord):
+    type_id: str
+    avatar_addr: str
+    season_index: int
+    count_base: int
+
+
+@dataclass(slots=True)
+class ExploreAdventureBoss(ActionRecord):
+    type_id: str
+    avatar_addr: str
+    season_index: int
+    # AP potion usage is defined inside action. Consumer should get this.
+    count_base: int = 0
+
+
+@dataclass(slots=True)
+class SweepAdventureBoss(ActionRecord):
+    type_id: str
+    avatar_addr: str
+    season_index: int
+    count_base: int = 0
+
+
+# Actions tracked by each pass. Headless returns actions matching `TARGET_ACTION_DICT` of the pass.
+COURAGE_ACTIONS = (
+    HackAndSlash,
+    HackAndSlashSweep,
+    Battle,
+    Raid,
+    EventDungeonBattle,
+    EventDungeonBattleSweep,
+)
+WORLD_CLEAR_ACTIONS = (HackAndSlash, HackAndSlashSweep, HackAndSlashRandomBuff)
+ADVENTURE_BOSS_ACTIONS = (Wanted, ExploreAdventureBoss, SweepAdventureBoss)
+
+
+def _hack_and_slash(type_id: str, v: dict) -> HackAndSlash:
+    return HackAndSlash(
+        type_id,
+        v["avatarAddress"].lower(),
+        v.get("worldId"),
+        v.get("stageId"),
+        v["totalPlayCount"],
+    )
+
+
+def _hack_and_slash_sweep(type_id: str, v: dict) -> HackAndSlashSweep:
+    return HackAndSlashSweep(
+        type_id,
+        v["avatarAddress"].lower(),
+        v.get("worldId"),
+        v.get("stageId"),
+        v["actionPoint"] + v["apStoneCount"] * AP_PER_STONE,
+    )
+
+
+def _hack_and_slash_random_buff(type_id: str, v: dict) -> HackAndSlashRandomBuff:
+    return HackAndSlashRandomBuff(type_id, v["a"].lower())
+
+
+def _battle(type_id: str, v: dict) -> Battle:
+    return Battle(type_id, v["maa"].lower(), v.get("arp"), v.get("m"))
+
+
+def _raid(type_id: str, v: dict) -> Raid:
+    return Raid(type_id, v["a"].lower())
+
+
+def _event_dungeon_battle(type_id: str, v: dict) -> EventDungeonBattle:
+    return EventDungeonBattle(type_id, v["l"][0].lower())
+
+
+def _event_dungeon_battle_sweep(type_id: str, v: dict) -> EventDungeonBattleSweep:
+    # Avatar is resolved in the same order as `ActionJson.avatar_addr`
+    avatar_addr = v.get("avatarAddress") or v.get("maa") or v.get("a") or v["l"][0]
+    return EventDungeonBattleSweep(type_id, avatar_addr.lower())
+
+
+def _wanted(type_id: str, v: dict) -> Wanted:
+    return Wanted(type_id, v["a"].lower(), int(v["s"]), int(int(v["b"][-1]) / 100))
+
+
+def _explore_adventure_boss(type_id: str, v: dict) -> ExploreAdventureBoss:
+    return ExploreAdventureBoss(type_id, v["avatarAddress"].lower(), int(v["season"]))
+
+
+def _sweep_adventure_boss(type_id: str, v: dict) -> SweepAdventureBoss:
+    return SweepAdventureBoss(type_id, v["a"].lower(), int(v["s"]))
+
+
+Decoder = Callable[[str, dict], ActionRecord]
+
+# Checked in order. `None` means the action is not tracked.
+_PREFIX_DECODERS: List[Tuple[str, Optional[Decoder]]] = [
+    ("hack_and_slash_random_buff", _hack_and_slash_random_buff),
+    ("hack_and_slash_sweep", _hack_and_slash_sweep),
+    ("hack_and_slash", _hack_and_slash),
+    ("battle", _battle),
+    ("raid_reward", None),
+    ("raid", _raid),
+    ("event_dungeon_battle_sweep", _event_dungeon_battle_sweep),
+    ("event_dungeon_battle", _event_dungeon_battle),
+    ("wanted", _wanted),
+    ("explore_adventure_boss", _explore_adventure_boss),
+    ("sweep_adventure_boss", _sweep_adventure_boss),
+]
+_DECODER_TABLE: Dict[str, Optional[Decoder]] = {}
+
+
+def get_decoder(type_id: str) -> Optional[Decoder]:
+    decoder = _DECODER_TABLE.get(type_id, _PREFIX_DECODERS)
+    if decoder is _PREFIX_DECODERS:
+        decoder = next(
+            (d for prefix, d in _PREFIX_DECODERS if type_id.startswith(prefix)), None
+        )
+        _DECODER_TABLE[type_id] = decoder
+    return decoder
+
+
+# Current versions of tracked actions
+for _type_id in (
+    "hack_and_slash22",
+    "hack_and_slash_sweep10",
+    "battle",
+    "raid7",
+    "event_dungeon_battle6",
+    "wanted",
+    "explore_adventure_boss",
+    "sweep_adventure_boss",
+):
+    get_decoder(_type_id)
+
+
+def decode_action(action_json: str) -> Optional[ActionRecord]:
+    """Decode `json` of action. Returns `None` for actions not tracked."""
+    action_raw = loads(action_json.replace(r"\uFEFF", ""))
+    type_id = action_raw["type_id"]
+    decoder = get_decoder(type_id)
+    if decoder is None:
+        return None
+    return decoder(type_id, action_raw["values"])
+
+
+def iter_success_actions(
+    tx_data: List[Dict], tx_result_list: List[str]
+) -> Iterator[Tuple[Dict, ActionRecord]]:
+    """Yields (tx, action) of tracked actions in successful transactions."""
+    for tx, tx_result in zip(tx_data, tx_result_list):
+        if tx_result != "SUCCESS":
+            continue
+        for action in tx["actions"]:
+            record = decode_action(action["json"])
+            if record is not None:
+                yield tx, record
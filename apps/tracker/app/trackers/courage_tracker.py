@@ -1,101 +1,144 @@
-import json
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
-import jwt
 import structlog
 from app.config import config
 from app.consumers.courage_consumer import consume_courage_message
-from app.schemas.action import ActionJson
-from app.utils.gql import fetch_block_data, get_block_tip
-from app.utils.stage_cost import refresh_stage_sheets
+from app.schemas.decoder import COURAGE_ACTIONS, iter_success_actions
+from app.utils.arena import RecentBattleFilter, validate_battle_tokens
+from app.utils.block_cache import fetch_block_data_cached, fetch_block_range_cached
+from app.utils.catchup import has_ledger, merge_ledger, plan_ranges
+from app.utils.lease import check_lease, is_tracked
+from app.utils.tip_watcher import get_tip
 from shared.enums import PassType
 from shared.models.action import Block
-from shared.models.arena import BattleHistory
 from shared.schemas.message import TrackerMessage
+from shared.utils.arena import get_battle_watermark
+from shared.utils.rpc_pool import RPCPool, get_rpc_pool
 from sqlalchemy import create_engine, select
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy.orm import scoped_session, sessionmaker
 
 logger = structlog.get_logger(__name__)
 engine = create_engine(str(config.pg_dsn))
+CATCHUP_FETCH_BLOCKS = 100
+CATCHUP_MAX_RETRY = 3
+recent_battle_filters: Dict[str, RecentBattleFilter] = {}
 
 
-def validate_battle_token(token: str):
-    try:
-        decoded_token = jwt.decode(
-            token,
-            config.arena_service_jwt_public_key_pem,
-            algorithms=["RS256"],
-            issuer="planetarium arena service",
-            audience="NineChronicles headless",
+def get_recent_battle_filter(planet_id: str) -> RecentBattleFilter:
+    """Returns recent battle filter of planet, loaded from DB on first use."""
+    battle_filter = recent_battle_filters.get(planet_id)
+    if battle_filter is None:
+        battle_filter = RecentBattleFilter(config.recent_battle_window)
+        sess = scoped_session(sessionmaker(bind=engine))
+        try:
+            battle_filter.load(sess, planet_id.encode())
+        finally:
+            sess.close()
+        recent_battle_filters[planet_id] = battle_filter
+        logger.info(
+            "Recent battle filter loaded",
+            planet_id=planet_id,
+            size=len(battle_filter),
+            watermark=battle_filter.watermark,
         )
+    return battle_filter
+
+
+def parse_courage_actions(
+    tx_data: List[Dict], tx_result_list: List[str]
+) -> Iterator[Tuple[str, Dict, Optional[str]]]:
+    """
+    Yields (type_id, entry, battle_id) of courage actions in successful transactions.
+    `battle_id` is given only for valid arena battles and caller must drop duplicated battles.
+    """
+    action_list = []
+    for tx, action in iter_success_actions(tx_data, tx_result_list):
+        if not isinstance(action, COURAGE_ACTIONS):
+            continue
+        if "battle" == action.type_id and action.arena_provider != "PLANETARIUM":
+            continue
+        action_list.append((tx, action))
 
-        battle_id = decoded_token.get("bid")
-
-        if battle_id is None:
-            raise ValueError("Battle ID not found in token.")
-
-        return battle_id
-    except jwt.InvalidTokenError:
-        raise ValueError("Invalid token.")
-
+    # Verify all battle tokens of the block at once
+    battle_id_iter = iter(
+        validate_battle_tokens(
+            [action.memo for _, action in action_list if "battle" == action.type_id]
+        )
+    )
+    for tx, action in action_list:
+        battle_id = None
+        if "battle" == action.type_id:
+            battle_id = next(battle_id_iter)
+            if battle_id is None:
+                continue
 
-def track_courage_actions(planet_id: str, gql_url: str, block_index: int):
-    tx_data, tx_result_list = fetch_block_data(
-        gql_url, block_index, PassType.COURAGE_PASS, config.headless_jwt_secret
+        entry = {
+            "tx_id": tx["id"],
+            "agent_addr": tx["signer"].lower(),
+            "avatar_addr": action.avatar_addr,
+            "count_base": action.count_base,
+        }
+        if action.stage_id is not None:
+            entry["stage_id"] = action.stage_id
+        yield action.type_id, entry, battle_id
+
+
+def filter_new_battles(planet_id: str, battle_id_list: List[int]) -> Set[int]:
+    """
+    Returns IDs of battles not known to be counted.
+    Battles known by recent battle filter are dropped without DB.
+    Consumer saves the rest to `battle_history` with exp, so a battle is never lost
+    by a tracker stopped between fetching and applying its block.
+    """
+    battle_filter = get_recent_battle_filter(planet_id)
+    battle_id_list = [x for x in battle_id_list if not battle_filter.is_known(x)]
+    if not battle_id_list:
+        return set()
+
+    sess = scoped_session(sessionmaker(bind=engine))
+    try:
+        # Watermark can be raised by pruning after the filter is loaded
+        battle_filter.watermark = get_battle_watermark(sess, planet_id.encode())
+    finally:
+        sess.close()
+    return {x for x in battle_id_list if x >= battle_filter.watermark}
+
+
+def remember_battles(message: TrackerMessage):
+    """Add battles of applied message to recent battle filter."""
+    battle_id_list = [
+        entry["battle_id"]
+        for entry_list in message.action_data.values()
+        for entry in entry_list
+        if "battle_id" in entry
+    ]
+    if battle_id_list:
+        get_recent_battle_filter(message.planet_id).add(battle_id_list)
+
+
+def build_courage_message(
+    planet_id: str, block_index: int, tx_data: List[Dict], tx_result_list: List[str]
+) -> TrackerMessage:
+    """Parse courage actions of block and drop arena battles already counted."""
+    action_list = list(parse_courage_actions(tx_data, tx_result_list))
+    new_battle_set = filter_new_battles(
+        planet_id,
+        [int(battle_id) for _, _, battle_id in action_list if battle_id is not None],
     )
 
     action_data = defaultdict(list)
-    agent_list = set()
-    for i, tx in enumerate(tx_data):
-        if tx_result_list[i] != "SUCCESS":
-            continue
-
-        for action in tx["actions"]:
-            action_raw = json.loads(action["json"].replace(r"\uFEFF", ""))
-            type_id = action_raw["type_id"]
-            if "random_buff" in type_id:  # hack_and_slash_random_buff
-                continue
-            if "claim" in type_id:  # claim_raid_reward
-                continue
-            if "raid_reward" in type_id:
+    for type_id, entry, battle_id in action_list:
+        if battle_id is not None:
+            if int(battle_id) not in new_battle_set:
                 continue
+            # Same battle can be included twice in a block
+            new_battle_set.remove(int(battle_id))
+            entry["battle_id"] = int(battle_id)
 
-            agent_list.add(tx["signer"].lower())
-            action_json = ActionJson(type_id=type_id, **(action_raw["values"]))
-
-            if "battle" == type_id:
-                if action_json.arp != "PLANETARIUM":
-                    continue
-
-                try:
-                    battle_id = validate_battle_token(action_json.m)
-                except ValueError:
-                    continue
-
-                sess = scoped_session(sessionmaker(bind=engine))
-                try:
-
-                    battle_history = BattleHistory(
-                        planet_id=planet_id.encode(), battle_id=battle_id
-                    )
-                    sess.add(battle_history)
-                    sess.commit()
-                except IntegrityError:
-                    sess.rollback()
-                    continue
-                finally:
-                    sess.close()
-
-            entry = {
-                "tx_id": tx["id"],
-                "agent_addr": tx["signer"].lower(),
-                "avatar_addr": action_json.avatar_addr.lower(),
-                "count_base": action_json.count_base,
-            }
-            if action_json.stageId is not None:
-                entry["stage_id"] = action_json.stageId
-            action_data[action_json.type_id].append(entry)
+        action_data[type_id].append(entry)
 
     logger.info(
         f"Sending task to Celery worker: season_pass.process_courage",
@@ -103,23 +146,117 @@ def track_courage_actions(planet_id: str, gql_url: str, block_index: int):
         block=block_index,
         action_count=len(action_data),
     )
-    message = TrackerMessage(
+    return TrackerMessage(
         planet_id=planet_id,
         block=block_index,
         action_data=action_data,
     )
+
+
+def fetch_courage_message(
+    planet_id: str, rpc: RPCPool, block_index: int
+) -> TrackerMessage:
+    tx_data, tx_result_list = fetch_block_data_cached(
+        planet_id, rpc, block_index, PassType.COURAGE_PASS
+    )
+    return build_courage_message(planet_id, block_index, tx_data, tx_result_list)
+
+
+def apply_courage_message(message: TrackerMessage):
     consume_courage_message(message)
+    remember_battles(message)
+
 
+def track_courage_actions(planet_id: str, rpc: RPCPool, block_index: int):
+    apply_courage_message(fetch_courage_message(planet_id, rpc, block_index))
+
+
+def catch_up_range(planet_id: str, rpc: RPCPool, first: int, last: int):
+    """Apply blocks from `first` to `last` in order, recording progress to ledger range of `first`."""
+    for index in range(first, last + 1, CATCHUP_FETCH_BLOCKS):
+        limit = min(CATCHUP_FETCH_BLOCKS, last + 1 - index)
+        block_dict = fetch_block_range_cached(
+            planet_id, rpc, index, limit, PassType.COURAGE_PASS
+        )
+        for block_index in range(index, index + limit):
+            if not is_tracked(planet_id, PassType.COURAGE_PASS):
+                logger.warning(f"Planet {planet_id}: Lease lost. Stop catch-up.")
+                return
+            message = build_courage_message(
+                planet_id, block_index, *block_dict.get(block_index, ([], []))
+            )
+            # Concurrent ranges can conflict creating same user season pass or by deadlock.
+            # Battles of the message are saved by the consumer, so retrying it is safe.
+            for retry in range(CATCHUP_MAX_RETRY + 1):
+                try:
+                    consume_courage_message(message, ledger_start=first)
+                    remember_battles(message)
+                    break
+                except (IntegrityError, OperationalError) as e:
+                    if retry == CATCHUP_MAX_RETRY:
+                        raise
+                    logger.warning(f"Retry block {block_index} in catch-up", exc=str(e))
+
+
+def catch_up(
+    sess, planet_id: str, rpc: RPCPool, start_from: int, current_tip: int
+) -> int:
+    """
+    Process blocks from `start_from` to `current_tip` with `catchup_workers` workers out of order.
+    Returns last processed index after merging processed ranges.
+    """
+    chunks = plan_ranges(
+        sess,
+        planet_id.encode(),
+        PassType.COURAGE_PASS,
+        start_from,
+        current_tip,
+        config.catchup_chunk_blocks,
+        -(-config.catchup_cycle_blocks // config.catchup_chunk_blocks),
+    )
+    logger.info(
+        f"Catching up {len(chunks)} ranges from {start_from} to {current_tip}",
+        tracker="courage_tracker",
+        planet_id=planet_id,
+        workers=config.catchup_workers,
+    )
 
-def track_missing_blocks():
-    refresh_stage_sheets()
-    for planet_id, gql_url in config.gql_url_map.items():
-        if planet_id not in config.enabled_planets:
+    with ThreadPoolExecutor(max_workers=config.catchup_workers) as pool:
+        futures = {
+            pool.submit(catch_up_range, planet_id, rpc, first, last): (first, last)
+            for first, last in chunks
+        }
+        for future in as_completed(futures):
+            first, last = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logger.exception(
+                    f"Error processing blocks from {first} to {last}", exc=e
+                )
+
+    last_processed_index = merge_ledger(sess, planet_id.encode(), PassType.COURAGE_PASS)
+    check_lease(sess, planet_id, PassType.COURAGE_PASS)
+    sess.commit()
+    logger.info(
+        f"Caught up to block {last_processed_index}",
+        tracker="courage_tracker",
+        planet_id=planet_id,
+    )
+    return last_processed_index
+
+
+def track_missing_blocks(batch_size: int = 100) -> Dict[str, Tuple[int, int]]:
+    """Process up to `batch_size` blocks of each planet and returns {planet_id: (tip, last processed index)}."""
+    progress = {}
+    for planet_id, gql_urls in config.gql_url_map.items():
+        if not is_tracked(planet_id, PassType.COURAGE_PASS):
             continue
+        rpc = get_rpc_pool(gql_urls)
 
         sess = scoped_session(sessionmaker(bind=engine))
         try:
-            current_tip = get_block_tip(gql_url, config.headless_jwt_secret)
+            current_tip = get_tip(rpc)
 
             existing_block = sess.scalar(
                 select(Block).where(
@@ -139,6 +276,17 @@ def track_missing_blocks():
                 logger.info(
                     f"Planet {planet_id}: Already up to date. Current tip: {current_tip}"
                 )
+                progress[planet_id] = (current_tip, start_from - 1)
+                continue
+
+            if config.catchup_workers > 0 and (
+                current_tip - start_from >= config.catchup_min_blocks
+                or has_ledger(sess, planet_id.encode(), PassType.COURAGE_PASS)
+            ):
+                progress[planet_id] = (
+                    current_tip,
+                    catch_up(sess, planet_id, rpc, start_from, current_tip),
+                )
                 continue
 
             logger.info(
@@ -149,28 +297,21 @@ def track_missing_blocks():
                 end_block=current_tip,
             )
 
-            # Process blocks in batches of 100
-            end_block = min(start_from + 100, current_tip)
+            end_block = min(start_from + batch_size, current_tip)
+            last_processed_index = start_from - 1
+            # Consumer advances the cursor with the block under its lease
+            sess.close()
 
             for block_index in range(start_from, end_block):
+                if not is_tracked(planet_id, PassType.COURAGE_PASS):
+                    logger.warning(f"Planet {planet_id}: Lease lost. Stop tracking.")
+                    break
                 try:
-                    track_courage_actions(planet_id, gql_url, block_index)
-
-                    if existing_block:
-                        existing_block.last_processed_index = block_index
-                    else:
-                        existing_block = Block(
-                            planet_id=planet_id.encode(),
-                            pass_type=PassType.COURAGE_PASS,
-                            last_processed_index=block_index,
-                        )
-                        sess.add(existing_block)
-
-                    sess.commit()
+                    track_courage_actions(planet_id, rpc, block_index)
+                    last_processed_index = block_index
                     logger.info(f"Block {block_index} processed successfully")
 
                 except Exception as e:
-                    sess.rollback()
                     logger.exception(
                         f"Error processing block {block_index}",
                         exc=e,
@@ -182,6 +323,7 @@ def track_missing_blocks():
                 tracker="courage_tracker",
                 planet_id=planet_id,
             )
+            progress[planet_id] = (current_tip, last_processed_index)
 
         except Exception as e:
             logger.exception(
@@ -190,3 +332,5 @@ def track_missing_blocks():
             )
         finally:
             sess.close()
+
+    return progress
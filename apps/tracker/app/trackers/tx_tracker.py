@@ -9,7 +9,8 @@ from gql.dsl import DSLQuery, dsl_gql
 from shared.enums import PlanetID, TxStatus
 from shared.models.user import Claim
 from shared.utils._graphql import GQLClient
-from sqlalchemy import create_engine, select
+from shared.utils.claim import add_claim_reward_stat
+from sqlalchemy import create_engine, select, update
 from sqlalchemy.orm import scoped_session, sessionmaker
 
 from app.config import config
@@ -90,15 +91,29 @@ def track_tx():
                 claim
             )
 
+        success_list = []
         for future in concurrent.futures.as_completed(futures):
             tx_id, tx_status, msg = future.result()
             target_claim = futures[future]
             result[tx_status.name].append(tx_id)
+            if tx_status == TxStatus.SUCCESS:
+                # Changed below with reward stat
+                success_list.append(target_claim.id)
+                continue
             target_claim.tx_status = tx_status
             # if msg:
             #     claim.msg = "\n".join([claim.msg, msg])
             sess.add(target_claim)
 
+    # Only claims actually changed by this tracker are added to stat, so no reward is counted twice.
+    success_list = sess.scalars(
+        update(Claim)
+        .where(Claim.id.in_(success_list), Claim.tx_status != TxStatus.SUCCESS)
+        .values(tx_status=TxStatus.SUCCESS)
+        .returning(Claim.id)
+    ).all()
+    add_claim_reward_stat(sess, success_list)
+
     logger.info(
         "Transactions found to track",
         tracker="tx_tracker",
@@ -1,54 +1,55 @@
 import concurrent.futures
-import json
 import time
 from collections import defaultdict
+from typing import Dict, Iterator, List, Tuple
 
 import structlog
 from shared.enums import PassType
 from shared.models.action import Block
 from shared.schemas.message import TrackerMessage
+from shared.utils.rpc_pool import RPCPool, get_rpc_pool
 from sqlalchemy import create_engine, select
 from sqlalchemy.orm import scoped_session, sessionmaker
 
 from app.celery import send_to_worker
 from app.config import config
 from app.consumers.world_clear_consumer import consume_world_clear_message
-from app.schemas.action import ActionJson
-from app.utils.gql import fetch_block_data, get_block_tip
+from app.schemas.decoder import WORLD_CLEAR_ACTIONS, iter_success_actions
+from app.utils.block_cache import fetch_block_data_cached
+from app.utils.lease import is_tracked
+from app.utils.tip_watcher import get_tip
 
 logger = structlog.get_logger(__name__)
 engine = create_engine(str(config.pg_dsn))
 
 
-def track_world_clear_actions(planet_id: str, gql_url: str, block_index: int):
-    tx_data, tx_result_list = fetch_block_data(
-        gql_url,
-        block_index,
-        PassType.WORLD_CLEAR_PASS,
-        config.headless_jwt_secret,
+def parse_world_clear_actions(
+    tx_data: List[Dict], tx_result_list: List[str]
+) -> Iterator[Tuple[str, Dict]]:
+    """Yields (type_id, entry) of stage clear actions in successful transactions."""
+    for tx, action in iter_success_actions(tx_data, tx_result_list):
+        if not isinstance(action, WORLD_CLEAR_ACTIONS):
+            continue
+
+        yield action.type_id, {
+            "tx_id": tx["id"],
+            "agent_addr": tx["signer"].lower(),
+            "avatar_addr": action.avatar_addr,
+            "world_id": action.world_id,
+            "stage_id": action.stage_id,
+        }
+
+
+def fetch_world_clear_message(
+    planet_id: str, rpc: RPCPool, block_index: int
+) -> TrackerMessage:
+    tx_data, tx_result_list = fetch_block_data_cached(
+        planet_id, rpc, block_index, PassType.WORLD_CLEAR_PASS
     )
 
     action_data = defaultdict(list)
-    agent_list = set()
-    for i, tx in enumerate(tx_data):
-        if tx_result_list[i] != "SUCCESS":
-            continue
-
-        for action in tx["actions"]:
-            action_raw = json.loads(action["json"].replace(r"\uFEFF", ""))
-            type_id = action_raw["type_id"]
-
-            agent_list.add(tx["signer"].lower())
-            action_json = ActionJson(type_id=type_id, **(action_raw["values"]))
-            action_data[action_json.type_id].append(
-                {
-                    "tx_id": tx["id"],
-                    "agent_addr": tx["signer"].lower(),
-                    "avatar_addr": action_json.avatar_addr.lower(),
-                    "world_id": (action_json.worldId),
-                    "stage_id": (action_json.stageId),
-                }
-            )
+    for type_id, entry in parse_world_clear_actions(tx_data, tx_result_list):
+        action_data[type_id].append(entry)
 
     logger.info(
         f"Sending task to Celery worker: season_pass.process_world_clear",
@@ -56,22 +57,30 @@ def track_world_clear_actions(planet_id: str, gql_url: str, block_index: int):
         block=block_index,
         action_count=len(action_data),
     )
-    message = TrackerMessage(
+    return TrackerMessage(
         planet_id=planet_id,
         block=block_index,
         action_data=action_data,
     )
-    consume_world_clear_message(message)
 
 
-def track_missing_blocks():
-    for planet_id, gql_url in config.gql_url_map.items():
-        if planet_id not in config.enabled_planets:
+def track_world_clear_actions(planet_id: str, rpc: RPCPool, block_index: int):
+    consume_world_clear_message(
+        fetch_world_clear_message(planet_id, rpc, block_index)
+    )
+
+
+def track_missing_blocks(batch_size: int = 100) -> Dict[str, Tuple[int, int]]:
+    """Process up to `batch_size` blocks of each planet and returns {planet_id: (tip, last processed index)}."""
+    progress = {}
+    for planet_id, gql_urls in config.gql_url_map.items():
+        if not is_tracked(planet_id, PassType.WORLD_CLEAR_PASS):
             continue
+        rpc = get_rpc_pool(gql_urls)
 
         sess = scoped_session(sessionmaker(bind=engine))
         try:
-            current_tip = get_block_tip(gql_url, config.headless_jwt_secret)
+            current_tip = get_tip(rpc)
             
             existing_block = sess.scalar(
                 select(Block).where(
@@ -89,6 +98,7 @@ def track_missing_blocks():
                 logger.info(
                     f"Planet {planet_id}: Already up to date. Current tip: {current_tip}"
                 )
+                progress[planet_id] = (current_tip, start_from - 1)
                 continue
                 
             logger.info(
@@ -99,28 +109,21 @@ def track_missing_blocks():
                 end_block=current_tip,
             )
             
-            # Process blocks in batches of 100
-            end_block = min(start_from + 100, current_tip)
+            end_block = min(start_from + batch_size, current_tip)
+            last_processed_index = start_from - 1
+            # Consumer advances the cursor with the block under its lease
+            sess.close()
             
             for block_index in range(start_from, end_block):
+                if not is_tracked(planet_id, PassType.WORLD_CLEAR_PASS):
+                    logger.warning(f"Planet {planet_id}: Lease lost. Stop tracking.")
+                    break
                 try:
-                    track_world_clear_actions(planet_id, gql_url, block_index)
-                    
-                    if existing_block:
-                        existing_block.last_processed_index = block_index
-                    else:
-                        existing_block = Block(
-                            planet_id=planet_id.encode(),
-                            pass_type=PassType.WORLD_CLEAR_PASS,
-                            last_processed_index=block_index,
-                        )
-                        sess.add(existing_block)
-                    
-                    sess.commit()
+                    track_world_clear_actions(planet_id, rpc, block_index)
+                    last_processed_index = block_index
                     logger.info(f"Block {block_index} processed successfully")
                     
                 except Exception as e:
-                    sess.rollback()
                     logger.exception(
                         f"Error processing block {block_index}",
                         exc=e,
@@ -132,6 +135,7 @@ def track_missing_blocks():
                 tracker="world_clear_tracker",
                 planet_id=planet_id,
             )
+            progress[planet_id] = (current_tip, last_processed_index)
                     
         except Exception as e:
             logger.exception(
@@ -140,3 +144,5 @@ def track_missing_blocks():
             )
         finally:
             sess.close()
+
+    return progress
@@ -0,0 +1,127 @@
+import atexit
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+import jwt
+from cryptography.hazmat.primitives.serialization import load_pem_public_key
+from shared.enums import PlanetID
+from shared.models.arena import BattleHistory
+from shared.utils.arena import get_battle_watermark
+from sqlalchemy import select
+
+from app.config import config
+
+_verify_pool: Optional[ProcessPoolExecutor] = None
+_verify_pool_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def arena_public_key():
+    """RSA key of arena service. Parsed once instead of on every `jwt.decode`."""
+    return load_pem_public_key(config.arena_service_jwt_public_key_pem.encode())
+
+
+def validate_battle_token(token: str):
+    try:
+        decoded_token = jwt.decode(
+            token,
+            arena_public_key(),
+            algorithms=["RS256"],
+            issuer="planetarium arena service",
+            audience="NineChronicles headless",
+        )
+
+        battle_id = decoded_token.get("bid")
+
+        if battle_id is None:
+            raise ValueError("Battle ID not found in token.")
+
+        return battle_id
+    except jwt.InvalidTokenError:
+        raise ValueError("Invalid token.")
+
+
+def _battle_id_or_none(token: str):
+    try:
+        return validate_battle_token(token)
+    except ValueError:
+        return None
+
+
+def _get_verify_pool() -> ProcessPoolExecutor:
+    global _verify_pool
+    # Trackers run in threads. Lock so that only one pool is created.
+    with _verify_pool_lock:
+        if _verify_pool is None:
+            # Spawn workers instead of forking threaded process.
+            _verify_pool = ProcessPoolExecutor(
+                max_workers=config.battle_verify_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            atexit.register(_verify_pool.shutdown, cancel_futures=True)
+        return _verify_pool
+
+
+def validate_battle_tokens(token_list: List[str]) -> List[Optional[int]]:
+    """
+    Returns battle ID of each token, or `None` for invalid token.
+    Tokens are verified in process pool if `battle_verify_workers` is set and there are
+    at least `battle_verify_pool_min` tokens, because RSA verification is CPU bound.
+    """
+    if (
+        config.battle_verify_workers > 0
+        and len(token_list) >= config.battle_verify_pool_min
+    ):
+        chunk_size = -(-len(token_list) // config.battle_verify_workers)
+        return list(
+            _get_verify_pool().map(_battle_id_or_none, token_list, chunksize=chunk_size)
+        )
+    return [_battle_id_or_none(x) for x in token_list]
+
+
+class RecentBattleFilter:
+    """
+    Bounded set of latest battle IDs saved to `battle_history` of a planet.
+
+    `is_known` has no false positive: IDs are added only after they are committed,
+    and IDs under the watermark are already pruned from DB after being counted.
+    IDs not known here may still be in DB and must be checked with DB.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.watermark = 0
+        self._queue = deque()
+        self._ids = set()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def load(self, sess, planet_id: PlanetID):
+        """Fill the filter with latest battles of planet in DB."""
+        self.watermark = get_battle_watermark(sess, planet_id)
+        self._queue.clear()
+        self._ids.clear()
+        battle_id_list = sess.scalars(
+            select(BattleHistory.battle_id)
+            .where(BattleHistory.planet_id == planet_id)
+            .order_by(BattleHistory.battle_id.desc())
+            .limit(self.size)
+        ).all()
+        self.add(reversed(battle_id_list))
+
+    def is_known(self, battle_id: int) -> bool:
+        return battle_id < self.watermark or battle_id in self._ids
+
+    def add(self, battle_id_list: Iterable[int]):
+        for battle_id in battle_id_list:
+            if battle_id in self._ids:
+                continue
+            self._queue.append(battle_id)
+            self._ids.add(battle_id)
+            if len(self._queue) > self.size:
+                self._ids.discard(self._queue.popleft())
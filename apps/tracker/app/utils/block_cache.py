@@ -0,0 +1,242 @@
+"""
+Append-only local cache of fetched block data.
+
+Blocks are stored per (planet, action type regex) in segment files of `segment_blocks` blocks:
+
+    {path}/{planet_id}/{sha1(regex)[:12]}/{first block of segment:012d}.seg
+
+Segment file is `MAGIC` followed by records of
+`block_index (u64) | payload length (u32) | zlib(JSON [tx_data, tx_result_list]))`.
+Segments are read with mmap and only decompressed for requested blocks.
+Broken record at the end (e.g. process killed while writing) is ignored and overwritten.
+Appends are serialized among processes by `flock` of segment file.
+"""
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import structlog
+from shared.enums import PassType
+from shared.utils.rpc_pool import RPCPool
+
+from app.config import config
+from app.utils.gql import TARGET_ACTION_DICT, fetch_block_data, fetch_block_range_data
+
+logger = structlog.get_logger(__name__)
+
+MAGIC = b"NCB1"
+RECORD_HEADER = struct.Struct("<QI")
+# Tx. results of these status do not change anymore
+FINAL_TX_STATUS = {"SUCCESS", "FAILURE"}
+
+BlockData = Tuple[List[dict], List[str]]
+
+
+class _Segment:
+    def __init__(self, path: str):
+        self.path = path
+        self.index: Dict[int, Tuple[int, int]] = {}
+        self.size = 0
+        self._mm: Optional[mmap.mmap] = None
+        self._fd: Optional[int] = None
+
+    def _scan(self):
+        """Index records appended since last scan, including ones written by other process."""
+        if not os.path.exists(self.path):
+            return
+        file_size = os.path.getsize(self.path)
+        if file_size <= self.size or file_size < len(MAGIC):
+            return
+
+        self.close_map()
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.size == 0:
+            if self._mm[: len(MAGIC)] != MAGIC:
+                raise ValueError(f"{self.path} is not a block cache segment")
+            self.size = len(MAGIC)
+
+        offset = self.size
+        while offset + RECORD_HEADER.size <= file_size:
+            block_index, length = RECORD_HEADER.unpack_from(self._mm, offset)
+            end = offset + RECORD_HEADER.size + length
+            if end > file_size:
+                break
+            self.index[block_index] = (offset + RECORD_HEADER.size, length)
+            offset = end
+        self.size = offset
+
+    def get(self, block_index: int) -> Optional[BlockData]:
+        if block_index not in self.index:
+            self._scan()
+            if block_index not in self.index:
+                return None
+        offset, length = self.index[block_index]
+        tx_data, tx_result_list = json.loads(
+            zlib.decompress(self._mm[offset : offset + length])
+        )
+        return tx_data, tx_result_list
+
+    def append(self, block_index: int, data: BlockData):
+        """
+        Append record with `O_APPEND` under exclusive `flock` of segment file,
+        so processes sharing the cache do not interleave or overwrite records.
+        """
+        payload = zlib.compress(json.dumps(data, separators=(",", ":")).encode())
+        record = RECORD_HEADER.pack(block_index, len(payload)) + payload
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.write(self._fd, MAGIC)
+            # Index records of other processes written before the lock
+            self._scan()
+            if block_index in self.index:
+                return
+            # Cut off broken tail left by killed writer. No one else writes while locked.
+            if os.fstat(self._fd).st_size > self.size:
+                os.truncate(self._fd, self.size)
+            os.write(self._fd, record)
+            self._scan()
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close_map(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def close(self):
+        self.close_map()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class BlockCache:
+    def __init__(self, path: str, segment_blocks: int = 10000):
+        self.path = path
+        self.segment_blocks = segment_blocks
+        self._lock = threading.Lock()
+        self._segments: Dict[str, _Segment] = {}
+
+    def _segment(self, planet_id: str, block_index: int, action_regex: str):
+        segment_start = block_index - block_index % self.segment_blocks
+        path = os.path.join(
+            self.path,
+            planet_id,
+            hashlib.sha1(action_regex.encode()).hexdigest()[:12],
+            f"{segment_start:012d}.seg",
+        )
+        if path not in self._segments:
+            self._segments[path] = _Segment(path)
+        return self._segments[path]
+
+    def get(
+        self, planet_id: str, block_index: int, action_regex: str
+    ) -> Optional[BlockData]:
+        with self._lock:
+            return self._segment(planet_id, block_index, action_regex).get(block_index)
+
+    def put(self, planet_id: str, block_index: int, action_regex: str, data: BlockData):
+        """Save block data. Data having non-final tx. result is not saved."""
+        if any(x not in FINAL_TX_STATUS for x in data[1]):
+            return
+        with self._lock:
+            segment = self._segment(planet_id, block_index, action_regex)
+            if block_index not in segment.index:
+                segment.append(block_index, data)
+
+    def last_block_index(self, planet_id: str) -> Optional[int]:
+        """Returns the last cached block index of planet among all action type regexes."""
+        planet_path = os.path.join(self.path, planet_id)
+        if not os.path.isdir(planet_path):
+            return None
+
+        last = None
+        with self._lock:
+            for regex_dir in os.listdir(planet_path):
+                name_list = sorted(os.listdir(os.path.join(planet_path, regex_dir)))
+                # Later segment can be empty if the process is killed while creating it
+                for name in reversed(name_list):
+                    path = os.path.join(planet_path, regex_dir, name)
+                    segment = self._segments.setdefault(path, _Segment(path))
+                    segment._scan()
+                    if segment.index:
+                        last = max(last or 0, max(segment.index))
+                        break
+        return last
+
+    def close(self):
+        with self._lock:
+            for segment in self._segments.values():
+                segment.close()
+            self._segments.clear()
+
+
+block_cache = (
+    BlockCache(config.block_cache_dir, config.block_cache_segment_blocks)
+    if config.block_cache_dir
+    else None
+)
+
+
+def fetch_block_data_cached(
+    planet_id: str, rpc: RPCPool, block_index: int, pass_type: PassType
+) -> BlockData:
+    """Same as `fetch_block_data`, but reads `block_cache` first if enabled."""
+    regex = TARGET_ACTION_DICT[pass_type]
+    if block_cache is not None:
+        data = block_cache.get(planet_id, block_index, regex)
+        if data is not None:
+            return data
+
+    data = rpc.request(
+        lambda url: fetch_block_data(
+            url, block_index, pass_type, config.headless_jwt_secret
+        )
+    )
+    if block_cache is not None:
+        block_cache.put(planet_id, block_index, regex, data)
+    return data
+
+
+def fetch_block_range_cached(
+    planet_id: str, rpc: RPCPool, start_index: int, limit: int, pass_type: PassType
+) -> Dict[int, BlockData]:
+    """
+    Same as `fetch_block_range_data`, but reads `block_cache` first if enabled.
+    Range is fetched from node if any block of range is not cached.
+    Blocks without target transactions are cached as empty block, so the range must be under the tip.
+    """
+    regex = TARGET_ACTION_DICT[pass_type]
+    if block_cache is not None:
+        block_dict = {}
+        for block_index in range(start_index, start_index + limit):
+            data = block_cache.get(planet_id, block_index, regex)
+            if data is None:
+                break
+            if data[0]:
+                block_dict[block_index] = data
+        else:
+            return block_dict
+
+    block_dict = rpc.request(
+        lambda url: fetch_block_range_data(
+            url, start_index, limit, pass_type, config.headless_jwt_secret
+        )
+    )
+    if block_cache is not None:
+        for block_index in range(start_index, start_index + limit):
+            block_cache.put(
+                planet_id, block_index, regex, block_dict.get(block_index, ([], []))
+            )
+    return block_dict
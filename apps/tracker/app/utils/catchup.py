@@ -0,0 +1,137 @@
+"""
+Parallel catch-up of pass types whose result does not depend on block order.
+Only courage pass is such one: its exp is additive per avatar.
+Adventure boss floors and world clear stages must be applied in order and keep serial tracking.
+
+Blocks from `Block.last_processed_index + 1` are split into chunks and processed by several workers.
+Each worker records its progress in `block_range_ledger` keyed by the first block of its chunk,
+in the same transaction with applying the block. Only ranges contiguous to the cursor are merged
+into `Block.last_processed_index`, so the cursor never skips an unprocessed block.
+"""
+from typing import List, Optional, Tuple
+
+from shared.enums import PassType, PlanetID
+from shared.models.action import Block, BlockRangeLedger
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+
+def has_ledger(sess, planet_id: PlanetID, pass_type: PassType) -> bool:
+    return bool(
+        sess.scalar(
+            select(func.count(BlockRangeLedger.id)).where(
+                BlockRangeLedger.planet_id == planet_id,
+                BlockRangeLedger.pass_type == pass_type,
+            )
+        )
+    )
+
+
+def is_block_in_ledger(
+    sess, planet_id: PlanetID, pass_type: PassType, block_index: int
+) -> bool:
+    return bool(
+        sess.scalar(
+            select(func.count(BlockRangeLedger.id)).where(
+                BlockRangeLedger.planet_id == planet_id,
+                BlockRangeLedger.pass_type == pass_type,
+                BlockRangeLedger.start_index <= block_index,
+                BlockRangeLedger.last_index >= block_index,
+            )
+        )
+    )
+
+
+def record_progress(
+    sess, planet_id: PlanetID, pass_type: PassType, start_index: int, block_index: int
+):
+    """Mark blocks from `start_index` to `block_index` processed. Call this in the transaction applying the block."""
+    stmt = insert(BlockRangeLedger).values(
+        planet_id=planet_id,
+        pass_type=pass_type,
+        start_index=start_index,
+        last_index=block_index,
+    )
+    sess.execute(
+        stmt.on_conflict_do_update(
+            constraint="block_range_ledger_unique",
+            set_={"last_index": stmt.excluded.last_index, "updated_at": func.now()},
+        )
+    )
+
+
+def merge_ledger(sess, planet_id: PlanetID, pass_type: PassType) -> Optional[int]:
+    """
+    Move `Block.last_processed_index` to the end of ledger ranges contiguous to it
+    and delete merged ranges. Returns new last processed index. Caller must commit.
+    """
+    block = sess.scalar(
+        select(Block)
+        .where(Block.planet_id == planet_id, Block.pass_type == pass_type)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    if block is None:
+        return None
+
+    cursor = block.last_processed_index
+    merged = []
+    for start_index, last_index in sess.execute(
+        select(BlockRangeLedger.start_index, BlockRangeLedger.last_index)
+        .where(
+            BlockRangeLedger.planet_id == planet_id,
+            BlockRangeLedger.pass_type == pass_type,
+        )
+        .order_by(BlockRangeLedger.start_index)
+    ):
+        if start_index > cursor + 1:
+            break
+        cursor = max(cursor, last_index)
+        merged.append(start_index)
+
+    if merged:
+        sess.execute(
+            delete(BlockRangeLedger).where(
+                BlockRangeLedger.planet_id == planet_id,
+                BlockRangeLedger.pass_type == pass_type,
+                BlockRangeLedger.start_index.in_(merged),
+            )
+        )
+        block.last_processed_index = cursor
+    return cursor
+
+
+def plan_ranges(
+    sess,
+    planet_id: PlanetID,
+    pass_type: PassType,
+    start: int,
+    end: int,
+    chunk_blocks: int,
+    limit: int,
+) -> List[Tuple[int, int]]:
+    """
+    Returns up to `limit` chunks `[first, last]` of unprocessed blocks in `[start, end)`,
+    skipping ranges already in ledger.
+    """
+    chunks = []
+    index = start
+    ledger = sess.execute(
+        select(BlockRangeLedger.start_index, BlockRangeLedger.last_index)
+        .where(
+            BlockRangeLedger.planet_id == planet_id,
+            BlockRangeLedger.pass_type == pass_type,
+            BlockRangeLedger.last_index >= start,
+        )
+        .order_by(BlockRangeLedger.start_index)
+    ).all()
+    for gap_end, next_index in [(x, y + 1) for x, y in ledger] + [(end, end)]:
+        gap_end = min(gap_end, end)
+        while index < gap_end and len(chunks) < limit:
+            last = min(index + chunk_blocks, gap_end) - 1
+            chunks.append((index, last))
+            index = last + 1
+        index = max(index, next_index)
+        if index >= end or len(chunks) >= limit:
+            break
+    return chunks
@@ -2,7 +2,8 @@ import hashlib
 import hmac
 import json
 import os
-from typing import Optional
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 
 import bencodex
 import eth_utils
@@ -102,6 +103,50 @@ def fetch_block_data(
     return tx_data, tx_result_list
 
 
+def fetch_block_range_data(
+    gql_url: str,
+    start_index: int,
+    limit: int,
+    pass_type: PassType,
+    headless_jwt_secret: Optional[str] = None,
+) -> Dict[int, Tuple[List[dict], List[str]]]:
+    """
+    Fetch target transactions of `limit` blocks from `start_index` with two requests.
+    Returns {block_index: (tx_data, tx_result_list)} of blocks having target transactions.
+    """
+    nct_query = f"""{{ transaction {{ ncTransactions (
+        startingBlockIndex: {start_index},
+        limit: {limit},
+        actionType: "{TARGET_ACTION_DICT[pass_type]}"
+    ) {{ id signer actions {{ json }} }}
+    }} }}"""
+    resp = requests.post(
+        gql_url,
+        json={"query": nct_query},
+        headers={"Authorization": f"Bearer {create_jwt_token(headless_jwt_secret)}"},
+    )
+    tx_data = resp.json()["data"]["transaction"]["ncTransactions"]
+    if not tx_data:
+        return {}
+
+    tx_result_query = f"""{{ transaction {{ transactionResults (txIds: {json.dumps([x["id"] for x in tx_data])}) {{ blockIndex txStatus }} }} }}"""
+    resp = requests.post(
+        gql_url,
+        json={"query": tx_result_query},
+        headers={"Authorization": f"Bearer {create_jwt_token(headless_jwt_secret)}"},
+    )
+    block_dict = defaultdict(lambda: ([], []))
+    for tx, result in zip(
+        tx_data, resp.json()["data"]["transaction"]["transactionResults"]
+    ):
+        if result["blockIndex"] is None:
+            continue
+        tx_list, result_list = block_dict[result["blockIndex"]]
+        tx_list.append(tx)
+        result_list.append(result["txStatus"])
+    return dict(block_dict)
+
+
 def get_explore_floor(
     gql_url: str,
     block_index: int,
@@ -0,0 +1,254 @@
+"""
+Ownership of block tracker cursors across tracker replicas.
+
+Each (planet, pass type) cursor in `block` is tracked only by the replica holding its lease in `tracker_lease`.
+Every `lease_renew_interval` seconds a replica records its heartbeat in `tracker_replica`, renews its leases
+and acquires free or expired ones up to its fair share of cursors over live replicas,
+releasing leases over the share so that a new replica gets its part.
+A lease not renewed for `lease_ttl` seconds is taken over by another replica.
+Expiry is decided by DB clock, so clocks of replicas do not matter.
+
+A replica stops tracking its cursors `lease_renew_interval` seconds before the lease expires
+unless it is renewed, so two replicas never apply blocks of a cursor at the same time.
+As a fence against stalls (e.g. GC pause, slow node) between that check and commit,
+transactions applying blocks also lock their own lease with `check_lease`.
+"""
+import math
+import os
+import socket
+import time
+import uuid
+import zlib
+from datetime import timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+import structlog
+from shared.enums import PassType
+from shared.models.action import TrackerLease, TrackerReplica
+from sqlalchemy import create_engine, delete, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from app.config import config
+
+logger = structlog.get_logger(__name__)
+engine = create_engine(str(config.pg_dsn), pool_size=1, max_overflow=1)
+
+LeaseKey = Tuple[str, PassType]  # (planet_id, pass type)
+
+
+class LeaseLostError(Exception):
+    """Lease of cursor is not held by this replica anymore. Transaction must be rolled back."""
+
+
+def lease_name(key: LeaseKey) -> str:
+    return f"{key[0]}/{key[1].value}"
+
+
+def replica_id() -> str:
+    return (
+        config.replica_id
+        or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    )
+
+
+def heartbeat(sess, owner: str, ttl: int) -> int:
+    """Record heartbeat of replica and returns number of live replicas."""
+    stmt = insert(TrackerReplica).values(
+        replica_id=owner, expires_at=func.now() + timedelta(seconds=ttl)
+    )
+    sess.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[TrackerReplica.replica_id],
+            set_={"expires_at": stmt.excluded.expires_at, "updated_at": func.now()},
+        )
+    )
+    sess.execute(delete(TrackerReplica).where(TrackerReplica.expires_at < func.now()))
+    return sess.scalar(select(func.count(TrackerReplica.id)))
+
+
+def renew_leases(sess, owner: str, ttl: int) -> Set[LeaseKey]:
+    """Extend all leases of replica and returns keys of them."""
+    return {
+        (planet_id.decode(), pass_type)
+        for planet_id, pass_type in sess.execute(
+            update(TrackerLease)
+            .where(TrackerLease.owner == owner)
+            .values(expires_at=func.now() + timedelta(seconds=ttl))
+            .returning(TrackerLease.planet_id, TrackerLease.pass_type)
+        )
+    }
+
+
+def acquire_lease(sess, owner: str, key: LeaseKey, ttl: int) -> bool:
+    """Take lease of `key` if nobody has it or it is expired. Returns `True` if acquired."""
+    planet_id, pass_type = key
+    stmt = insert(TrackerLease).values(
+        planet_id=planet_id.encode(),
+        pass_type=pass_type,
+        owner=owner,
+        expires_at=func.now() + timedelta(seconds=ttl),
+    )
+    return (
+        sess.scalar(
+            stmt.on_conflict_do_update(
+                constraint="tracker_lease_unique",
+                set_={
+                    "owner": stmt.excluded.owner,
+                    "expires_at": stmt.excluded.expires_at,
+                    "updated_at": func.now(),
+                },
+                where=TrackerLease.expires_at < func.now(),
+            ).returning(TrackerLease.id)
+        )
+        is not None
+    )
+
+
+def release_leases(sess, owner: str, keys: Optional[List[LeaseKey]] = None):
+    """Release leases of given keys, or all leases of replica if `keys` is `None`."""
+    stmt = delete(TrackerLease).where(TrackerLease.owner == owner)
+    if keys is not None:
+        stmt = stmt.where(
+            tuple_(TrackerLease.planet_id, TrackerLease.pass_type).in_(
+                [(planet_id.encode(), pass_type) for planet_id, pass_type in keys]
+            )
+        )
+    sess.execute(stmt)
+
+
+class LeaseManager:
+    def __init__(self, keys: List[LeaseKey], ttl: int, renew_interval: int):
+        self.owner = replica_id()
+        self.keys = keys
+        self.ttl = ttl
+        self.renew_interval = renew_interval
+        # Lease key -> monotonic time to stop tracking unless renewed
+        self._deadline: Dict[LeaseKey, float] = {}
+
+    def owns(self, planet_id: str, pass_type: PassType) -> bool:
+        deadline = self._deadline.get((planet_id, pass_type))
+        return deadline is not None and time.monotonic() < deadline
+
+    def renew(self):
+        """Heartbeat, renew own leases and rebalance them to fair share."""
+        started = time.monotonic()
+        # Stop before DB expiry, so lease taken by other replica is never tracked here
+        deadline = started + self.ttl - self.renew_interval
+        sess = scoped_session(sessionmaker(bind=engine))
+        try:
+            replicas = heartbeat(sess, self.owner, self.ttl)
+            share = math.ceil(len(self.keys) / max(replicas, 1))
+            renewed = renew_leases(sess, self.owner, self.ttl)
+            sess.commit()
+
+            held = renewed & set(self.keys)
+            # Give leases over the share and ones not tracked anymore to other replicas
+            released = (
+                sorted(renewed - held, key=lease_name)
+                + sorted(held, key=lease_name)[share:]
+            )
+            if released:
+                for key in released:
+                    self._deadline.pop(key, None)
+                    held.discard(key)
+                release_leases(sess, self.owner, released)
+                sess.commit()
+                logger.info(
+                    "Leases released",
+                    owner=self.owner,
+                    leases=[lease_name(x) for x in released],
+                )
+
+            # Start from different keys per replica to avoid contention
+            offset = zlib.crc32(self.owner.encode()) % max(len(self.keys), 1)
+            for key in self.keys[offset:] + self.keys[:offset]:
+                if len(held) >= share:
+                    break
+                if key in held:
+                    continue
+                if acquire_lease(sess, self.owner, key, self.ttl):
+                    sess.commit()
+                    held.add(key)
+                    logger.info(
+                        "Lease acquired", owner=self.owner, lease=lease_name(key)
+                    )
+                else:
+                    sess.rollback()
+        except Exception:
+            sess.rollback()
+            raise
+        finally:
+            sess.close()
+
+        self._deadline = {key: deadline for key in held}
+        logger.info(
+            "Leases renewed",
+            owner=self.owner,
+            replicas=replicas,
+            share=share,
+            leases=sorted(lease_name(x) for x in held),
+        )
+
+    def release(self):
+        self._deadline = {}
+        sess = scoped_session(sessionmaker(bind=engine))
+        try:
+            release_leases(sess, self.owner)
+            sess.execute(
+                delete(TrackerReplica).where(TrackerReplica.replica_id == self.owner)
+            )
+            sess.commit()
+        finally:
+            sess.close()
+
+
+lease_manager: Optional[LeaseManager] = None
+
+
+def start_leases(keys: List[LeaseKey]) -> LeaseManager:
+    """Track only cursors of leases from now on. Call `renew_leases_cycle` periodically."""
+    global lease_manager
+    lease_manager = LeaseManager(keys, config.lease_ttl, config.lease_renew_interval)
+    return lease_manager
+
+
+def renew_leases_cycle():
+    if lease_manager is not None:
+        lease_manager.renew()
+
+
+def release_all_leases():
+    if lease_manager is not None:
+        lease_manager.release()
+
+
+def check_lease(sess, planet_id: str, pass_type: PassType):
+    """
+    Fence of transaction applying blocks of cursor. Does nothing if leases are not enabled.
+    Locks own unexpired lease `FOR SHARE`, so it can not be taken over until the transaction ends,
+    and raises `LeaseLostError` if the lease is gone.
+    """
+    if lease_manager is None:
+        return
+    lease_id = sess.scalar(
+        select(TrackerLease.id)
+        .where(
+            TrackerLease.planet_id == planet_id.encode(),
+            TrackerLease.pass_type == pass_type,
+            TrackerLease.owner == lease_manager.owner,
+            TrackerLease.expires_at > func.now(),
+        )
+        .with_for_update(read=True)
+    )
+    if lease_id is None:
+        raise LeaseLostError(
+            f"Lease {lease_name((planet_id, pass_type))} is not held by {lease_manager.owner}"
+        )
+
+
+def is_tracked(planet_id: str, pass_type: PassType) -> bool:
+    """Whether this replica tracks cursor of given planet and pass type now."""
+    if planet_id not in config.enabled_planets:
+        return False
+    return lease_manager is None or lease_manager.owns(planet_id, pass_type)
@@ -0,0 +1,108 @@
+"""
+Adaptive cadence of block trackers.
+
+Block trackers return `{planet_id: (current tip, last processed block index)}` of each cycle.
+While any planet is behind, next cycle starts immediately and batch size grows with the lag.
+If no planet behind made progress (e.g. a block keeps failing), retries back off up to `interval`.
+At tip, next cycle waits until the next block is expected from observed block intervals,
+then polls with growing delay until the tip moves.
+"""
+import time
+from typing import Dict, Optional, Tuple
+
+Progress = Dict[str, Tuple[int, int]]
+
+# Weight of the latest sample in block interval average
+BLOCK_INTERVAL_WEIGHT = 0.2
+
+
+class AdaptiveScheduler:
+    def __init__(
+        self,
+        interval: float,
+        min_batch: int = 100,
+        max_batch: int = 1000,
+        min_delay: float = 0.5,
+        max_delay: float = 60,
+    ):
+        # Used before block interval is known and when a cycle reports nothing (e.g. error)
+        self.interval = interval
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.batch_size = min_batch
+        self._tip: Dict[
+            str, Tuple[int, float]
+        ] = {}  # planet_id -> (tip, first seen at)
+        self._block_interval: Dict[str, float] = {}  # planet_id -> seconds per block
+        self._last_index: Dict[str, int] = {}  # planet_id -> last processed index
+        self._miss = 0
+        self._stall = 0
+
+    def _observe_tip(self, planet_id: str, tip: int, now: float) -> bool:
+        """Returns True if tip moved."""
+        prev = self._tip.get(planet_id)
+        if prev is not None and tip <= prev[0]:
+            return False
+        if prev is not None:
+            sample = (now - prev[1]) / (tip - prev[0])
+            average = self._block_interval.get(planet_id)
+            self._block_interval[planet_id] = (
+                sample
+                if average is None
+                else average + BLOCK_INTERVAL_WEIGHT * (sample - average)
+            )
+        self._tip[planet_id] = (tip, now)
+        return prev is not None
+
+    def _wait_for_next_block(self, planet_id: str, now: float) -> float:
+        block_interval = self._block_interval.get(planet_id)
+        if block_interval is None:
+            return self.interval
+        tip, seen_at = self._tip[planet_id]
+        return seen_at + block_interval - now
+
+    def update(
+        self, progress: Optional[Progress], now: Optional[float] = None
+    ) -> float:
+        """Update with progress of a cycle and returns seconds to wait before the next cycle."""
+        if not progress:
+            return self.interval
+        if now is None:
+            now = time.monotonic()
+
+        lag = 0
+        moved = False
+        advanced = False
+        for planet_id, (tip, last_index) in progress.items():
+            moved |= self._observe_tip(planet_id, tip, now)
+            # Trackers process blocks under the tip
+            planet_lag = tip - 1 - last_index
+            lag = max(lag, planet_lag)
+            prev_index = self._last_index.get(planet_id)
+            if planet_lag > 0 and (prev_index is None or last_index > prev_index):
+                advanced = True
+            self._last_index[planet_id] = last_index
+
+        self.batch_size = min(self.max_batch, max(self.min_batch, lag // 10))
+        if lag > 0:
+            self._miss = 0
+            if advanced:
+                self._stall = 0
+                return 0
+            # Behind but stuck. Do not spin on a failing block.
+            self._stall += 1
+            return min(
+                self.min_delay * 2 ** (self._stall - 1),
+                max(self.interval, self.min_delay),
+                self.max_delay,
+            )
+
+        self._stall = 0
+        self._miss = 0 if moved else self._miss + 1
+        delay = min(self._wait_for_next_block(x, now) for x in progress)
+        if delay <= 0:
+            # Next block is late. Poll more slowly each time it is still missing.
+            delay = self.min_delay * 2 ** max(self._miss - 1, 0)
+        return min(max(delay, self.min_delay), self.max_delay)
@@ -17,7 +17,9 @@ def apply_exp(
     level_dict: Dict[int, int],
     block_index: int,
     action_data: List[Dict],
-):
+) -> List[ActionHistory]:
+    """Give exp of actions to avatars and returns added action histories."""
+    history_list = []
     for d in action_data:
         target = user_season_dict[d["avatar_addr"]]
         target.exp += exp * d["count_base"]
@@ -27,39 +29,47 @@ def apply_exp(
                 target.level = lvl
                 break
 
-        sess.add(
-            ActionHistory(
-                planet_id=planet_id,
-                block_index=block_index,
-                tx_id=d.get("tx_id"),
-                season_id=target.season_pass_id,
-                agent_addr=target.agent_addr,
-                avatar_addr=target.avatar_addr,
-                action=action_type,
-                count=d["count_base"],
-                exp=exp * d["count_base"],
-            )
+        history = ActionHistory(
+            planet_id=planet_id,
+            block_index=block_index,
+            tx_id=d.get("tx_id"),
+            season_id=target.season_pass_id,
+            agent_addr=target.agent_addr,
+            avatar_addr=target.avatar_addr,
+            action=action_type,
+            count=d["count_base"],
+            exp=exp * d["count_base"],
         )
+        sess.add(history)
+        history_list.append(history)
+    return history_list
 
 
 def verify_season_pass(
-    sess, planet_id: PlanetID, current_season: SeasonPass, action_data: Dict[str, List]
+    sess,
+    planet_id: PlanetID,
+    current_season: SeasonPass,
+    action_data: Dict[str, List],
+    lock: bool = False,
 ) -> Dict[str, UserSeasonPass]:
+    """
+    Returns user season pass of avatars in action data, creating missing ones.
+    Set `lock` when other consumers can update the same passes concurrently.
+    """
     avatar_list = set()
     for data in action_data.values():
         for d in data:
             avatar_list.add(d["avatar_addr"])
 
-    season_pass_dict = {
-        x.avatar_addr: x
-        for x in sess.scalars(
-            select(UserSeasonPass).where(
-                UserSeasonPass.planet_id == planet_id,
-                UserSeasonPass.season_pass_id == current_season.id,
-                UserSeasonPass.avatar_addr.in_(avatar_list),
-            )
-        ).fetchall()
-    }
+    query = select(UserSeasonPass).where(
+        UserSeasonPass.planet_id == planet_id,
+        UserSeasonPass.season_pass_id == current_season.id,
+        UserSeasonPass.avatar_addr.in_(avatar_list),
+    )
+    if lock:
+        # Keep lock order same between concurrent consumers
+        query = query.order_by(UserSeasonPass.avatar_addr).with_for_update()
+    season_pass_dict = {x.avatar_addr: x for x in sess.scalars(query).fetchall()}
 
     for data in action_data.values():
         for d in data:
@@ -1,73 +1,182 @@
 import csv
 import io
-from typing import Dict, Optional
+import json
+import os
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional
 
 import requests
 import structlog
 from shared.enums import PlanetID
 
+from app.config import config
+
 logger = structlog.get_logger(__name__)
 
 DEFAULT_COST_AP = 5
 
-_stage_cost_cache: Dict[str, Dict[int, int]] = {}  # planet_id -> {stage_id -> cost_ap}
-_etag_cache: Dict[str, str] = {}  # planet_id -> etag
-
 CDN_BASE_URL = "https://sheets.planetarium.dev"
 
 
-def _fetch_stage_sheet(planet_id: PlanetID) -> Optional[Dict[int, int]]:
-    """Fetch StageSheet from R2 CDN if changed. Returns None when not modified."""
+class StageSheetNotLoadedError(Exception):
+    """StageSheet of planet is not loaded yet. Block should be applied again after refresh."""
+
+
+@dataclass(frozen=True)
+class StageSheet:
+    etag: Optional[str]
+    cost_ap: Mapping[int, int]
+
+
+# planet_id -> StageSheet. Never mutated: refresher builds a new dict and swaps the reference,
+# so readers always see a complete snapshot without lock.
+_snapshot: Mapping[str, StageSheet] = MappingProxyType({})
+
+
+def _parse_stage_sheet(text: str) -> Dict[int, int]:
+    reader = csv.DictReader(io.StringIO(text))
+    result = {}
+    for row in reader:
+        try:
+            result[int(row["id"])] = int(row["cost_ap"])
+        except (ValueError, KeyError):
+            continue
+    return result
+
+
+def _sheet_path(planet_key: str) -> Optional[str]:
+    if not config.stage_sheet_dir:
+        return None
+    return os.path.join(config.stage_sheet_dir, f"{planet_key}.StageSheet.json")
+
+
+def _load_stage_sheet_file(planet_key: str) -> Optional[StageSheet]:
+    path = _sheet_path(planet_key)
+    if path is None or not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return StageSheet(
+            etag=data.get("etag"),
+            cost_ap=MappingProxyType({int(k): v for k, v in data["cost_ap"].items()}),
+        )
+    except Exception as e:
+        logger.warning(f"Failed to read StageSheet file of {planet_key}: {e}")
+        return None
+
+
+def _save_stage_sheet_file(planet_key: str, sheet: StageSheet):
+    path = _sheet_path(planet_key)
+    if path is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"etag": sheet.etag, "cost_ap": dict(sheet.cost_ap)}, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"Failed to write StageSheet file of {planet_key}: {e}")
+
+
+def _fetch_stage_sheet(
+    planet_id: PlanetID, cached: Optional[StageSheet] = None
+) -> Optional[StageSheet]:
+    """Fetch StageSheet from R2 CDN if changed. Returns None when not modified or failed."""
     planet_key = planet_id.decode()
     url = f"{CDN_BASE_URL}/{planet_key}/StageSheet.csv"
     headers = {}
-    cached_etag = _etag_cache.get(planet_key)
-    if cached_etag:
-        headers["If-None-Match"] = cached_etag
+    if cached and cached.etag:
+        headers["If-None-Match"] = cached.etag
     try:
         resp = requests.get(url, headers=headers, timeout=10)
         if resp.status_code == 304:
             return None
         resp.raise_for_status()
-        etag = resp.headers.get("ETag")
-        if etag:
-            _etag_cache[planet_key] = etag
-        reader = csv.DictReader(io.StringIO(resp.text))
-        result = {}
-        for row in reader:
-            try:
-                result[int(row["id"])] = int(row["cost_ap"])
-            except (ValueError, KeyError):
-                continue
+        result = _parse_stage_sheet(resp.text)
         logger.info(
             f"Fetched StageSheet from CDN: {len(result)} stages loaded for {planet_key}"
         )
-        return result
+        return StageSheet(
+            etag=resp.headers.get("ETag"), cost_ap=MappingProxyType(result)
+        )
     except Exception as e:
         logger.warning(f"Failed to fetch StageSheet from CDN for {planet_key}: {e}")
         return None
 
 
 def get_stage_cost_ap(planet_id: PlanetID, stage_id: Optional[int]) -> int:
-    """Get the CostAP for a given stage, using a cached StageSheet from CDN."""
+    """
+    Get the CostAP for a given stage from current StageSheet snapshot.
+    This never touches network. Sheets are loaded by `load_stage_sheets` and `refresh_stage_sheets`.
+
+    Raises `StageSheetNotLoadedError` if StageSheet of planet is not loaded,
+    instead of counting sweeps with wrong CostAP.
+    """
     if stage_id is None:
         return DEFAULT_COST_AP
 
-    planet_key = planet_id.decode()
+    sheet = _snapshot.get(planet_id.decode())
+    if sheet is None:
+        logger.error(
+            f"StageSheet of {planet_id.decode()} is not loaded. Stage {stage_id} is not applied."
+        )
+        raise StageSheetNotLoadedError(planet_id.decode())
+    return sheet.cost_ap.get(stage_id, DEFAULT_COST_AP)
+
+
+def refresh_stage_sheets(planet_list: Optional[Iterable[str]] = None):
+    """
+    Re-fetch StageSheet of planets with conditional GET and swap snapshot if any changed.
+    Refreshes all enabled planets if `planet_list` is not given.
+    """
+    global _snapshot
+
+    if planet_list is None:
+        planet_list = config.enabled_planets
+
+    new_snapshot = dict(_snapshot)
+    changed = False
+    for planet_key in planet_list:
+        cached = new_snapshot.get(planet_key)
+        sheet = _fetch_stage_sheet(PlanetID(planet_key.encode()), cached)
+        if sheet is None:
+            continue
+        new_snapshot[planet_key] = sheet
+        _save_stage_sheet_file(planet_key, sheet)
+        changed = True
 
-    if planet_key not in _stage_cost_cache:
-        sheet = _fetch_stage_sheet(planet_id)
-        if sheet:
-            _stage_cost_cache[planet_key] = sheet
+    if changed:
+        _snapshot = MappingProxyType(new_snapshot)
 
-    cost_ap = _stage_cost_cache.get(planet_key, {}).get(stage_id, DEFAULT_COST_AP)
-    return cost_ap
 
+def load_stage_sheets(planet_list: Optional[Iterable[str]] = None):
+    """
+    Prewarm StageSheet of planets: use local copy first, then revalidate it with CDN.
+    Local copy is kept when CDN is not reachable, so restarts do not depend on network.
+    """
+    global _snapshot
 
-def refresh_stage_sheets():
-    """Re-fetch StageSheet for all cached planets if CDN content changed."""
-    for planet_key in list(_stage_cost_cache.keys()):
-        planet_id = PlanetID(planet_key.encode())
-        sheet = _fetch_stage_sheet(planet_id)
+    if planet_list is None:
+        planet_list = config.enabled_planets
+    planet_list = list(planet_list)
+
+    new_snapshot = dict(_snapshot)
+    for planet_key in planet_list:
+        if planet_key in new_snapshot:
+            continue
+        sheet = _load_stage_sheet_file(planet_key)
         if sheet is not None:
-            _stage_cost_cache[planet_key] = sheet
+            new_snapshot[planet_key] = sheet
+    _snapshot = MappingProxyType(new_snapshot)
+
+    refresh_stage_sheets(planet_list)
+
+    missing = [x for x in planet_list if x not in _snapshot]
+    if missing:
+        logger.warning(
+            f"StageSheet not available for {', '.join(missing)}. "
+            "Sweeps of these planets are not applied until StageSheet is loaded."
+        )
@@ -2,32 +2,36 @@ from collections import defaultdict
 
 import requests
 
+from shared.utils.rpc_pool import Endpoints, get_rpc_pool
 from shared.utils.season_pass import create_jwt_token
 
 
 class StakeAPCoef:
-    def __init__(self, gql_url: str = "", jwt_secret: str = ""):
+    def __init__(self, gql_url: Endpoints = "", jwt_secret: str = ""):
         self.gql_url = gql_url
         self.jwt_secret = jwt_secret
         self.crit = []
 
     def __fetch(self):
-        self.crit = []
         if not self.gql_url:
+            self.crit = []
             return
 
         # StakeActionPointCoefficientSheet Address: 0x4ce2d0Bc945c0E38Ae6c31B0dEe7030951eF1cD1
-        resp = requests.post(
-            self.gql_url,
-            json={
-                "query": """{state(
-                             accountAddress: "0x1000000000000000000000000000000000000000",
-                             address: "0x4ce2d0Bc945c0E38Ae6c31B0dEe7030951eF1cD1"
-                             )}"""
-            },
-            headers={"Authorization": f"Bearer {create_jwt_token(self.jwt_secret)}"},
+        state = get_rpc_pool(self.gql_url).request(
+            lambda url: requests.post(
+                url,
+                json={
+                    "query": """{state(
+                                 accountAddress: "0x1000000000000000000000000000000000000000",
+                                 address: "0x4ce2d0Bc945c0E38Ae6c31B0dEe7030951eF1cD1"
+                                 )}"""
+                },
+                headers={
+                    "Authorization": f"Bearer {create_jwt_token(self.jwt_secret)}"
+                },
+            ).json()["data"]["state"]
         )
-        state = resp.json()["data"]["state"]
         raw = bytes.fromhex(state)
         self.data = raw.decode().split(":")[1]
         # See `StakeActionPointCoefficientSheet.csv` sheet in lib9c
@@ -36,16 +40,19 @@ class StakeAPCoef:
         for b in body:
             d[int(b[1])] = int(b[-1])
 
+        # Build new list and swap it, so concurrent `get_ap_coef` never sees partial one
+        crit = []
         _min = 0
         _coef = 100
         for val, coef in sorted(list(d.items())):
             if coef < _coef:
-                self.crit.append([range(_min, val), _coef])
+                crit.append([range(_min, val), _coef])
                 _min = val
                 _coef = coef
-        self.crit.append([range(_min, 2**64), _coef])
+        crit.append([range(_min, 2**64), _coef])
+        self.crit = crit
 
-    def set_url(self, *, gql_url: str):
+    def set_url(self, *, gql_url: Endpoints):
         self.gql_url = gql_url
         self.__fetch()
 
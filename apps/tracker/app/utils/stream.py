@@ -0,0 +1,170 @@
+"""
+Durable stream between block fetching and applying of block trackers.
+
+Ingest appends `TrackerMessage` of each block to `tracker_stream` table in block order
+per (planet, pass type), and apply consumes them in the same order and deletes them as acknowledgement.
+Both run in their own thread, so slow node does not stall applying and slow DB does not stall fetching.
+Stream depth of a key is the number of fetched blocks waiting to be applied.
+
+Consumers skip blocks under `Block.last_processed_index`, so a message applied but not acknowledged
+(e.g. process killed between them) is skipped when it is read again.
+"""
+from typing import Callable, List
+
+import structlog
+from shared.enums import PassType
+from shared.models.action import Block, TrackerStream
+from shared.schemas.message import TrackerMessage
+from shared.utils.rpc_pool import RPCPool, get_rpc_pool
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from app.config import config
+from app.utils.lease import is_tracked
+from app.utils.tip_watcher import get_tip
+
+logger = structlog.get_logger(__name__)
+engine = create_engine(str(config.pg_dsn), pool_size=5, max_overflow=5)
+
+
+def append_message(sess, pass_type: PassType, message: TrackerMessage):
+    sess.execute(
+        insert(TrackerStream)
+        .values(
+            planet_id=message.planet_id.encode(),
+            pass_type=pass_type,
+            block_index=message.block,
+            message=message.model_dump(mode="json"),
+        )
+        .on_conflict_do_nothing()
+    )
+
+
+def read_messages(
+    sess, planet_id: str, pass_type: PassType, limit: int
+) -> List[TrackerMessage]:
+    return [
+        TrackerMessage.model_validate(x)
+        for x in sess.scalars(
+            select(TrackerStream.message)
+            .where(
+                TrackerStream.planet_id == planet_id.encode(),
+                TrackerStream.pass_type == pass_type,
+            )
+            .order_by(TrackerStream.block_index)
+            .limit(limit)
+        )
+    ]
+
+
+def ack_message(sess, planet_id: str, pass_type: PassType, block_index: int):
+    sess.execute(
+        delete(TrackerStream).where(
+            TrackerStream.planet_id == planet_id.encode(),
+            TrackerStream.pass_type == pass_type,
+            TrackerStream.block_index <= block_index,
+        )
+    )
+
+
+def stream_state(sess, planet_id: str, pass_type: PassType):
+    """Returns (depth, last appended block index or `None`) of stream."""
+    return sess.execute(
+        select(func.count(TrackerStream.id), func.max(TrackerStream.block_index)).where(
+            TrackerStream.planet_id == planet_id.encode(),
+            TrackerStream.pass_type == pass_type,
+        )
+    ).one()
+
+
+def ingest_blocks(
+    pass_type: PassType, fetch_message: Callable[[str, RPCPool, int], TrackerMessage]
+):
+    """Fetch blocks after the last appended one and append their messages to stream."""
+    for planet_id, gql_urls in config.gql_url_map.items():
+        if not is_tracked(planet_id, pass_type):
+            continue
+        rpc = get_rpc_pool(gql_urls)
+
+        sess = scoped_session(sessionmaker(bind=engine))
+        try:
+            depth, last_appended = stream_state(sess, planet_id, pass_type)
+            if depth >= config.stream_max_depth:
+                logger.info(
+                    f"Planet {planet_id}: Stream is full. Wait for apply.",
+                    pass_type=pass_type.value,
+                    depth=depth,
+                )
+                continue
+
+            last_processed_index = sess.scalar(
+                select(Block.last_processed_index).where(
+                    Block.planet_id == planet_id.encode(),
+                    Block.pass_type == pass_type,
+                )
+            )
+            if last_processed_index is None:
+                raise ValueError(
+                    f"No existing block found for planet {planet_id} and pass type {pass_type}"
+                )
+
+            start_from = max(last_appended or 0, last_processed_index) + 1
+            current_tip = get_tip(rpc)
+            end_block = min(
+                start_from + config.stream_max_depth - depth,
+                start_from + config.stream_ingest_blocks,
+                current_tip,
+            )
+            for block_index in range(start_from, end_block):
+                if not is_tracked(planet_id, pass_type):
+                    break
+                append_message(
+                    sess, pass_type, fetch_message(planet_id, rpc, block_index)
+                )
+                sess.commit()
+        except Exception as e:
+            sess.rollback()
+            logger.exception(
+                f"Error ingesting blocks of planet {planet_id}",
+                pass_type=pass_type.value,
+                exc=e,
+            )
+        finally:
+            sess.close()
+
+
+def apply_blocks(pass_type: PassType, consume: Callable[[TrackerMessage], None]):
+    """Apply messages in stream in block order and acknowledge them."""
+    for planet_id in config.gql_url_map:
+        if not is_tracked(planet_id, pass_type):
+            continue
+
+        sess = scoped_session(sessionmaker(bind=engine))
+        try:
+            for message in read_messages(
+                sess, planet_id, pass_type, config.stream_apply_blocks
+            ):
+                if not is_tracked(planet_id, pass_type):
+                    break
+                # Stop at failed block and retry it in next cycle to keep block order
+                consume(message)
+                ack_message(sess, planet_id, pass_type, message.block)
+                sess.commit()
+
+            depth, last_appended = stream_state(sess, planet_id, pass_type)
+            logger.info(
+                f"Planet {planet_id}: Stream applied",
+                pass_type=pass_type.value,
+                depth=depth,
+                last_appended=last_appended,
+            )
+        except Exception as e:
+            sess.rollback()
+            logger.exception(
+                f"Error applying blocks of planet {planet_id}",
+                pass_type=pass_type.value,
+                exc=e,
+            )
+        finally:
+            sess.close()
@@ -0,0 +1,147 @@
+"""
+Push based block tip of headless with `tipChanged` GraphQL subscription.
+
+One websocket connection is kept per headless and its tip is shared by every tracker in this process.
+Pushed tips are recorded to `RPCPool` of the planet, so lagging endpoints are ejected without polling.
+`get_tip` falls back to polling `nodeStatus` while a subscription of the pool is down or has not sent anything
+for `tip_stale_seconds`, so trackers work the same without it.
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+import structlog
+from shared.utils.rpc_pool import RPCPool, endpoint_list, get_rpc_pool
+from shared.utils.season_pass import create_jwt_token
+
+from app.config import config
+from app.utils.gql import get_block_tip
+
+logger = structlog.get_logger(__name__)
+
+TIP_SUBSCRIPTION = "subscription { tipChanged { index } }"
+MAX_RECONNECT_DELAY = 60
+
+_watchers: Dict[str, "TipWatcher"] = {}  # gql_url -> TipWatcher
+# Notified on every new tip of any headless
+_tip_changed = threading.Condition()
+
+
+def ws_url(gql_url: str) -> str:
+    if gql_url.startswith("https://"):
+        return "wss://" + gql_url[len("https://") :]
+    if gql_url.startswith("http://"):
+        return "ws://" + gql_url[len("http://") :]
+    return gql_url
+
+
+class TipWatcher:
+    def __init__(self, rpc: RPCPool, gql_url: str):
+        self.rpc = rpc
+        self.gql_url = gql_url
+        self._tip: Optional[int] = None
+        self._received_at = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self._run()), daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def tip(self) -> Optional[int]:
+        """Last pushed tip, or `None` if subscription is down or stale."""
+        if self._tip is None:
+            return None
+        if time.monotonic() - self._received_at > config.tip_stale_seconds:
+            return None
+        return self._tip
+
+    def _set_tip(self, tip: int):
+        self._received_at = time.monotonic()
+        self.rpc.observe_tip(self.gql_url, tip)
+        if tip != self._tip:
+            self._tip = tip
+            with _tip_changed:
+                _tip_changed.notify_all()
+
+    async def _subscribe(self):
+        # Imported here: websocket transport is only needed when subscription is enabled
+        from gql import Client, gql
+        from gql.transport.websockets import WebsocketsTransport
+
+        transport = WebsocketsTransport(
+            url=ws_url(self.gql_url),
+            headers={
+                "Authorization": f"Bearer {create_jwt_token(config.headless_jwt_secret)}"
+            },
+        )
+        async with Client(transport=transport) as session:
+            logger.info("Tip subscription connected", gql_url=self.gql_url)
+            subscription = session.subscribe(gql(TIP_SUBSCRIPTION))
+            while not self._stop.is_set():
+                # Reconnect if connection hangs without closing
+                result = await asyncio.wait_for(
+                    subscription.__anext__(), config.tip_stale_seconds
+                )
+                self._set_tip(result["tipChanged"]["index"])
+
+    async def _run(self):
+        delay = 1
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                await self._subscribe()
+            except Exception as e:
+                logger.warning(
+                    "Tip subscription dropped. Fall back to polling.",
+                    gql_url=self.gql_url,
+                    exc=str(e),
+                )
+            self._tip = None
+            # Reset backoff if connection was alive for a while
+            if time.monotonic() - started > MAX_RECONNECT_DELAY:
+                delay = 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+
+def start_tip_watchers():
+    """Subscribe tip of all enabled planets."""
+    for planet_id, gql_urls in config.gql_url_map.items():
+        if planet_id not in config.enabled_planets:
+            continue
+        rpc = get_rpc_pool(gql_urls)
+        for gql_url in endpoint_list(gql_urls):
+            if gql_url in _watchers:
+                continue
+            watcher = TipWatcher(rpc, gql_url)
+            _watchers[gql_url] = watcher
+            watcher.start()
+
+
+def get_tip(rpc: RPCPool) -> int:
+    """
+    Block tip every routed endpoint of pool has, from subscription
+    or from `nodeStatus` if any subscription of the pool is not available.
+    """
+    watchers = [_watchers.get(x) for x in rpc.urls]
+    if all(x is not None and x.tip is not None for x in watchers):
+        tip = rpc.tip(config.tip_stale_seconds)
+        if tip is not None:
+            return tip
+    return rpc.get_tip(lambda url: get_block_tip(url, config.headless_jwt_secret))
+
+
+def wait_for_new_tip(timeout: float):
+    """Sleep up to `timeout` seconds, waking up early when a tip is pushed."""
+    if not _watchers:
+        time.sleep(timeout)
+        return
+    with _tip_changed:
+        _tip_changed.wait(timeout)
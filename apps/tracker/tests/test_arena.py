@@ -0,0 +1,24 @@
+import threading
+
+from app.utils import arena
+
+
+def test_verify_pool_created_once(monkeypatch):
+    monkeypatch.setattr(arena, "_verify_pool", None)
+    monkeypatch.setattr(arena.config, "battle_verify_workers", 1)
+    barrier = threading.Barrier(8)
+    pool_list = []
+
+    def get_pool():
+        barrier.wait()
+        pool_list.append(arena._get_verify_pool())
+
+    thread_list = [threading.Thread(target=get_pool) for _ in range(8)]
+    for thread in thread_list:
+        thread.start()
+    for thread in thread_list:
+        thread.join()
+
+    assert len(pool_list) == 8
+    assert all(x is pool_list[0] for x in pool_list)
+    pool_list[0].shutdown()
@@ -0,0 +1,128 @@
+import multiprocessing
+
+import pytest
+from app.utils.block_cache import MAGIC, RECORD_HEADER, BlockCache
+
+PLANET_ID = "0x000000000000"
+REGEX = "(hack_and_slash.*)"
+
+
+def block_data(block_index: int):
+    return [{"id": f"tx{block_index}", "actions": [{"raw": "6b"}]}], ["SUCCESS"]
+
+
+def segment_path(cache: BlockCache, block_index: int) -> str:
+    return cache._segment(PLANET_ID, block_index, REGEX).path
+
+
+def record_count(path: str) -> int:
+    with open(path, "rb") as f:
+        data = f.read()
+    offset, count = len(MAGIC), 0
+    while offset < len(data):
+        _, length = RECORD_HEADER.unpack_from(data, offset)
+        offset += RECORD_HEADER.size + length
+        count += 1
+    assert offset == len(data)
+    return count
+
+
+def put_range(path: str, start: int, end: int):
+    cache = BlockCache(path, segment_blocks=100)
+    for block_index in range(start, end):
+        cache.put(PLANET_ID, block_index, REGEX, block_data(block_index))
+    cache.close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    block_cache = BlockCache(str(tmp_path), segment_blocks=100)
+    yield block_cache
+    block_cache.close()
+
+
+def test_append_read(cache):
+    for block_index in range(10):
+        cache.put(PLANET_ID, block_index, REGEX, block_data(block_index))
+
+    for block_index in range(10):
+        assert cache.get(PLANET_ID, block_index, REGEX) == block_data(block_index)
+    assert cache.get(PLANET_ID, 10, REGEX) is None
+    assert cache.last_block_index(PLANET_ID) == 9
+
+
+def test_non_final_status_not_saved(cache):
+    cache.put(PLANET_ID, 1, REGEX, ([{"id": "tx1"}], ["STAGING"]))
+    assert cache.get(PLANET_ID, 1, REGEX) is None
+
+
+def test_reopen(tmp_path, cache):
+    for block_index in range(95, 105):
+        cache.put(PLANET_ID, block_index, REGEX, block_data(block_index))
+    cache.close()
+
+    reopened = BlockCache(str(tmp_path), segment_blocks=100)
+    assert reopened.last_block_index(PLANET_ID) == 104
+    for block_index in range(95, 105):
+        assert reopened.get(PLANET_ID, block_index, REGEX) == block_data(block_index)
+
+    # Append to existing segment after reopen
+    reopened.put(PLANET_ID, 105, REGEX, block_data(105))
+    reopened.close()
+    assert BlockCache(str(tmp_path), segment_blocks=100).get(
+        PLANET_ID, 105, REGEX
+    ) == block_data(105)
+
+
+def test_broken_tail_overwritten(tmp_path, cache):
+    cache.put(PLANET_ID, 1, REGEX, block_data(1))
+    path = segment_path(cache, 1)
+    cache.close()
+    # Process killed while writing record of block 2
+    with open(path, "ab") as f:
+        f.write(RECORD_HEADER.pack(2, 1000) + b"broken")
+
+    reopened = BlockCache(str(tmp_path), segment_blocks=100)
+    assert reopened.get(PLANET_ID, 2, REGEX) is None
+    reopened.put(PLANET_ID, 2, REGEX, block_data(2))
+    reopened.put(PLANET_ID, 3, REGEX, block_data(3))
+    reopened.close()
+
+    reopened = BlockCache(str(tmp_path), segment_blocks=100)
+    for block_index in (1, 2, 3):
+        assert reopened.get(PLANET_ID, block_index, REGEX) == block_data(block_index)
+    reopened.close()
+
+
+def test_other_process_append(tmp_path, cache):
+    cache.put(PLANET_ID, 0, REGEX, block_data(0))
+    process = multiprocessing.Process(target=put_range, args=(str(tmp_path), 1, 5))
+    process.start()
+    process.join()
+
+    # Records appended by other process are read without reopen
+    for block_index in range(5):
+        assert cache.get(PLANET_ID, block_index, REGEX) == block_data(block_index)
+    cache.put(PLANET_ID, 5, REGEX, block_data(5))
+    assert cache.last_block_index(PLANET_ID) == 5
+
+
+def test_concurrent_append(tmp_path):
+    process_list = [
+        multiprocessing.Process(target=put_range, args=(str(tmp_path), 0, 100))
+        for _ in range(4)
+    ]
+    for process in process_list:
+        process.start()
+    for process in process_list:
+        process.join()
+
+    cache = BlockCache(str(tmp_path), segment_blocks=100)
+    path = segment_path(cache, 0)
+    with open(path, "rb") as f:
+        assert f.read(len(MAGIC)) == MAGIC
+    for block_index in range(100):
+        assert cache.get(PLANET_ID, block_index, REGEX) == block_data(block_index)
+    # Every block is written once without interleaving
+    assert record_count(path) == 100
+    cache.close()
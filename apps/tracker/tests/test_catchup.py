@@ -0,0 +1,109 @@
+import pytest
+from app.consumers.courage_consumer import consume_courage_message
+from app.utils.catchup import (
+    has_ledger,
+    is_block_in_ledger,
+    merge_ledger,
+    plan_ranges,
+    record_progress,
+)
+from shared.enums import PassType, PlanetID
+from shared.models.action import Block, BlockRangeLedger
+from shared.schemas.message import TrackerMessage
+from sqlalchemy import select
+
+PASS_TYPE = PassType.COURAGE_PASS
+
+
+@pytest.fixture
+def cursor(test_session):
+    block = Block(planet_id=PlanetID.ODIN, pass_type=PASS_TYPE, last_processed_index=99)
+    test_session.add(block)
+    test_session.commit()
+    return block
+
+
+def _ledger(sess):
+    return sess.execute(
+        select(BlockRangeLedger.start_index, BlockRangeLedger.last_index)
+        .where(BlockRangeLedger.planet_id == PlanetID.ODIN)
+        .order_by(BlockRangeLedger.start_index)
+    ).all()
+
+
+def _record(sess, ranges):
+    for start_index, last_index in ranges:
+        record_progress(sess, PlanetID.ODIN, PASS_TYPE, start_index, last_index)
+    sess.commit()
+
+
+def test_plan_ranges(test_session):
+    assert plan_ranges(test_session, PlanetID.ODIN, PASS_TYPE, 100, 150, 20, 10) == [
+        (100, 119),
+        (120, 139),
+        (140, 149),
+    ]
+    # 블록 수 제한
+    assert plan_ranges(test_session, PlanetID.ODIN, PASS_TYPE, 100, 150, 20, 2) == [
+        (100, 119),
+        (120, 139),
+    ]
+
+
+def test_plan_ranges_skip_ledger(test_session):
+    # 구간 중간까지 처리한 범위와 끝까지 처리한 범위
+    _record(test_session, [(100, 104), (120, 139), (150, 170)])
+
+    assert plan_ranges(test_session, PlanetID.ODIN, PASS_TYPE, 100, 160, 10, 10) == [
+        (105, 114),
+        (115, 119),
+        (140, 149),
+    ]
+    # 다른 행성 장부는 무시
+    assert plan_ranges(
+        test_session, PlanetID.HEIMDALL, PASS_TYPE, 100, 110, 10, 10
+    ) == [(100, 109)]
+    # 전부 처리한 구간
+    assert plan_ranges(test_session, PlanetID.ODIN, PASS_TYPE, 120, 140, 10, 10) == []
+
+
+def test_merge_ledger(test_session, cursor):
+    _record(test_session, [(100, 119), (120, 125), (140, 159)])
+    assert has_ledger(test_session, PlanetID.ODIN, PASS_TYPE)
+
+    # 커서와 이어진 범위만 병합
+    assert merge_ledger(test_session, PlanetID.ODIN, PASS_TYPE) == 125
+    test_session.commit()
+    assert _ledger(test_session) == [(140, 159)]
+    assert cursor.last_processed_index == 125
+
+    # 빈 구간이 채워지면 나머지도 병합
+    _record(test_session, [(126, 139)])
+    assert merge_ledger(test_session, PlanetID.ODIN, PASS_TYPE) == 159
+    test_session.commit()
+    assert _ledger(test_session) == []
+    assert not has_ledger(test_session, PlanetID.ODIN, PASS_TYPE)
+
+
+def test_merge_ledger_without_cursor(test_session):
+    _record(test_session, [(100, 119)])
+    assert merge_ledger(test_session, PlanetID.ODIN, PASS_TYPE) is None
+    assert _ledger(test_session) == [(100, 119)]
+
+
+def test_consume_block_in_ledger(test_session, cursor):
+    """병합되지 않은 장부의 블록은 순차 처리에서도 다시 적용하지 않고 커서만 이동"""
+    _record(test_session, [(100, 104), (110, 119)])
+    assert is_block_in_ledger(test_session, PlanetID.ODIN, PASS_TYPE, 100)
+    message = TrackerMessage(
+        planet_id=PlanetID.ODIN.decode(), block=100, action_data={"battle": []}
+    )
+
+    # 병렬 처리 중에는 커서를 움직이지 않음
+    consume_courage_message(message, ledger_start=100)
+    test_session.refresh(cursor)
+    assert cursor.last_processed_index == 99
+
+    consume_courage_message(message)
+    test_session.refresh(cursor)
+    assert cursor.last_processed_index == 100
@@ -0,0 +1,254 @@
+import json
+
+import pytest
+from app.schemas.action import ActionJson, AdventureBossActionJson
+from app.schemas.decoder import decode_action, iter_success_actions
+from app.trackers import courage_tracker
+from app.trackers.adv_boss_tracker import parse_adv_boss_actions
+from app.trackers.courage_tracker import parse_courage_actions
+from app.trackers.world_clear_tracker import parse_world_clear_actions
+
+AVATAR_ADDR = "0xAbCdEf0123456789aBcDeF0123456789AbCdEf01"
+RUNE = [[1, 10001]]
+
+# (type_id, values) of action payloads given by headless
+HACK_AND_SLASH = (
+    "hack_and_slash22",
+    {
+        "apStoneCount": 0,
+        "avatarAddress": AVATAR_ADDR,
+        "costumes": [],
+        "equipments": [],
+        "foods": [],
+        "r": RUNE,
+        "stageId": 52,
+        "totalPlayCount": 24,
+        "worldId": 2,
+    },
+)
+HACK_AND_SLASH_SWEEP = (
+    "hack_and_slash_sweep10",
+    {
+        "actionPoint": 60,
+        "apStoneCount": 2,
+        "avatarAddress": AVATAR_ADDR,
+        "costumes": [],
+        "equipments": [],
+        "runeInfos": RUNE,
+        "stageId": 51,
+        "worldId": 2,
+    },
+)
+RANDOM_BUFF = ("hack_and_slash_random_buff", {"a": AVATAR_ADDR, "gb": False})
+BATTLE = (
+    "battle",
+    {
+        "maa": AVATAR_ADDR,
+        "arp": "PLANETARIUM",
+        "m": "token-1",
+        "costumes": [],
+        "equipments": [],
+        "r": RUNE,
+    },
+)
+OTHER_ARENA_BATTLE = (
+    "battle",
+    {"maa": AVATAR_ADDR, "arp": "OTHER", "m": "token-2", "r": RUNE},
+)
+INVALID_BATTLE = ("battle", {"maa": AVATAR_ADDR, "arp": "PLANETARIUM", "m": "invalid"})
+RAID = ("raid7", {"a": AVATAR_ADDR, "c": [], "e": [], "f": [], "p": False, "r": RUNE})
+RAID_REWARD = ("claim_raid_reward", {"a": AVATAR_ADDR})
+EVENT_DUNGEON = ("event_dungeon_battle6", {"l": [AVATAR_ADDR, 1001, 10010001]})
+EVENT_DUNGEON_SWEEP = (
+    "event_dungeon_battle_sweep",
+    {"a": AVATAR_ADDR, "c": [], "e": [], "r": RUNE},
+)
+WANTED = (
+    "wanted",
+    {
+        "a": AVATAR_ADDR,
+        "b": [{"decimalPlaces": 2, "minters": None, "ticker": "NCG"}, "500"],
+        "s": "3",
+    },
+)
+EXPLORE_ADVENTURE_BOSS = (
+    "explore_adventure_boss",
+    {
+        "avatarAddress": AVATAR_ADDR,
+        "costumes": [],
+        "equipments": [],
+        "foods": [],
+        "r": RUNE,
+        "season": "3",
+    },
+)
+SWEEP_ADVENTURE_BOSS = (
+    "sweep_adventure_boss",
+    {"a": AVATAR_ADDR, "c": [], "e": [], "r": RUNE, "s": "3"},
+)
+
+
+def make_block(*tx_list):
+    """Returns (tx_data, tx_result_list) of transactions given as (result, actions)."""
+    tx_data = []
+    for i, (_, action_list) in enumerate(tx_list):
+        tx_data.append(
+            {
+                "id": f"tx{i}",
+                "signer": f"0xAgent{i}",
+                "actions": [
+                    {
+                        "json": json.dumps(
+                            {
+                                "type_id": type_id,
+                                "values": {"id": f"action{i}", **values},
+                            }
+                        )
+                    }
+                    for type_id, values in action_list
+                ],
+            }
+        )
+    return tx_data, [result for result, _ in tx_list]
+
+
+def iter_legacy_actions(tx_data, tx_result_list, action_class):
+    for i, tx in enumerate(tx_data):
+        if tx_result_list[i] != "SUCCESS":
+            continue
+        for action in tx["actions"]:
+            action_raw = json.loads(action["json"].replace(r"\uFEFF", ""))
+            type_id = action_raw["type_id"]
+            if action_class is ActionJson and (
+                "random_buff" in type_id
+                or "claim" in type_id
+                or "raid_reward" in type_id
+            ):
+                continue
+            yield tx, action_class(type_id=type_id, **(action_raw["values"]))
+
+
+def validate_battle_tokens(token_list):
+    return [int(x.split("-")[1]) if x.startswith("token") else None for x in token_list]
+
+
+def legacy_courage_actions(tx_data, tx_result_list):
+    """Parsing of courage tracker before decoder."""
+    for tx, action_json in iter_legacy_actions(tx_data, tx_result_list, ActionJson):
+        battle_id = None
+        if "battle" == action_json.type_id:
+            if action_json.arp != "PLANETARIUM":
+                continue
+            battle_id = validate_battle_tokens([action_json.m])[0]
+            if battle_id is None:
+                continue
+
+        entry = {
+            "tx_id": tx["id"],
+            "agent_addr": tx["signer"].lower(),
+            "avatar_addr": action_json.avatar_addr.lower(),
+            "count_base": action_json.count_base,
+        }
+        if action_json.stageId is not None:
+            entry["stage_id"] = action_json.stageId
+        yield action_json.type_id, entry, battle_id
+
+
+def legacy_world_clear_actions(tx_data, tx_result_list):
+    """Parsing of world clear tracker before decoder."""
+    for tx, action_json in iter_legacy_actions(tx_data, tx_result_list, ActionJson):
+        yield action_json.type_id, {
+            "tx_id": tx["id"],
+            "agent_addr": tx["signer"].lower(),
+            "avatar_addr": action_json.avatar_addr.lower(),
+            "world_id": action_json.worldId,
+            "stage_id": action_json.stageId,
+        }
+
+
+def legacy_adv_boss_actions(tx_data, tx_result_list):
+    """Parsing of adventure boss tracker before decoder."""
+    for tx, action_json in iter_legacy_actions(
+        tx_data, tx_result_list, AdventureBossActionJson
+    ):
+        yield action_json.type_id, {
+            "tx_id": tx["id"],
+            "season_index": action_json.season_index,
+            "agent_addr": tx["signer"].lower(),
+            "avatar_addr": action_json.avatar_addr.lower(),
+            "count_base": action_json.count_base,
+        }
+
+
+@pytest.fixture
+def battle_tokens(monkeypatch):
+    monkeypatch.setattr(
+        courage_tracker, "validate_battle_tokens", validate_battle_tokens
+    )
+
+
+@pytest.mark.usefixtures("battle_tokens")
+def test_courage_actions():
+    block = make_block(
+        ("SUCCESS", [HACK_AND_SLASH, RANDOM_BUFF]),
+        ("SUCCESS", [HACK_AND_SLASH_SWEEP]),
+        ("SUCCESS", [BATTLE]),
+        ("SUCCESS", [OTHER_ARENA_BATTLE]),
+        ("SUCCESS", [INVALID_BATTLE]),
+        ("SUCCESS", [RAID, RAID_REWARD]),
+        ("SUCCESS", [EVENT_DUNGEON]),
+        ("SUCCESS", [EVENT_DUNGEON_SWEEP]),
+        ("FAILURE", [HACK_AND_SLASH]),
+    )
+    result = list(parse_courage_actions(*block))
+    assert result == list(legacy_courage_actions(*block))
+    assert [x[0] for x in result] == [
+        "hack_and_slash22",
+        "hack_and_slash_sweep10",
+        "battle",
+        "raid7",
+        "event_dungeon_battle6",
+        "event_dungeon_battle_sweep",
+    ]
+
+
+def test_world_clear_actions():
+    block = make_block(
+        ("SUCCESS", [HACK_AND_SLASH]),
+        ("SUCCESS", [HACK_AND_SLASH_SWEEP]),
+        ("FAILURE", [HACK_AND_SLASH]),
+    )
+    result = list(parse_world_clear_actions(*block))
+    assert result == list(legacy_world_clear_actions(*block))
+    assert len(result) == 2
+
+
+def test_adv_boss_actions():
+    block = make_block(
+        ("SUCCESS", [WANTED]),
+        ("SUCCESS", [EXPLORE_ADVENTURE_BOSS]),
+        ("SUCCESS", [SWEEP_ADVENTURE_BOSS, WANTED]),
+        ("FAILURE", [WANTED]),
+    )
+    result = list(parse_adv_boss_actions(*block))
+    assert result == list(legacy_adv_boss_actions(*block))
+    assert [x[1]["count_base"] for x in result] == [5, 0, 0, 5]
+
+
+def test_event_dungeon_sweep_avatar():
+    """스윕은 이벤트 던전 전투와 다른 필드에서 아바타 주소를 읽음"""
+    for values in (
+        {"a": AVATAR_ADDR},
+        {"avatarAddress": AVATAR_ADDR},
+        {"l": [AVATAR_ADDR, 1001]},
+    ):
+        action = decode_action(
+            json.dumps({"type_id": "event_dungeon_battle_sweep", "values": values})
+        )
+        assert action.avatar_addr == AVATAR_ADDR.lower()
+        assert action.count_base == 1
+
+
+def test_untracked_actions():
+    block = make_block(("SUCCESS", [RAID_REWARD, ("transfer_asset5", {})]))
+    assert list(iter_success_actions(*block)) == []
@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.config import config
+from app.consumers.courage_consumer import consume_courage_message
+from app.trackers import courage_tracker
+from app.utils import lease
+from app.utils.lease import LeaseLostError, LeaseManager, acquire_lease, check_lease
+from shared.enums import PassType, PlanetID
+from shared.models.action import Block, TrackerLease
+from shared.models.season_pass import SeasonPass
+from shared.schemas.message import TrackerMessage
+from sqlalchemy import select, text, update
+from sqlalchemy.exc import OperationalError
+
+from tests.conftest import TestingSessionLocal
+
+PLANET_ID = PlanetID.ODIN.decode()
+PASS_TYPE = PassType.COURAGE_PASS
+
+
+@pytest.fixture
+def lease_manager(test_session, monkeypatch):
+    manager = LeaseManager([(PLANET_ID, PASS_TYPE)], ttl=15, renew_interval=5)
+    monkeypatch.setattr(lease, "lease_manager", manager)
+    manager.renew()
+    assert manager.owns(PLANET_ID, PASS_TYPE)
+    return manager
+
+
+def _expire_lease(sess):
+    sess.execute(
+        update(TrackerLease).values(
+            expires_at=datetime.now(tz=timezone.utc) - timedelta(seconds=1)
+        )
+    )
+    sess.commit()
+
+
+def test_check_lease_disabled(test_session):
+    """리스를 사용하지 않으면 확인하지 않음"""
+    check_lease(test_session, PLANET_ID, PASS_TYPE)
+
+
+def test_check_lease(test_session, lease_manager):
+    check_lease(test_session, PLANET_ID, PASS_TYPE)
+    test_session.rollback()
+
+    # 다른 커서의 리스는 없음
+    with pytest.raises(LeaseLostError):
+        check_lease(test_session, PlanetID.HEIMDALL.decode(), PASS_TYPE)
+    test_session.rollback()
+
+    # 만료된 리스
+    _expire_lease(test_session)
+    with pytest.raises(LeaseLostError):
+        check_lease(test_session, PLANET_ID, PASS_TYPE)
+    test_session.rollback()
+
+    # 다른 레플리카가 가져간 리스
+    assert acquire_lease(test_session, "other", (PLANET_ID, PASS_TYPE), 15)
+    test_session.commit()
+    with pytest.raises(LeaseLostError):
+        check_lease(test_session, PLANET_ID, PASS_TYPE)
+
+
+def test_check_lease_blocks_takeover(test_session, lease_manager):
+    """확인한 트랜잭션이 끝날 때까지 다른 레플리카가 리스를 가져갈 수 없음"""
+    check_lease(test_session, PLANET_ID, PASS_TYPE)
+
+    other_sess = TestingSessionLocal()
+    try:
+        other_sess.execute(text("SET lock_timeout = '200ms'"))
+        with pytest.raises(OperationalError):
+            acquire_lease(other_sess, "other", (PLANET_ID, PASS_TYPE), 15)
+        other_sess.rollback()
+
+        test_session.commit()
+        _expire_lease(test_session)
+        assert acquire_lease(other_sess, "other", (PLANET_ID, PASS_TYPE), 15)
+        other_sess.commit()
+    finally:
+        other_sess.close()
+
+
+def test_consumer_abort_without_lease(test_session, lease_manager):
+    """리스를 잃으면 블록을 적용하지 않고 중단"""
+    block = Block(planet_id=PlanetID.ODIN, pass_type=PASS_TYPE, last_processed_index=99)
+    test_session.add(block)
+    test_session.commit()
+    message = TrackerMessage(planet_id=PLANET_ID, block=100, action_data={})
+
+    _expire_lease(test_session)
+    with pytest.raises(LeaseLostError):
+        consume_courage_message(message)
+    with pytest.raises(LeaseLostError):
+        consume_courage_message(message, ledger_start=100)
+
+    assert test_session.scalar(select(Block.last_processed_index)) == 99
+
+
+def test_tracker_leaves_cursor_to_consumer(test_session, lease_manager, monkeypatch):
+    """커서는 리스를 확인한 컨슈머만 옮기고, 트래커가 덮어쓰지 않음"""
+    now = datetime.now(tz=timezone.utc)
+    test_session.add(
+        SeasonPass(
+            pass_type=PASS_TYPE,
+            season_index=1,
+            start_timestamp=now - timedelta(days=1),
+            end_timestamp=now + timedelta(days=1),
+            instant_exp=0,
+            reward_list=[],
+        )
+    )
+    test_session.add(
+        Block(planet_id=PlanetID.ODIN, pass_type=PASS_TYPE, last_processed_index=99)
+    )
+    test_session.commit()
+    monkeypatch.setattr(config, "gql_url_map", {PLANET_ID: "http://localhost:1"})
+    monkeypatch.setattr(config, "enabled_planets", [PLANET_ID])
+    monkeypatch.setattr(config, "catchup_workers", 0)
+    monkeypatch.setattr(courage_tracker, "get_tip", lambda rpc: 110)
+    monkeypatch.setattr(
+        courage_tracker,
+        "fetch_courage_message",
+        lambda planet_id, rpc, block_index: TrackerMessage(
+            planet_id=planet_id, block=block_index, action_data={}
+        ),
+    )
+    apply_courage_message = courage_tracker.apply_courage_message
+
+    def apply_and_hand_over(message):
+        apply_courage_message(message)
+        # 블록 100 적용 직후 다른 레플리카가 리스를 가져가 105까지 적용
+        _expire_lease(test_session)
+        assert acquire_lease(test_session, "other", (PLANET_ID, PASS_TYPE), 15)
+        test_session.execute(update(Block).values(last_processed_index=105))
+        test_session.commit()
+
+    monkeypatch.setattr(courage_tracker, "apply_courage_message", apply_and_hand_over)
+    assert courage_tracker.track_missing_blocks() == {PLANET_ID: (110, 100)}
+    assert test_session.scalar(select(Block.last_processed_index)) == 105
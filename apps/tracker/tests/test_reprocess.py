@@ -0,0 +1,237 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app import reprocess
+from app.reprocess import apply_diff, build_history, load_counted_battles, load_history
+from shared.enums import ActionType, PassType, PlanetID
+from shared.models.action import ActionHistory, AvatarExpDaily
+from shared.models.arena import BattleHistory, BattleHistoryWatermark
+from shared.models.season_pass import Exp, Level, SeasonPass
+from shared.models.user import UserSeasonPass
+from sqlalchemy import select
+
+AGENT_A = "0xagent_a"
+AVATAR_A = "0xavatar_a"
+AGENT_B = "0xagent_b"
+AVATAR_B = "0xavatar_b"
+START, END = 100, 103
+APPLIED_AT = datetime(2026, 1, 10, 12, tzinfo=timezone.utc)
+
+
+def entry(tx_id, agent_addr, avatar_addr, count_base):
+    return {
+        "tx_id": tx_id,
+        "agent_addr": agent_addr,
+        "avatar_addr": avatar_addr,
+        "count_base": count_base,
+    }
+
+
+# block_index -> [(type_id, entry, battle_id)] returned by the stand-in parser
+BLOCKS = {
+    100: [
+        ("hack_and_slash22", entry("tx1", AGENT_A, AVATAR_A, 2), None),
+        ("battle", entry("tx2", AGENT_A, AVATAR_A, 1), 7),
+    ],
+    101: [
+        # Battle 7 submitted again in the range
+        ("battle", entry("tx3", AGENT_B, AVATAR_B, 1), 7),
+        # Battle 3 counted before the range, submitted again
+        ("battle", entry("tx4", AGENT_B, AVATAR_B, 1), 3),
+    ],
+    # 20 AP used with stake coefficient 50% at the block and stage cost 5: 8 plays
+    102: [("hack_and_slash_sweep10", entry("tx5", AGENT_A, AVATAR_A, 20), None)],
+}
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    """Parse actions from `BLOCKS` and give stake coefficient without headless."""
+    monkeypatch.setattr(
+        reprocess,
+        "parse_courage_actions",
+        lambda tx_data, tx_result_list: iter([(t, dict(e), b) for t, e, b in tx_data]),
+    )
+    monkeypatch.setattr(reprocess, "load_ap_coef", lambda planet_id: None)
+    stake_calls = []
+
+    def get_stake_coef(planet_id, agent_addr, block_index=None):
+        stake_calls.append((agent_addr, block_index))
+        return 50
+
+    monkeypatch.setattr(reprocess, "get_stake_coef", get_stake_coef)
+    return stake_calls
+
+
+@pytest.fixture
+def season(test_session):
+    season = SeasonPass(
+        id=1,
+        pass_type=PassType.COURAGE_PASS,
+        season_index=1,
+        start_timestamp=APPLIED_AT - timedelta(days=10),
+        end_timestamp=APPLIED_AT + timedelta(days=10),
+        instant_exp=0,
+        reward_list=[],
+    )
+    test_session.add(season)
+    test_session.add_all(
+        [
+            Exp(season_pass_id=1, action_type=ActionType.HAS, exp=10),
+            Exp(season_pass_id=1, action_type=ActionType.ARENA, exp=20),
+            Exp(season_pass_id=1, action_type=ActionType.SWEEP, exp=5),
+        ]
+        + [
+            Level(pass_type=PassType.COURAGE_PASS, level=lvl, exp=lvl * 30)
+            for lvl in range(1, 6)
+        ]
+    )
+    test_session.commit()
+    return season
+
+
+@pytest.fixture
+def saved(test_session, season):
+    """
+    State left by live tracker: battle 3 counted before the range and sweep of
+    block 102 counted with latest stake coefficient 100% (4 plays).
+    """
+    test_session.add_all(
+        [BattleHistory(planet_id=PlanetID.ODIN, battle_id=x) for x in (3, 7)]
+    )
+    for block_index, tx_id, agent_addr, avatar_addr, action, count, exp in [
+        (100, "tx1", AGENT_A, AVATAR_A, ActionType.HAS, 2, 20),
+        (100, "tx2", AGENT_A, AVATAR_A, ActionType.ARENA, 1, 20),
+        (102, "tx5", AGENT_A, AVATAR_A, ActionType.SWEEP, 4, 20),
+    ]:
+        test_session.add(
+            ActionHistory(
+                planet_id=PlanetID.ODIN,
+                season_id=season.id,
+                block_index=block_index,
+                tx_id=tx_id,
+                agent_addr=agent_addr,
+                avatar_addr=avatar_addr,
+                action=action,
+                count=count,
+                exp=exp,
+                created_at=APPLIED_AT + timedelta(seconds=block_index),
+            )
+        )
+    test_session.add(
+        UserSeasonPass(
+            planet_id=PlanetID.ODIN,
+            season_pass_id=season.id,
+            agent_addr=AGENT_A,
+            avatar_addr=AVATAR_A,
+            level=2,
+            exp=60,
+        )
+    )
+    test_session.commit()
+
+
+def _reprocess(sess, season):
+    level_dict = {x.level: x.exp for x in sess.scalars(select(Level))}
+    existing = load_history(sess, PlanetID.ODIN, season, START, END)
+    expected = build_history(
+        sess,
+        PlanetID.ODIN,
+        season,
+        {k: (v, []) for k, v in BLOCKS.items()},
+        set(),
+        existing,
+    )
+    return apply_diff(sess, PlanetID.ODIN, season, level_dict, expected, existing)
+
+
+def _histories(sess):
+    return sorted(
+        (x.block_index, x.tx_id, x.action, x.count, x.exp)
+        for x in sess.scalars(select(ActionHistory))
+    )
+
+
+def _user_exp(sess):
+    return {
+        x.avatar_addr: (x.exp, x.level) for x in sess.scalars(select(UserSeasonPass))
+    }
+
+
+@pytest.mark.usefixtures("saved")
+def test_build_history(test_session, season, stand_in):
+    """이미 센 배틀은 다시 세지 않고, 스윕은 블록 시점 스테이킹으로 계산"""
+    existing = load_history(test_session, PlanetID.ODIN, season, START, END)
+    expected = build_history(
+        test_session,
+        PlanetID.ODIN,
+        season,
+        {k: (v, []) for k, v in BLOCKS.items()},
+        set(),
+        existing,
+    )
+    assert sorted(
+        (key, x["count"], x["exp"]) for key, value in expected.items() for x in value
+    ) == [
+        ((100, "tx1", AVATAR_A, ActionType.HAS), 2, 20),
+        ((100, "tx2", AVATAR_A, ActionType.ARENA), 1, 20),
+        ((102, "tx5", AVATAR_A, ActionType.SWEEP), 8, 40),
+    ]
+    assert stand_in == [(AGENT_A, 102)]
+
+
+def test_load_counted_battles(test_session, season):
+    test_session.add(BattleHistory(planet_id=PlanetID.ODIN, battle_id=50))
+    test_session.add(BattleHistoryWatermark(planet_id=PlanetID.ODIN, pruned_below=10))
+    test_session.commit()
+
+    assert load_counted_battles(test_session, PlanetID.ODIN, [3, 10, 50, 60]) == {3, 50}
+    assert load_counted_battles(test_session, PlanetID.HEIMDALL, [3, 50]) == set()
+    assert load_counted_battles(test_session, PlanetID.ODIN, []) == set()
+
+
+@pytest.mark.usefixtures("saved", "stand_in")
+def test_dry_run(test_session, season):
+    """롤백하면 아무것도 바뀌지 않음"""
+    before = _histories(test_session)
+    result = _reprocess(test_session, season)
+    test_session.rollback()
+
+    assert (result.inserted, result.deleted) == (1, 1)
+    assert result.exp_delta == {AVATAR_A: 20}
+    assert _histories(test_session) == before
+    assert _user_exp(test_session) == {AVATAR_A: (60, 2)}
+
+
+@pytest.mark.usefixtures("saved", "stand_in")
+def test_apply(test_session, season):
+    result = _reprocess(test_session, season)
+    test_session.commit()
+
+    assert (result.inserted, result.deleted) == (1, 1)
+    assert _histories(test_session) == [
+        (100, "tx1", ActionType.HAS, 2, 20),
+        (100, "tx2", ActionType.ARENA, 1, 20),
+        (102, "tx5", ActionType.SWEEP, 8, 40),
+    ]
+    assert _user_exp(test_session) == {AVATAR_A: (80, 2)}
+
+    # 교체한 기록은 원래 적용된 시각을 유지
+    sweep = test_session.scalar(
+        select(ActionHistory).where(ActionHistory.action == ActionType.SWEEP)
+    )
+    assert sweep.created_at == APPLIED_AT + timedelta(seconds=102)
+    daily = test_session.scalars(
+        select(AvatarExpDaily).order_by(AvatarExpDaily.avatar_addr)
+    ).all()
+    assert [(x.avatar_addr, x.date, x.exp, x.action_count) for x in daily] == [
+        (AVATAR_A, APPLIED_AT.date(), 80, 3)
+    ]
+
+    # 다시 적용해도 바뀌지 않음
+    result = _reprocess(test_session, season)
+    test_session.commit()
+    assert (result.inserted, result.deleted) == (0, 0)
+    assert not result.exp_delta
+    assert _user_exp(test_session) == {AVATAR_A: (80, 2)}
+    assert sweep.created_at == APPLIED_AT + timedelta(seconds=102)
@@ -0,0 +1,59 @@
+import pytest
+from app.utils.scheduler import AdaptiveScheduler
+
+PLANET_ID = "0x000000000000"
+
+
+@pytest.fixture
+def scheduler():
+    return AdaptiveScheduler(
+        interval=8, min_batch=100, max_batch=1000, min_delay=0.5, max_delay=60
+    )
+
+
+def test_catch_up(scheduler):
+    """뒤처진 동안 진행되면 바로 다음 주기 시작, 배치는 지연에 비례"""
+    assert scheduler.update({PLANET_ID: (100_000, 50_000)}, now=0) == 0
+    assert scheduler.batch_size == 1000
+    assert scheduler.update({PLANET_ID: (100_000, 51_000)}, now=1) == 0
+    assert scheduler.update({PLANET_ID: (100_000, 98_500)}, now=2) == 0
+    assert scheduler.batch_size == 149
+    assert scheduler.update({PLANET_ID: (100_000, 99_900)}, now=3) == 0
+    assert scheduler.batch_size == 100
+
+
+def test_at_tip(scheduler):
+    """팁에서는 관측한 블록 간격만큼 대기하고, 블록이 늦으면 점점 느리게 확인"""
+    # 블록 간격을 모를 때는 기본 주기
+    assert scheduler.update({PLANET_ID: (100, 99)}, now=0) == 8
+    assert scheduler.update({PLANET_ID: (102, 101)}, now=10) == 5
+    assert scheduler.update({PLANET_ID: (102, 101)}, now=15) == 0.5
+    assert scheduler.update({PLANET_ID: (102, 101)}, now=15.5) == 1
+    assert scheduler.update({PLANET_ID: (102, 101)}, now=16.5) == 2
+    # 새 블록이 보이면 다시 간격만큼 대기
+    assert scheduler.update({PLANET_ID: (103, 102)}, now=17) == pytest.approx(5.4)
+
+
+def test_stalled(scheduler):
+    """뒤처졌지만 진행되지 않으면 기본 주기까지 지수적으로 대기"""
+    assert scheduler.update({PLANET_ID: (1000, 500)}, now=0) == 0
+    delays = [
+        scheduler.update({PLANET_ID: (1000 + x, 500)}, now=x + 1) for x in range(6)
+    ]
+    assert delays == [0.5, 1, 2, 4, 8, 8]
+
+    # 다시 진행되면 바로 다음 주기 시작
+    assert scheduler.update({PLANET_ID: (1010, 501)}, now=10) == 0
+    assert scheduler.update({PLANET_ID: (1010, 501)}, now=11) == 0.5
+
+
+def test_stalled_planet_with_other_at_tip(scheduler):
+    """다른 행성이 팁에 있어도 뒤처진 행성이 진행되지 않으면 대기"""
+    other = "0x000000000001"
+    assert scheduler.update({PLANET_ID: (1000, 500), other: (50, 49)}, now=0) == 0
+    assert scheduler.update({PLANET_ID: (1000, 500), other: (51, 50)}, now=1) == 0.5
+
+
+def test_no_progress(scheduler):
+    assert scheduler.update(None) == 8
+    assert scheduler.update({}) == 8
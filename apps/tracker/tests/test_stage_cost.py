@@ -0,0 +1,35 @@
+from types import MappingProxyType
+
+import pytest
+from app.utils import stage_cost
+from app.utils.stage_cost import (
+    DEFAULT_COST_AP,
+    StageSheet,
+    StageSheetNotLoadedError,
+    get_stage_cost_ap,
+)
+from shared.enums import PlanetID
+
+
+@pytest.fixture
+def odin_sheet(monkeypatch):
+    monkeypatch.setattr(
+        stage_cost,
+        "_snapshot",
+        MappingProxyType(
+            {"0x000000000000": StageSheet(etag=None, cost_ap={1: 3, 300: 15})}
+        ),
+    )
+
+
+@pytest.mark.usefixtures("odin_sheet")
+def test_get_stage_cost_ap():
+    assert get_stage_cost_ap(PlanetID.ODIN, 300) == 15
+    assert get_stage_cost_ap(PlanetID.ODIN, 2) == DEFAULT_COST_AP
+    assert get_stage_cost_ap(PlanetID.ODIN, None) == DEFAULT_COST_AP
+
+
+@pytest.mark.usefixtures("odin_sheet")
+def test_get_stage_cost_ap_not_loaded():
+    with pytest.raises(StageSheetNotLoadedError):
+        get_stage_cost_ap(PlanetID.HEIMDALL, 300)
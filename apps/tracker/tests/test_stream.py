@@ -0,0 +1,110 @@
+import pytest
+from app.config import config
+from app.utils import stream
+from app.utils.stream import apply_blocks, ingest_blocks, read_messages, stream_state
+from shared.enums import PassType, PlanetID
+from shared.models.action import Block
+from shared.schemas.message import TrackerMessage
+
+PLANET_ID = PlanetID.ODIN.decode()
+PASS_TYPE = PassType.COURAGE_PASS
+
+
+@pytest.fixture
+def stream_config(monkeypatch):
+    monkeypatch.setattr(config, "gql_url_map", {PLANET_ID: "http://localhost:1"})
+    monkeypatch.setattr(config, "enabled_planets", [PLANET_ID])
+    monkeypatch.setattr(config, "stream_max_depth", 8)
+    monkeypatch.setattr(config, "stream_ingest_blocks", 5)
+    monkeypatch.setattr(config, "stream_apply_blocks", 4)
+    monkeypatch.setattr(stream, "get_tip", lambda rpc: 120)
+
+
+@pytest.fixture
+def cursor(test_session):
+    block = Block(planet_id=PlanetID.ODIN, pass_type=PASS_TYPE, last_processed_index=99)
+    test_session.add(block)
+    test_session.commit()
+    return block
+
+
+def fetch_message(planet_id: str, rpc, block_index: int) -> TrackerMessage:
+    # 액션 타입 순서가 유지되는지 확인하기 위해 정렬되지 않은 키 사용
+    return TrackerMessage(
+        planet_id=planet_id,
+        block=block_index,
+        action_data={"raid": [], "battle": [{"block": block_index}]},
+    )
+
+
+def _stream_blocks(sess):
+    return [x.block for x in read_messages(sess, PLANET_ID, PASS_TYPE, limit=100)]
+
+
+@pytest.mark.usefixtures("stream_config", "cursor")
+def test_ingest_blocks(test_session):
+    """커서 다음 블록부터 순서대로 쌓고, 최대 깊이에서 멈춤"""
+    ingest_blocks(PASS_TYPE, fetch_message)
+    assert _stream_blocks(test_session) == [100, 101, 102, 103, 104]
+
+    ingest_blocks(PASS_TYPE, fetch_message)
+    assert _stream_blocks(test_session) == list(range(100, 108))
+    assert stream_state(test_session, PLANET_ID, PASS_TYPE) == (8, 107)
+
+    # 가득 차면 더 가져오지 않음
+    ingest_blocks(PASS_TYPE, fetch_message)
+    assert _stream_blocks(test_session) == list(range(100, 108))
+
+    message = read_messages(test_session, PLANET_ID, PASS_TYPE, limit=1)[0]
+    assert list(message.action_data) == ["raid", "battle"]
+
+
+@pytest.mark.usefixtures("stream_config", "cursor")
+def test_ingest_blocks_until_tip(test_session, monkeypatch):
+    monkeypatch.setattr(stream, "get_tip", lambda rpc: 102)
+    ingest_blocks(PASS_TYPE, fetch_message)
+    ingest_blocks(PASS_TYPE, fetch_message)
+    assert _stream_blocks(test_session) == [100, 101]
+
+
+@pytest.mark.usefixtures("stream_config")
+def test_apply_blocks(test_session, cursor):
+    """블록 순서대로 적용하고 적용한 메시지는 삭제"""
+    ingest_blocks(PASS_TYPE, fetch_message)
+    applied = []
+
+    def consume(message: TrackerMessage):
+        applied.append(message.block)
+
+    apply_blocks(PASS_TYPE, consume)
+    assert applied == [100, 101, 102, 103]
+    assert _stream_blocks(test_session) == [104]
+
+    # 적용 후 새로 쌓인 블록은 커서가 아닌 마지막으로 쌓은 블록 다음부터
+    ingest_blocks(PASS_TYPE, fetch_message)
+    apply_blocks(PASS_TYPE, consume)
+    apply_blocks(PASS_TYPE, consume)
+    assert applied == list(range(100, 110))
+    assert _stream_blocks(test_session) == []
+
+
+@pytest.mark.usefixtures("stream_config", "cursor")
+def test_apply_blocks_stop_at_failure(test_session):
+    """실패한 블록에서 멈추고 다음 주기에 같은 블록부터 재시도"""
+    ingest_blocks(PASS_TYPE, fetch_message)
+    applied = []
+    fail = {102}
+
+    def consume(message: TrackerMessage):
+        if message.block in fail:
+            fail.remove(message.block)
+            raise RuntimeError("DB error")
+        applied.append(message.block)
+
+    apply_blocks(PASS_TYPE, consume)
+    assert applied == [100, 101]
+    assert _stream_blocks(test_session) == [102, 103, 104]
+
+    apply_blocks(PASS_TYPE, consume)
+    assert applied == [100, 101, 102, 103, 104]
+    assert _stream_blocks(test_session) == []
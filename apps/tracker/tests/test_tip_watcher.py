@@ -0,0 +1,162 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from app.config import config
+from app.utils import tip_watcher
+from app.utils.tip_watcher import TipWatcher, get_tip, ws_url
+from shared.utils.rpc_pool import RPCPool
+from websockets.asyncio.server import serve
+
+CLOSE = object()
+
+
+class TipServer:
+    """`tipChanged` subscription stand-in speaking Apollo `graphql-ws` protocol."""
+
+    def __init__(self):
+        self._tips: "asyncio.Queue" = asyncio.Queue()
+        self.connections = 0
+        self.url = None
+        self._ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait(5)
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._serve())
+
+    async def _serve(self):
+        async with serve(
+            self._handle, "127.0.0.1", 0, subprotocols=["graphql-ws"]
+        ) as s:
+            port = s.sockets[0].getsockname()[1]
+            self.url = f"http://127.0.0.1:{port}/graphql"
+            self._ready.set()
+            await asyncio.Future()
+
+    def push(self, tip):
+        """Send `tip` to subscriber, or close connection with `CLOSE`."""
+        self._loop.call_soon_threadsafe(self._tips.put_nowait, tip)
+
+    async def _handle(self, ws):
+        self.connections += 1
+        assert json.loads(await ws.recv())["type"] == "connection_init"
+        await ws.send(json.dumps({"type": "connection_ack"}))
+        start = json.loads(await ws.recv())
+        assert start["type"] == "start"
+        while True:
+            tip = await self._tips.get()
+            if tip is CLOSE:
+                await ws.close()
+                return
+            await ws.send(
+                json.dumps(
+                    {
+                        "type": "data",
+                        "id": start["id"],
+                        "payload": {"data": {"tipChanged": {"index": tip}}},
+                    }
+                )
+            )
+
+
+def wait_until(predicate, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def watchers(monkeypatch):
+    watcher_dict = {}
+    monkeypatch.setattr(tip_watcher, "_watchers", watcher_dict)
+    yield watcher_dict
+    for watcher in watcher_dict.values():
+        watcher.stop()
+
+
+@pytest.fixture
+def polled(monkeypatch):
+    """URLs `nodeStatus` is polled from. Polled tip is 500."""
+    url_list = []
+
+    def get_block_tip(url, jwt_secret):
+        url_list.append(url)
+        return 500
+
+    monkeypatch.setattr(tip_watcher, "get_block_tip", get_block_tip)
+    return url_list
+
+
+def test_ws_url():
+    assert ws_url("https://odin-rpc.nine-chronicles.com/graphql") == (
+        "wss://odin-rpc.nine-chronicles.com/graphql"
+    )
+    assert ws_url("http://localhost/graphql") == "ws://localhost/graphql"
+
+
+def test_get_tip_without_watcher(watchers, polled):
+    rpc = RPCPool(["http://a/graphql", "http://b/graphql"])
+    assert get_tip(rpc) == 500
+    assert sorted(polled) == ["http://a/graphql", "http://b/graphql"]
+
+
+def test_get_tip_from_subscription(watchers, polled):
+    server = TipServer()
+    rpc = RPCPool([server.url])
+    watcher = watchers[server.url] = TipWatcher(rpc, server.url)
+    watcher.start()
+
+    server.push(100)
+    server.push(101)
+    wait_until(lambda: watcher.tip == 101)
+    assert get_tip(rpc) == 101
+    assert polled == []
+
+    # 구독이 끊기면 폴링으로 대체하고, 다시 연결되면 구독 사용
+    server.push(CLOSE)
+    wait_until(lambda: watcher.tip is None)
+    assert get_tip(rpc) == 500
+    assert polled == [server.url]
+
+    wait_until(lambda: server.connections == 2)
+    server.push(501)
+    wait_until(lambda: watcher.tip == 501)
+    assert get_tip(rpc) == 501
+    assert polled == [server.url]
+
+
+def test_get_tip_stale_subscription(watchers, polled, monkeypatch):
+    server = TipServer()
+    rpc = RPCPool([server.url])
+    watcher = watchers[server.url] = TipWatcher(rpc, server.url)
+    watcher.start()
+    server.push(100)
+    wait_until(lambda: watcher.tip == 100)
+
+    # 오래 전에 받은 팁은 사용하지 않음
+    monkeypatch.setattr(
+        watcher, "_received_at", time.monotonic() - config.tip_stale_seconds - 1
+    )
+    assert watcher.tip is None
+    assert get_tip(rpc) == 500
+    assert polled == [server.url]
+
+
+def test_get_tip_partial_subscription(watchers, polled):
+    """풀의 엔드포인트 중 하나라도 구독이 없으면 폴링"""
+    server = TipServer()
+    other_url = "http://other/graphql"
+    rpc = RPCPool([server.url, other_url])
+    watcher = watchers[server.url] = TipWatcher(rpc, server.url)
+    watcher.start()
+    server.push(100)
+    wait_until(lambda: watcher.tip == 100)
+
+    assert get_tip(rpc) == 500
+    assert sorted(polled) == sorted([server.url, other_url])
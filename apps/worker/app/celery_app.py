@@ -45,6 +45,21 @@ app.conf.update(
             "schedule": 300.0,
             "options": {"queue": "claim_queue"},
         },
+        "manage-action-history-partition-every-day": {
+            "task": "season_pass.manage_action_history_partition",
+            "schedule": 86400.0,
+            "options": {"queue": "claim_queue"},
+        },
+        "prune-battle-history-every-day": {
+            "task": "season_pass.prune_battle_history",
+            "schedule": 86400.0,
+            "options": {"queue": "claim_queue"},
+        },
+        "refresh-cleared-stage": {
+            "task": "season_pass.process_stage_refresh",
+            "schedule": config.stage_refresh_interval,
+            "options": {"queue": "claim_queue"},
+        },
     },
 )
 
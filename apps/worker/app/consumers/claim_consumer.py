@@ -29,7 +29,11 @@ def consume_claim_message(message: ClaimMessage):
 
     sess = scoped_session(sessionmaker(bind=engine))
     account = Account(config.kms_key_id, config.region_name)
-    gql = GQLClient(config.converted_gql_url_map, config.headless_jwt_secret)
+    gql = GQLClient(
+        config.converted_gql_url_map,
+        config.headless_jwt_secret,
+        stage_broadcast=config.stage_broadcast,
+    )
 
     try:
         claim_dict = {
@@ -1,11 +1,17 @@
 # Import tasks here for autodiscovery
+from app.tasks.battle_history_task import prune_battle_history_task
 from app.tasks.burn_asset_task import process_burn_asset
 from app.tasks.claim_task import process_claim, process_retry_claim
+from app.tasks.partition_task import manage_action_history_partition
+from app.tasks.stage_refresh_task import process_stage_refresh
 from app.tasks.stage_task import process_retry_stage
 
 __all__ = [
     "process_claim",
     "process_retry_claim",
     "process_retry_stage",
+    "process_stage_refresh",
     "process_burn_asset",
+    "manage_action_history_partition",
+    "prune_battle_history_task",
 ]
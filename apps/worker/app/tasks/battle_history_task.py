@@ -0,0 +1,47 @@
+from typing import Any, Dict
+
+import structlog
+from app.celery_app import app
+from app.config import config
+from shared.utils.arena import prune_battle_history
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+logger = structlog.get_logger(__name__)
+engine = create_engine(str(config.pg_dsn), pool_size=5, max_overflow=5)
+
+
+@app.task(
+    name="season_pass.prune_battle_history",
+    bind=True,
+    acks_late=True,
+    queue="claim_queue",
+)
+def prune_battle_history_task(self, message: Dict[str, Any] = None):
+    """
+    Keep only latest `battle_history_keep` battles of each planet.
+    Older battles are covered by watermark of the planet.
+
+    Args:
+        self: 태스크 인스턴스 (bind=True로 인해 자동으로 전달됨)
+        message: send_to_worker에서 전달되는 메시지 (옵션)
+    """
+    if config.battle_history_keep is None:
+        return
+
+    sess = scoped_session(sessionmaker(bind=engine))
+    try:
+        for planet_id in config.converted_gql_url_map:
+            deleted = prune_battle_history(sess, planet_id, config.battle_history_keep)
+            sess.commit()
+            if deleted:
+                logger.info(
+                    "Old battle history pruned",
+                    planet_id=planet_id.decode(),
+                    deleted=deleted,
+                )
+    except Exception as e:
+        sess.rollback()
+        logger.error("Error pruning battle history", exc_info=e)
+    finally:
+        sess.close()
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+import structlog
+from app.celery_app import app
+from app.config import config
+from shared.models.season_pass import SeasonPass
+from shared.utils.partition import (
+    detach_action_history_partition,
+    ensure_action_history_partition,
+)
+from sqlalchemy import create_engine, or_, select
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+logger = structlog.get_logger(__name__)
+engine = create_engine(str(config.pg_dsn), pool_size=5, max_overflow=5)
+
+
+@app.task(
+    name="season_pass.manage_action_history_partition",
+    bind=True,
+    acks_late=True,
+    queue="claim_queue",
+)
+def manage_action_history_partition(self, message: Dict[str, Any] = None):
+    """
+    Keep one action_history partition per season.
+    Create partitions of ongoing and upcoming seasons and detach partitions of seasons finished long ago.
+
+    Args:
+        self: 태스크 인스턴스 (bind=True로 인해 자동으로 전달됨)
+        message: send_to_worker에서 전달되는 메시지 (옵션)
+    """
+    sess = scoped_session(sessionmaker(bind=engine))
+    now = datetime.now(tz=timezone.utc)
+
+    try:
+        for season_id in sess.scalars(
+            select(SeasonPass.id).where(
+                or_(SeasonPass.end_timestamp.is_(None), SeasonPass.end_timestamp >= now)
+            )
+        ):
+            if ensure_action_history_partition(sess, season_id):
+                logger.info("Action history partition created", season_id=season_id)
+            sess.commit()
+
+        if config.action_history_retention_days is None:
+            return
+
+        for season_id in sess.scalars(
+            select(SeasonPass.id).where(
+                SeasonPass.end_timestamp
+                < now - timedelta(days=config.action_history_retention_days)
+            )
+        ):
+            if detach_action_history_partition(
+                sess, season_id, archive_schema=config.action_history_archive_schema
+            ):
+                logger.info("Action history partition detached", season_id=season_id)
+            sess.commit()
+    except Exception as e:
+        sess.rollback()
+        logger.error("Error managing action history partitions", exc_info=e)
+    finally:
+        sess.close()
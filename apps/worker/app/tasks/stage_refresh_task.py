@@ -0,0 +1,147 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import structlog
+from app.celery_app import app
+from app.config import config
+from shared.enums import PassType, PlanetID
+from shared.models.user import StageRefreshQueue, UserSeasonPass
+from shared.utils._graphql import GQLClient
+from shared.utils.season_pass import get_level
+from sqlalchemy import create_engine, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+logger = structlog.get_logger(__name__)
+engine = create_engine(str(config.pg_dsn), pool_size=5, max_overflow=5)
+
+
+def resolve_cleared_stage(gql: GQLClient, target: StageRefreshQueue) -> int:
+    _, cleared_stage = gql.get_last_cleared_stage(
+        PlanetID(target.planet_id),
+        target.avatar_addr,
+        timeout=config.stage_refresh_timeout,
+    )
+    return cleared_stage
+
+
+def claim_targets(sess) -> List[StageRefreshQueue]:
+    """
+    Claim a batch of queued avatars and commit.
+    Claimed rows are skipped by other workers until claim expires,
+    so headless is called without row locks or open transaction.
+    """
+    now = datetime.now(tz=timezone.utc)
+    # Rows being claimed by other worker are skipped, so workers can run concurrently.
+    id_query = (
+        select(StageRefreshQueue.id)
+        .where(
+            or_(
+                StageRefreshQueue.claimed_until.is_(None),
+                StageRefreshQueue.claimed_until < now,
+            )
+        )
+        .order_by(StageRefreshQueue.updated_at)
+        .limit(config.stage_refresh_batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    target_list = sess.scalars(
+        update(StageRefreshQueue)
+        .where(StageRefreshQueue.id.in_(id_query.scalar_subquery()))
+        .values(
+            claimed_until=now + timedelta(seconds=config.stage_refresh_claim_seconds)
+        )
+        .returning(StageRefreshQueue)
+        .execution_options(synchronize_session=False)
+    ).all()
+    sess.commit()
+    return target_list
+
+
+@app.task(
+    name="season_pass.process_stage_refresh",
+    bind=True,
+    acks_late=True,
+    queue="claim_queue",
+)
+def process_stage_refresh(self, message: Dict[str, Any] = None):
+    """
+    Fetch last cleared stage of queued avatars and save them as world clear pass status.
+
+    Args:
+        self: 태스크 인스턴스 (bind=True로 인해 자동으로 전달됨)
+        message: send_to_worker에서 전달되는 메시지 (옵션)
+    """
+    # Claimed rows are used after commit without reloading
+    sess = scoped_session(sessionmaker(bind=engine, expire_on_commit=False))
+    gql = GQLClient(config.converted_gql_url_map, config.headless_jwt_secret)
+
+    try:
+        target_list = claim_targets(sess)
+        if not target_list:
+            return
+
+        with ThreadPoolExecutor(max_workers=config.stage_refresh_concurrency) as pool:
+            futures = [
+                (target, pool.submit(resolve_cleared_stage, gql, target))
+                for target in target_list
+            ]
+
+        done = failed = 0
+        for target, future in futures:
+            try:
+                cleared_stage = future.result()
+            except Exception as e:
+                logger.warning(
+                    "Failed to get last cleared stage",
+                    avatar_addr=target.avatar_addr,
+                    retry_count=target.retry_count,
+                    exc_info=e,
+                )
+                if target.retry_count + 1 >= config.stage_refresh_max_retry:
+                    # Give up for now. Next status read of the avatar queues it again.
+                    sess.delete(target)
+                else:
+                    sess.execute(
+                        update(StageRefreshQueue)
+                        .where(StageRefreshQueue.id == target.id)
+                        .values(
+                            retry_count=StageRefreshQueue.retry_count + 1,
+                            claimed_until=None,
+                        )
+                    )
+                failed += 1
+                continue
+
+            level = get_level(sess, PassType.WORLD_CLEAR_PASS, cleared_stage)
+            stmt = insert(UserSeasonPass).values(
+                planet_id=target.planet_id,
+                agent_addr=target.agent_addr,
+                avatar_addr=target.avatar_addr,
+                season_pass_id=target.season_pass_id,
+                exp=cleared_stage,
+                level=level,
+            )
+            # Tracker can save newer stage while waiting in queue. Never go backward.
+            sess.execute(
+                stmt.on_conflict_do_update(
+                    constraint="user_season_pass_unique",
+                    set_={
+                        "exp": stmt.excluded.exp,
+                        "level": stmt.excluded.level,
+                        "updated_at": func.now(),
+                    },
+                    where=UserSeasonPass.exp < stmt.excluded.exp,
+                )
+            )
+            sess.delete(target)
+            done += 1
+
+        sess.commit()
+        logger.info("Stage refreshed", done=done, failed=failed)
+    except Exception as e:
+        sess.rollback()
+        logger.error("Error processing stage refresh", exc_info=e)
+    finally:
+        sess.close()
@@ -0,0 +1,35 @@
+# isort: skip_file
+import pytest
+
+from app.config import config
+
+# 모든 테이블이 metadata에 등록되도록 모델 import
+import shared.models.action  # noqa: F401
+import shared.models.arena  # noqa: F401
+import shared.models.season_pass  # noqa: F401
+import shared.models.user  # noqa: F401
+from shared.models.base import Base
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# 테스트 DB 설정: tests/test.env의 WORKER_PG_DSN
+engine = create_engine(config.pg_dsn)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="function")
+def test_db():
+    # 테스트 DB 생성
+    Base.metadata.create_all(bind=engine)
+    yield
+    # 테스트 DB 삭제
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def test_session(test_db):
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
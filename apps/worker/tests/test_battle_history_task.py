@@ -0,0 +1,58 @@
+import pytest
+from app.config import config
+from app.tasks.battle_history_task import prune_battle_history_task
+from shared.enums import PlanetID
+from shared.models.arena import BattleHistory, BattleHistoryWatermark
+from shared.utils.arena import get_battle_watermark
+from sqlalchemy import select
+
+
+@pytest.fixture
+def battles(test_session):
+    test_session.add_all(
+        [BattleHistory(planet_id=PlanetID.ODIN, battle_id=x) for x in range(1, 11)]
+        + [BattleHistory(planet_id=PlanetID.HEIMDALL, battle_id=x) for x in range(1, 3)]
+    )
+    test_session.commit()
+
+
+def _battle_ids(sess, planet_id: PlanetID):
+    return sess.scalars(
+        select(BattleHistory.battle_id)
+        .where(BattleHistory.planet_id == planet_id)
+        .order_by(BattleHistory.battle_id)
+    ).all()
+
+
+@pytest.mark.usefixtures("battles")
+def test_prune_battle_history_disabled(test_session):
+    """기본값에서는 배틀 기록을 삭제하지 않음"""
+    assert config.battle_history_keep is None
+    prune_battle_history_task()
+
+    assert _battle_ids(test_session, PlanetID.ODIN) == list(range(1, 11))
+    assert test_session.scalar(select(BattleHistoryWatermark)) is None
+
+
+@pytest.mark.usefixtures("battles")
+def test_prune_battle_history(test_session, monkeypatch):
+    """최근 배틀만 남기고 삭제한 배틀은 워터마크 아래로 처리"""
+    monkeypatch.setattr(config, "battle_history_keep", 3)
+    prune_battle_history_task()
+
+    assert _battle_ids(test_session, PlanetID.ODIN) == [8, 9, 10]
+    assert get_battle_watermark(test_session, PlanetID.ODIN) == 8
+    # 보관 개수보다 적은 행성은 그대로
+    assert _battle_ids(test_session, PlanetID.HEIMDALL) == [1, 2]
+    assert get_battle_watermark(test_session, PlanetID.HEIMDALL) == 0
+
+    # 워터마크는 내려가지 않음
+    monkeypatch.setattr(config, "battle_history_keep", 1)
+    prune_battle_history_task()
+    monkeypatch.setattr(config, "battle_history_keep", 2)
+    test_session.add(BattleHistory(planet_id=PlanetID.ODIN, battle_id=9))
+    test_session.commit()
+    prune_battle_history_task()
+    test_session.expire_all()
+    assert _battle_ids(test_session, PlanetID.ODIN) == [9, 10]
+    assert get_battle_watermark(test_session, PlanetID.ODIN) == 10
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from app.config import config
+from app.tasks.stage_refresh_task import process_stage_refresh
+from shared.enums import PassType, PlanetID
+from shared.models.season_pass import Level, SeasonPass
+from shared.models.user import StageRefreshQueue, UserSeasonPass
+from sqlalchemy import select, update
+
+from tests.conftest import TestingSessionLocal
+
+TEST_AGENT_ADDR = "0x1234567890abcdef"
+TEST_AVATAR_ADDR = "0x0987654321fedcba"
+
+
+@pytest.fixture
+def queued_avatar(test_session):
+    now = datetime.now(tz=timezone.utc)
+    test_session.add(
+        SeasonPass(
+            id=1,
+            pass_type=PassType.WORLD_CLEAR_PASS,
+            season_index=1,
+            start_timestamp=now - timedelta(days=1),
+            end_timestamp=now + timedelta(days=1),
+            instant_exp=0,
+            reward_list=[],
+        )
+    )
+    test_session.add_all(
+        [
+            Level(pass_type=PassType.WORLD_CLEAR_PASS, level=lvl, exp=lvl * 10)
+            for lvl in range(1, 6)
+        ]
+    )
+    test_session.add(
+        StageRefreshQueue(
+            planet_id=PlanetID.ODIN,
+            agent_addr=TEST_AGENT_ADDR,
+            avatar_addr=TEST_AVATAR_ADDR,
+            season_pass_id=1,
+        )
+    )
+    test_session.commit()
+
+
+def _queue(test_session):
+    test_session.expire_all()
+    return test_session.scalars(select(StageRefreshQueue)).all()
+
+
+@pytest.mark.usefixtures("queued_avatar")
+def test_process_stage_refresh(test_session):
+    """조회한 마지막 클리어 스테이지를 저장하고 대기열에서 삭제"""
+    with patch("app.tasks.stage_refresh_task.GQLClient") as mock_gql_class:
+        mock_gql_class.return_value.get_last_cleared_stage.return_value = (1, 35)
+        process_stage_refresh()
+
+    usp = test_session.scalar(select(UserSeasonPass))
+    assert usp.avatar_addr == TEST_AVATAR_ADDR
+    assert usp.exp == 35
+    assert usp.level == 3
+    assert _queue(test_session) == []
+
+
+@pytest.mark.usefixtures("queued_avatar")
+def test_process_stage_refresh_retry_exhausted(test_session):
+    """재시도 횟수를 모두 쓰면 대기열에서 삭제해 다음 상태 조회 때 다시 등록"""
+    with patch("app.tasks.stage_refresh_task.GQLClient") as mock_gql_class:
+        mock_gql_class.return_value.get_last_cleared_stage.side_effect = TimeoutError
+        for retry in range(1, config.stage_refresh_max_retry):
+            process_stage_refresh()
+            assert [x.retry_count for x in _queue(test_session)] == [retry]
+
+        process_stage_refresh()
+
+    assert _queue(test_session) == []
+    assert test_session.scalar(select(UserSeasonPass)) is None
+
+
+@pytest.mark.usefixtures("queued_avatar")
+def test_process_stage_refresh_without_lock(test_session):
+    """헤드리스 조회 중에는 행을 잠그지 않고, 다른 워커는 선점된 행을 건너뜀"""
+    claimed = []
+
+    def get_last_cleared_stage(planet_id, avatar_addr, timeout):
+        other_sess = TestingSessionLocal()
+        try:
+            target = other_sess.scalar(
+                select(StageRefreshQueue).with_for_update(nowait=True)
+            )
+            claimed.append(target.claimed_until)
+        finally:
+            other_sess.close()
+        # 다른 워커
+        process_stage_refresh()
+        return 1, 35
+
+    with patch("app.tasks.stage_refresh_task.GQLClient") as mock_gql_class:
+        mock_gql_class.return_value.get_last_cleared_stage.side_effect = (
+            get_last_cleared_stage
+        )
+        process_stage_refresh()
+
+    assert len(claimed) == 1 and claimed[0] is not None
+    assert test_session.scalar(select(UserSeasonPass)).exp == 35
+    assert _queue(test_session) == []
+
+
+@pytest.mark.usefixtures("queued_avatar")
+def test_process_stage_refresh_claim_expired(test_session):
+    """선점한 워커가 끝내지 못하면 선점 만료 후 다시 조회"""
+    now = datetime.now(tz=timezone.utc)
+    with patch("app.tasks.stage_refresh_task.GQLClient") as mock_gql_class:
+        mock_gql_class.return_value.get_last_cleared_stage.return_value = (1, 35)
+
+        test_session.execute(
+            update(StageRefreshQueue).values(claimed_until=now + timedelta(minutes=1))
+        )
+        test_session.commit()
+        process_stage_refresh()
+        assert len(_queue(test_session)) == 1
+
+        test_session.execute(
+            update(StageRefreshQueue).values(claimed_until=now - timedelta(seconds=1))
+        )
+        test_session.commit()
+        process_stage_refresh()
+
+    assert test_session.scalar(select(UserSeasonPass)).exp == 35
+    assert _queue(test_session) == []
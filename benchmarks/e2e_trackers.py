@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+"""
+End-to-end tracker benchmark: headless replay -> trackers -> consumers -> DB.
+
+Starts `headless_replay` for given block directory, runs courage, adventure boss and world clear
+trackers against it until they reach the tip, and reports blocks/sec and DB writes/sec as JSON.
+
+Target DB is dropped and recreated, so its name must end with `_bench`.
+Block directory may have `meta.json` with `arena_public_key` (base64 PEM) used to sign battles.
+
+    python benchmarks/e2e_trackers.py BLOCK_DIR --pg-dsn postgresql://.../season_pass_bench
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import structlog
+from headless_replay import ReplayServer
+
+TRACKER_PASS_TYPES = {
+    "CourageTracker": "CouragePass",
+    "AdventureBossTracker": "AdventureBossPass",
+    "WorldClearTracker": "WorldClearPass",
+}
+STALL_LIMIT = 3
+
+
+class WriteCounter:
+    """Counts rows written by INSERT/UPDATE/DELETE and commits of every engine in process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rows = 0
+        self.statements = 0
+        self.commits = 0
+
+    def after_cursor_execute(self, conn, cursor, statement, *args):
+        if statement.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE"):
+            with self.lock:
+                self.statements += 1
+                self.rows += max(cursor.rowcount, 0)
+
+    def commit(self, conn):
+        with self.lock:
+            self.commits += 1
+
+
+def setup_db(pg_dsn: str, planet_list, start: int):
+    from shared.enums import ActionType, PassType, PlanetID
+    from shared.models.action import Block
+    from shared.models.base import Base
+    from shared.models.season_pass import Exp, Level, SeasonPass
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    engine = create_engine(pg_dsn)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    now = datetime.now(tz=timezone.utc)
+    with Session(engine) as sess:
+        for i, pass_type in enumerate(PassType, start=1):
+            sess.add(
+                SeasonPass(
+                    id=i,
+                    pass_type=pass_type,
+                    season_index=1,
+                    start_timestamp=now - timedelta(days=1),
+                    end_timestamp=now + timedelta(days=1),
+                    instant_exp=0,
+                    reward_list=[],
+                )
+            )
+            sess.flush()
+            sess.add_all(
+                [Exp(season_pass_id=i, action_type=x, exp=10) for x in ActionType]
+            )
+            sess.add_all(
+                [
+                    Level(pass_type=pass_type, level=lvl, exp=(lvl - 1) * 100)
+                    for lvl in range(1, 31)
+                ]
+            )
+            sess.add_all(
+                [
+                    Block(
+                        planet_id=PlanetID(planet_id.encode()),
+                        pass_type=pass_type,
+                        last_processed_index=start - 1,
+                    )
+                    for planet_id in planet_list
+                ]
+            )
+        sess.commit()
+    engine.dispose()
+
+
+def run_tracker(name, func, pg_dsn, pass_type, tip, result):
+    """Calls tracker until every planet reaches the tip, like `runner` of tracker app."""
+    from shared.enums import PassType
+    from shared.models.action import Block
+    from sqlalchemy import create_engine
+    from sqlalchemy import func as sql_func
+    from sqlalchemy import select
+
+    engine = create_engine(pg_dsn)
+    last_block = None
+    stall = 0
+    started = time.perf_counter()
+    while True:
+        func()
+        with engine.connect() as conn:
+            current = conn.scalar(
+                select(sql_func.min(Block.last_processed_index)).where(
+                    Block.pass_type == PassType(pass_type)
+                )
+            )
+        if current >= tip - 1:
+            break
+        stall = stall + 1 if current == last_block else 0
+        if stall >= STALL_LIMIT:
+            logging.error(f"{name} stopped at block {current}")
+            break
+        last_block = current
+    result[name] = {
+        "seconds": time.perf_counter() - started,
+        "last_block": current,
+    }
+    engine.dispose()
+
+
+def stream_funcs(name: str, stop: threading.Event):
+    """
+    Starts ingest thread of tracker and returns apply function for `run_tracker`.
+    Apply waits for ingested blocks so that an empty stream is not counted as stall.
+    """
+    from app.consumers.adventure_boss_consumer import consume_adventure_boss_message
+    from app.consumers.world_clear_consumer import consume_world_clear_message
+    from app.trackers import adv_boss_tracker, courage_tracker, world_clear_tracker
+    from app.utils.stream import apply_blocks, engine, ingest_blocks, stream_state
+    from shared.enums import PassType
+
+    fetch, consume = {
+        "CourageTracker": (
+            courage_tracker.fetch_courage_message,
+            courage_tracker.apply_courage_message,
+        ),
+        "AdventureBossTracker": (
+            adv_boss_tracker.fetch_adv_boss_message,
+            consume_adventure_boss_message,
+        ),
+        "WorldClearTracker": (
+            world_clear_tracker.fetch_world_clear_message,
+            consume_world_clear_message,
+        ),
+    }[name]
+    pass_type = PassType(TRACKER_PASS_TYPES[name])
+
+    def ingest():
+        while not stop.is_set():
+            ingest_blocks(pass_type, fetch)
+            time.sleep(0.01)
+
+    def apply():
+        from app.config import config
+
+        for _ in range(500):
+            with engine.connect() as conn:
+                if all(
+                    stream_state(conn, x, pass_type)[0] for x in config.enabled_planets
+                ):
+                    break
+            time.sleep(0.01)
+        apply_blocks(pass_type, consume)
+
+    threading.Thread(target=ingest, daemon=True).start()
+    return apply
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end tracker benchmark")
+    parser.add_argument("block_dir")
+    parser.add_argument("--pg-dsn", required=True, help="DB name must end with _bench")
+    parser.add_argument("--start", type=int, default=None, help="First block to track")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--stake-deposit", type=int, default=None)
+    parser.add_argument(
+        "--trackers", nargs="+", default=list(TRACKER_PASS_TYPES.keys())
+    )
+    parser.add_argument(
+        "--catchup-workers",
+        type=int,
+        default=0,
+        help="Parallel catch-up workers of courage tracker (0: serial)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Fetch and apply blocks in separate threads through tracker stream",
+    )
+    parser.add_argument(
+        "--endpoints",
+        type=int,
+        default=1,
+        help="Endpoint URLs of each planet in RPC pool, all served by the replay server",
+    )
+    parser.add_argument("--output", default=None, help="Write result JSON to file")
+    args = parser.parse_args()
+
+    if not args.pg_dsn.rstrip("/").endswith("_bench"):
+        parser.error("DB name must end with _bench because it will be dropped")
+
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING)
+    )
+    meta_path = os.path.join(args.block_dir, "meta.json")
+    meta = {}
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+    server = ReplayServer(
+        ("127.0.0.1", 0),
+        args.block_dir,
+        latency=args.latency_ms / 1000,
+        stake_deposit=args.stake_deposit,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    planet_list = list(server.planets)
+    if not planet_list:
+        parser.error(f"No blocks in {args.block_dir}")
+    tip = min(x.tip for x in server.planets.values())
+    start = args.start
+    if start is None:
+        start = max(tip - meta.get("block_count", tip), 0)
+
+    # Settings are already loaded by `headless_replay`. Override them before trackers create engines.
+    from app.config import config
+
+    config.pg_dsn = args.pg_dsn
+    config.gql_url_map = {
+        x: [f"{server.url}/{x}/graphql/{i}" for i in range(args.endpoints)]
+        for x in planet_list
+    }
+    config.enabled_planets = planet_list
+    config.headless_jwt_secret = "headless-replay-benchmark-jwt-secret"
+    config.block_cache_dir = None
+    config.catchup_workers = args.catchup_workers
+    config.catchup_min_blocks = 1
+    if meta.get("arena_public_key"):
+        config.arena_service_jwt_public_key = meta["arena_public_key"]
+
+    from app.trackers import adv_boss_tracker, courage_tracker, world_clear_tracker
+    from app.utils import stage_cost
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    stage_cost.CDN_BASE_URL = server.url
+    stage_cost.load_stage_sheets(planet_list)
+    setup_db(args.pg_dsn, planet_list, start)
+
+    counter = WriteCounter()
+    event.listen(Engine, "after_cursor_execute", counter.after_cursor_execute)
+    event.listen(Engine, "commit", counter.commit)
+
+    tracker_funcs = {
+        "CourageTracker": courage_tracker.track_missing_blocks,
+        "AdventureBossTracker": adv_boss_tracker.track_missing_blocks,
+        "WorldClearTracker": world_clear_tracker.track_missing_blocks,
+    }
+    stop = threading.Event()
+    if args.stream:
+        tracker_funcs = {name: stream_funcs(name, stop) for name in args.trackers}
+    result = {}
+    threads = [
+        threading.Thread(
+            target=run_tracker,
+            args=(
+                name,
+                tracker_funcs[name],
+                args.pg_dsn,
+                TRACKER_PASS_TYPES[name],
+                tip,
+                result,
+            ),
+        )
+        for name in args.trackers
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    server.shutdown()
+
+    block_count = (tip - start) * len(planet_list)
+    report = {
+        "block_dir": args.block_dir,
+        "planets": planet_list,
+        "start": start,
+        "tip": tip,
+        "latency_ms": args.latency_ms,
+        "catchup_workers": args.catchup_workers,
+        "endpoints": args.endpoints,
+        "stream": args.stream,
+        "seconds": elapsed,
+        "trackers": {
+            name: {
+                **x,
+                "blocks": (x["last_block"] - start + 1) * len(planet_list),
+                "blocks_per_sec": (x["last_block"] - start + 1)
+                * len(planet_list)
+                / x["seconds"],
+            }
+            for name, x in result.items()
+        },
+        "blocks_per_sec": block_count * len(args.trackers) / elapsed,
+        "db_rows_written": counter.rows,
+        "db_rows_per_sec": counter.rows / elapsed,
+        "db_write_statements": counter.statements,
+        "db_commits": counter.commits,
+        "headless_requests": server.request_count,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
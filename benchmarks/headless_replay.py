@@ -0,0 +1,393 @@
+#!/usr/bin/env python
+"""
+Stand-in headless GraphQL server serving recorded or synthetic blocks.
+
+Blocks are read from a block cache directory (see `apps/tracker/app/utils/block_cache.py`),
+so blocks recorded by trackers with `TRACKER_BLOCK_CACHE_DIR` can be replayed as is.
+Each planet is served at `http://{host}:{port}/{planet_id}/graphql`,
+and StageSheet for tracker at `http://{host}:{port}/{planet_id}/StageSheet.csv`.
+
+Only query shapes used by this project are implemented:
+`nodeStatus`, `ncTransactions`, `transactionResult(s)`, `state`, `stakeState`,
+`avatar.worldInformation`, `nextTxNonce`, `signTransaction` and `stageTransaction`.
+Introspection works, so `GQLClient` can build its DSL schema from this server.
+
+    python benchmarks/headless_replay.py BLOCK_DIR [--port 8080] [--latency-ms 20]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+import bencodex
+from graphql import build_schema, graphql_sync
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../apps/tracker")
+)
+# Block cache module reads tracker settings on import. Replay does not use them.
+os.environ.setdefault("TRACKER_ARENA_SERVICE_JWT_PUBLIC_KEY", "")
+
+from app.utils.block_cache import BlockCache  # noqa: E402
+from app.utils.gql import derive_address  # noqa: E402
+
+SCHEMA = build_schema(
+    """
+scalar Long
+scalar Address
+scalar TxId
+
+schema {
+  query: StandaloneQuery
+  mutation: StandaloneMutation
+}
+
+type StandaloneQuery {
+  nodeStatus: NodeStatusType!
+  transaction: TransactionHeadlessQuery!
+  stateQuery(index: Long): StateQuery!
+  state(index: Long, accountAddress: Address!, address: Address!): String
+}
+
+type StandaloneMutation {
+  stageTransaction(payload: String!): TxId!
+}
+
+type NodeStatusType {
+  tip: BlockHeaderType!
+}
+
+type BlockHeaderType {
+  index: Long!
+}
+
+type TransactionHeadlessQuery {
+  ncTransactions(startingBlockIndex: Long!, limit: Long!, actionType: String!): [TransactionType]
+  transactionResults(txIds: [TxId]!): [TxResultType!]!
+  transactionResult(txId: TxId!): TxResultType!
+  nextTxNonce(address: Address!): Long!
+  signTransaction(unsignedTransaction: String!, signature: String!): String!
+}
+
+type TransactionType {
+  id: TxId!
+  signer: Address!
+  actions: [ActionType!]!
+}
+
+type ActionType {
+  json: String!
+}
+
+enum TxStatus {
+  INVALID
+  STAGING
+  SUCCESS
+  FAILURE
+  INCLUDED
+}
+
+type TxResultType {
+  txStatus: TxStatus!
+  blockIndex: Long
+  blockHash: String
+  exceptionNames: [String]
+}
+
+type StateQuery {
+  stakeState(address: Address!): StakeStateType
+  avatar(avatarAddress: Address!): AvatarStateType
+}
+
+type StakeStateType {
+  deposit: String!
+}
+
+type AvatarStateType {
+  worldInformation: WorldInformationType
+}
+
+type WorldInformationType {
+  lastClearedStage: StageType
+}
+
+type StageType {
+  worldId: Int!
+  stageId: Int!
+}
+"""
+)
+
+# Addresses of states read by tracker
+STAKE_COEF_SHEET_ADDRESS = "4ce2d0bc945c0e38ae6c31b0dee7030951ef1cd1"
+ADVENTURE_BOSS_ACCOUNT = "0000000000000000000000000000000000000102"
+STAKE_COEF_SHEET = """id,required_gold,coefficient
+1,50,100
+2,500,100
+3,5000,80
+4,50000,80
+5,500000,60
+6,5000000,60
+7,10000000,60"""
+STAGES_PER_WORLD = 50
+
+
+def _normalize(address: str) -> str:
+    return address.lower().removeprefix("0x")
+
+
+class PlanetReplay:
+    """Serves one planet from block cache, keeping chain-like state derived from served blocks."""
+
+    def __init__(self, planet_id: str, cache: BlockCache, tip: int, stake_deposit):
+        self.planet_id = planet_id
+        self.cache = cache
+        self.tip = tip
+        self.stake_deposit = stake_deposit
+        self._lock = threading.Lock()
+        self._tx_results: Dict[str, Tuple[str, Optional[int]]] = {}
+        self._cleared_stage: Dict[str, int] = defaultdict(int)
+        # address -> {block_index: explore count}. Kept per block to answer state at given index.
+        self._explore_count: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._nonce: Dict[str, int] = defaultdict(int)
+
+    def _serve_block(self, block_index: int, action_regex: str):
+        data = self.cache.get(self.planet_id, block_index, action_regex)
+        if data is None:
+            return []
+        tx_data, tx_result_list = data
+        with self._lock:
+            explore_count = defaultdict(int)
+            for tx, status in zip(tx_data, tx_result_list):
+                self._tx_results[tx["id"]] = (status, block_index)
+                if status != "SUCCESS":
+                    continue
+                for action in tx["actions"]:
+                    self._track_state(
+                        json.loads(action["json"].replace(r"\uFEFF", "")),
+                        explore_count,
+                    )
+            # Same block can be served again. Overwrite instead of adding.
+            for address, count in explore_count.items():
+                self._explore_count[address][block_index] = count
+        return tx_data
+
+    def explore_floor(self, address: str, index: Optional[int]) -> Optional[int]:
+        """Floor of explore board at state `index`, which has actions of blocks before it."""
+        with self._lock:
+            counts = self._explore_count.get(address)
+            if not counts:
+                return None
+            total = sum(
+                count
+                for block_index, count in counts.items()
+                if index is None or block_index < index
+            )
+        return min(total, 20) if total else None
+
+    def _track_state(self, action: dict, explore_count: Dict[str, int]):
+        type_id = action["type_id"]
+        values = action.get("values", {})
+        if re.fullmatch(r"hack_and_slash\d+", type_id):
+            avatar_addr = values["avatarAddress"].lower()
+            self._cleared_stage[avatar_addr] = max(
+                self._cleared_stage[avatar_addr], values.get("stageId") or 0
+            )
+        elif type_id.startswith("explore_adventure_boss"):
+            # Explore board is saved at address derived from avatar and season
+            address = _normalize(
+                derive_address(values["avatarAddress"], f"{int(values['season']):040}")
+            )
+            explore_count[address] += 1
+
+    # Resolvers. `graphql-core` calls these with (info, **args).
+    def nodeStatus(self, info):
+        return {"tip": {"index": self.tip}}
+
+    def transaction(self, info):
+        return self
+
+    def stateQuery(self, info, index=None):
+        return self
+
+    def ncTransactions(self, info, startingBlockIndex, limit, actionType):
+        tx_list = []
+        for block_index in range(
+            startingBlockIndex, min(startingBlockIndex + limit, self.tip + 1)
+        ):
+            tx_list.extend(self._serve_block(block_index, actionType))
+        return tx_list
+
+    def transactionResult(self, info, txId):
+        status, block_index = self._tx_results.get(txId, ("INVALID", None))
+        return {
+            "txStatus": status,
+            "blockIndex": block_index,
+            "blockHash": None if block_index is None else f"{block_index:064x}",
+            "exceptionNames": [],
+        }
+
+    def transactionResults(self, info, txIds):
+        return [self.transactionResult(info, x) for x in txIds]
+
+    def nextTxNonce(self, info, address):
+        return self._nonce[address.lower()]
+
+    def signTransaction(self, info, unsignedTransaction, signature):
+        return unsignedTransaction + signature
+
+    def stageTransaction(self, info, payload):
+        tx_id = hashlib.sha256(bytes.fromhex(payload)).hexdigest()
+        with self._lock:
+            self._tx_results[tx_id] = ("SUCCESS", self.tip)
+        return tx_id
+
+    def stakeState(self, info, address):
+        if self.stake_deposit is None:
+            return None
+        return {"deposit": str(self.stake_deposit)}
+
+    def avatar(self, info, avatarAddress):
+        stage_id = self._cleared_stage.get(avatarAddress.lower(), 0)
+        return {
+            "worldInformation": {
+                "lastClearedStage": {
+                    "worldId": max((stage_id - 1) // STAGES_PER_WORLD + 1, 1),
+                    "stageId": stage_id,
+                }
+            }
+        }
+
+    def state(self, info, accountAddress, address, index=None):
+        address = _normalize(address)
+        if address == STAKE_COEF_SHEET_ADDRESS:
+            return f"u{len(STAKE_COEF_SHEET)}:{STAKE_COEF_SHEET}".encode().hex()
+        if _normalize(accountAddress) == ADVENTURE_BOSS_ACCOUNT:
+            # Explore board of avatar. Only floor (index 3) is read.
+            floor = self.explore_floor(address, index)
+            if floor is None:
+                return None
+            return bencodex.dumps([None, None, None, floor]).hex()
+        return None
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        block_dir: str,
+        latency: float = 0.0,
+        tip: Optional[int] = None,
+        stake_deposit=None,
+        stage_sheet: Optional[str] = None,
+    ):
+        super().__init__(address, ReplayHandler)
+        self.latency = latency
+        self.cache = BlockCache(block_dir)
+        self.stage_sheet = stage_sheet or "id,cost_ap\n" + "\n".join(
+            f"{i},5" for i in range(1, 501)
+        )
+        self.request_count = 0
+        self.planets: Dict[str, PlanetReplay] = {}
+        for planet_id in sorted(os.listdir(block_dir)):
+            last = self.cache.last_block_index(planet_id)
+            if last is None:
+                continue
+            # Trackers process blocks under the tip
+            self.planets[planet_id] = PlanetReplay(
+                planet_id, self.cache, last + 1 if tip is None else tip, stake_deposit
+            )
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    server: ReplayServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if content_type == "text/csv":
+            self.send_header("ETag", f'"{hashlib.sha1(body).hexdigest()}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _planet(self) -> Optional[PlanetReplay]:
+        self.server.request_count += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        return self.server.planets.get(self.path.strip("/").split("/")[0])
+
+    def do_GET(self):
+        planet = self._planet()
+        if planet is None or not self.path.endswith("/StageSheet.csv"):
+            return self._send(404)
+        body = self.server.stage_sheet.encode()
+        if self.headers.get("If-None-Match") == f'"{hashlib.sha1(body).hexdigest()}"':
+            return self._send(304)
+        self._send(200, body, "text/csv")
+
+    def do_POST(self):
+        planet = self._planet()
+        if planet is None:
+            return self._send(404)
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        result = graphql_sync(
+            SCHEMA,
+            request["query"],
+            root_value=planet,
+            variable_values=request.get("variables"),
+            operation_name=request.get("operationName"),
+        )
+        body = {"data": result.data}
+        if result.errors:
+            body["errors"] = [x.formatted for x in result.errors]
+        self._send(200, json.dumps(body).encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve recorded/synthetic blocks as headless GraphQL API."
+    )
+    parser.add_argument("block_dir", help="Block cache directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay per request")
+    parser.add_argument(
+        "--tip", type=int, default=None, help="Last block + 1 if not set"
+    )
+    parser.add_argument(
+        "--stake-deposit", type=int, default=None, help="Deposit of every agent"
+    )
+    args = parser.parse_args()
+
+    server = ReplayServer(
+        (args.host, args.port),
+        args.block_dir,
+        latency=args.latency_ms / 1000,
+        tip=args.tip,
+        stake_deposit=args.stake_deposit,
+    )
+    for planet_id, planet in server.planets.items():
+        print(f"{server.url}/{planet_id}/graphql (tip: {planet.tip})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+"""
+Microbenchmarks of tracker hot path on synthetic blocks.
+
+- `decode_actions`: `app.schemas.decoder` over all actions of blocks, in parsed actions/sec
+- `decode_actions_legacy`: `json.loads` and pydantic `ActionJson` per action, for comparison
+- `parse_courage`: `parse_courage_actions` of courage tracker, including arena battle token validation
+- `parse_adventure_boss`: action parsing of adventure boss tracker
+- `apply_exp`: exp and level calculation with history creation, without DB
+- `verify_season_pass`: loading and creating `UserSeasonPass` of avatars in a block (needs DB)
+- `consumer_commit`: `consume_courage_message` of a block including commit (needs DB)
+
+Blocks are generated by `synthetic.py`, or read from block cache given by `--block-dir`
+(e.g. recorded by trackers with `TRACKER_BLOCK_CACHE_DIR`). Recorded arena battles are
+validated with `arena_public_key` of `meta.json` if exists.
+
+Results are written as JSON so that runs of different changes can be compared.
+DB benchmarks run only with `--pg-dsn`. Target DB is dropped and recreated, so its name must end with `_bench`.
+
+    python benchmarks/microbench.py [--blocks 200] [--pg-dsn postgresql://.../season_pass_bench] [--output result.json]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import structlog
+from headless_replay import ReplayServer
+from synthetic import SyntheticChain, filter_block, write_blocks
+
+PLANET_ID = "0x000000000000"
+ADVENTURE_BOSS_TYPE_IDS = {"wanted", "explore_adventure_boss", "sweep_adventure_boss"}
+BENCHMARKS = [
+    "decode_actions",
+    "decode_actions_legacy",
+    "parse_courage",
+    "parse_adventure_boss",
+    "apply_exp",
+    "verify_season_pass",
+    "consumer_commit",
+]
+DB_BENCHMARKS = {"verify_season_pass", "consumer_commit"}
+
+
+def measure(
+    func: Callable[[], int], repeat: int, setup: Optional[Callable[[], None]] = None
+) -> Dict:
+    """
+    Runs `func` `repeat` times and reports the best run. `func` returns number of operations.
+    `setup` is called before every run and not measured.
+    """
+    best = None
+    ops = 0
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        ops = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "ops": ops,
+        "seconds": best,
+        "ops_per_sec": ops / best if best else None,
+        "repeat": repeat,
+    }
+
+
+def courage_action_data(blocks) -> List[Dict[str, List]]:
+    """Builds courage tracker messages of blocks without DB battle deduplication"""
+    from app.trackers.courage_tracker import parse_courage_actions
+
+    message_list = []
+    for data in blocks:
+        action_data = defaultdict(list)
+        for type_id, entry, battle_id in parse_courage_actions(*data):
+            action_data[type_id].append(entry)
+        message_list.append(action_data)
+    return message_list
+
+
+def bench_parse_courage(blocks) -> int:
+    from app.trackers.courage_tracker import parse_courage_actions
+
+    count = 0
+    for data in blocks:
+        for _ in parse_courage_actions(*data):
+            count += 1
+    return count
+
+
+def bench_parse_adventure_boss(blocks) -> int:
+    from app.trackers.adv_boss_tracker import parse_adv_boss_actions
+
+    count = 0
+    for data in blocks:
+        for _ in parse_adv_boss_actions(*data):
+            count += 1
+    return count
+
+
+def bench_decode_actions(blocks) -> int:
+    from app.schemas.decoder import decode_action
+
+    count = 0
+    for tx_data, _ in blocks:
+        for tx in tx_data:
+            for action in tx["actions"]:
+                decode_action(action["json"])
+                count += 1
+    return count
+
+
+def bench_decode_actions_legacy(blocks) -> int:
+    # `json.loads` and pydantic dataclass per action, as trackers did before `app.schemas.decoder`
+    from app.schemas.action import ActionJson, AdventureBossActionJson
+
+    count = 0
+    for tx_data, _ in blocks:
+        for tx in tx_data:
+            for action in tx["actions"]:
+                action_raw = json.loads(action["json"].replace(r"\uFEFF", ""))
+                type_id = action_raw["type_id"]
+                if type_id in ADVENTURE_BOSS_TYPE_IDS:
+                    AdventureBossActionJson(type_id=type_id, **action_raw["values"])
+                else:
+                    ActionJson(type_id=type_id, **action_raw["values"])
+                count += 1
+    return count
+
+
+def load_recorded_blocks(block_dir: str, planet_id: str) -> List:
+    """Reads every cached block of planet from block cache, merging blocks of all pass types."""
+    from app.utils.block_cache import BlockCache
+    from app.utils.gql import TARGET_ACTION_DICT
+
+    cache = BlockCache(block_dir)
+    last = cache.last_block_index(planet_id)
+    blocks = []
+    if last is None:
+        return blocks
+    for block_index in range(last, -1, -1):
+        tx_dict = {}
+        found = False
+        for action_regex in TARGET_ACTION_DICT.values():
+            data = cache.get(planet_id, block_index, action_regex)
+            if data is None:
+                continue
+            found = True
+            for tx, status in zip(*data):
+                tx_dict[tx["id"]] = (tx, status)
+        if not found:
+            break
+        blocks.append(
+            ([x[0] for x in tx_dict.values()], [x[1] for x in tx_dict.values()])
+        )
+    cache.close()
+    blocks.reverse()
+    return blocks
+
+
+def bench_apply_exp(message_list, level_dict) -> int:
+    from app.consumers.courage_consumer import courage_action_type
+    from app.utils.season_pass import apply_exp
+    from shared.enums import ActionType, PlanetID
+    from shared.models.user import UserSeasonPass
+    from sqlalchemy.orm import Session
+
+    planet_id = PlanetID(PLANET_ID.encode())
+    user_season_dict = defaultdict(
+        lambda: UserSeasonPass(season_pass_id=1, level=0, exp=0)
+    )
+    # Unbound session only collects new objects
+    sess = Session()
+    count = 0
+    for block_index, action_data in enumerate(message_list):
+        for type_id, data in action_data.items():
+            action_type = courage_action_type(type_id)
+            if action_type is None or action_type == ActionType.SWEEP:
+                continue
+            apply_exp(
+                sess,
+                planet_id,
+                user_season_dict,
+                action_type,
+                10,
+                level_dict,
+                block_index,
+                data,
+            )
+            count += len(data)
+        sess.expunge_all()
+    return count
+
+
+def bench_verify_season_pass(engine, message_list) -> int:
+    from app.utils.season_pass import verify_season_pass
+    from shared.enums import PassType, PlanetID
+    from shared.utils.season_pass import get_pass
+    from sqlalchemy.orm import Session
+
+    planet_id = PlanetID(PLANET_ID.encode())
+    with Session(engine) as sess:
+        current_pass = get_pass(sess, PassType.COURAGE_PASS, validate_current=True)
+        for action_data in message_list:
+            verify_season_pass(sess, planet_id, current_pass, action_data)
+            sess.rollback()
+    return len(message_list)
+
+
+def bench_consumer_commit(message_list, start) -> int:
+    from app.consumers.courage_consumer import consume_courage_message
+    from shared.schemas.message import TrackerMessage
+
+    for block_index, action_data in enumerate(message_list, start=start):
+        consume_courage_message(
+            TrackerMessage(
+                planet_id=PLANET_ID, block=block_index, action_data=action_data
+            )
+        )
+    return len(message_list)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tracker hot path microbenchmarks")
+    parser.add_argument(
+        "--block-dir",
+        default=None,
+        help="Use recorded blocks instead of synthetic ones",
+    )
+    parser.add_argument("--planet-id", default=PLANET_ID, help="Planet of --block-dir")
+    parser.add_argument("--blocks", type=int, default=200)
+    parser.add_argument("--tx-per-block", type=int, default=50)
+    parser.add_argument("--avatars", type=int, default=10000)
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--benchmarks", nargs="+", choices=BENCHMARKS, default=BENCHMARKS
+    )
+    parser.add_argument("--pg-dsn", default=None, help="DB name must end with _bench")
+    parser.add_argument("--output", default=None, help="Write result JSON to file")
+    args = parser.parse_args()
+
+    if args.pg_dsn and not args.pg_dsn.rstrip("/").endswith("_bench"):
+        parser.error("DB name must end with _bench because it will be dropped")
+
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING)
+    )
+    # Override settings before tracker modules create engines
+    from app.config import config
+
+    if args.block_dir:
+        blocks = load_recorded_blocks(args.block_dir, args.planet_id)
+        if not blocks:
+            parser.error(f"No blocks of {args.planet_id} in {args.block_dir}")
+        meta_path = os.path.join(args.block_dir, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                arena_public_key = json.load(f).get("arena_public_key")
+            if arena_public_key:
+                config.arena_service_jwt_public_key = arena_public_key
+    else:
+        chain = SyntheticChain(
+            avatar_count=args.avatars,
+            skew=args.skew,
+            tx_per_block=args.tx_per_block,
+            seed=args.seed,
+        )
+        blocks = list(chain.blocks(args.blocks))
+        config.arena_service_jwt_public_key = chain.arena_public_key
+    replay_dir = None
+    if args.pg_dsn:
+        # Consumer reads stake status and StageSheet from node. Serve them locally.
+        replay_dir = tempfile.TemporaryDirectory()
+        write_blocks(replay_dir.name, PLANET_ID, blocks, 0)
+        server = ReplayServer(("127.0.0.1", 0), replay_dir.name)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        config.pg_dsn = args.pg_dsn
+        config.gql_url_map = {PLANET_ID: f"{server.url}/{PLANET_ID}/graphql"}
+        config.headless_jwt_secret = "headless-replay-benchmark-jwt-secret"
+
+    from app.utils import stage_cost
+    from app.utils.gql import TARGET_ACTION_DICT
+    from e2e_trackers import setup_db
+    from shared.enums import PassType
+    from sqlalchemy import create_engine
+
+    if args.pg_dsn:
+        stage_cost.CDN_BASE_URL = server.url
+        stage_cost.load_stage_sheets([PLANET_ID])
+
+    courage_blocks = [
+        filter_block(x, TARGET_ACTION_DICT[PassType.COURAGE_PASS]) for x in blocks
+    ]
+    adv_boss_blocks = [
+        filter_block(x, TARGET_ACTION_DICT[PassType.ADVENTURE_BOSS_PASS])
+        for x in blocks
+    ]
+    message_list = courage_action_data(courage_blocks)
+    level_dict = {lvl: (lvl - 1) * 100 for lvl in range(1, 31)}
+
+    results = {}
+    skipped = []
+    for name in args.benchmarks:
+        if name in DB_BENCHMARKS and not args.pg_dsn:
+            skipped.append(name)
+            continue
+
+        setup = None
+        if name == "decode_actions":
+            func = lambda: bench_decode_actions(blocks)
+        elif name == "decode_actions_legacy":
+            func = lambda: bench_decode_actions_legacy(blocks)
+        elif name == "parse_courage":
+            func = lambda: bench_parse_courage(courage_blocks)
+        elif name == "parse_adventure_boss":
+            func = lambda: bench_parse_adventure_boss(adv_boss_blocks)
+        elif name == "apply_exp":
+            func = lambda: bench_apply_exp(message_list, level_dict)
+        elif name == "verify_season_pass":
+            engine = create_engine(args.pg_dsn)
+            setup_db(args.pg_dsn, [PLANET_ID], 0)
+            # Half of avatars already have season pass
+            bench_consumer_commit(message_list[: len(message_list) // 2], 0)
+            func = lambda: bench_verify_season_pass(engine, message_list)
+        else:  # consumer_commit
+            # Blocks are applied only once. Start from clean DB every run.
+            setup = lambda: setup_db(args.pg_dsn, [PLANET_ID], 0)
+            func = lambda: bench_consumer_commit(message_list, 0)
+        results[name] = measure(func, args.repeat, setup)
+    if replay_dir is not None:
+        server.shutdown()
+        replay_dir.cleanup()
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "params": {
+            "block_dir": args.block_dir,
+            "blocks": len(blocks),
+            "tx_per_block": args.tx_per_block,
+            "avatars": args.avatars,
+            "skew": args.skew,
+            "seed": args.seed,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+"""
+Synthetic block generator for benchmarks.
+
+Generates transactions of actions tracked by this project with payloads matching
+`ActionJson` and `AdventureBossActionJson` of tracker:
+`hack_and_slash22`, `hack_and_slash_sweep10`, `battle`, `raid7`,
+`wanted`, `explore_adventure_boss` and `sweep_adventure_boss`.
+
+Avatars of actions follow zipf-like distribution: weight of `n`th avatar is `1 / n ** skew`,
+so `skew=0` is uniform and larger skew concentrates actions to a few heavy players.
+Arena battles are signed with generated RSA key, and its public key is saved to `meta.json`
+so that trackers can validate them.
+
+Generated blocks are written as block cache (see `apps/tracker/app/utils/block_cache.py`)
+which can be served by `headless_replay.py`.
+
+    python benchmarks/synthetic.py OUT_DIR [--blocks 1000] [--avatars 10000] [--skew 1.1]
+"""
+import argparse
+import base64
+import bisect
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../apps/tracker")
+)
+# Block cache module reads tracker settings on import. Generator does not use them.
+os.environ.setdefault("TRACKER_ARENA_SERVICE_JWT_PUBLIC_KEY", "")
+
+from app.utils.block_cache import BlockCache  # noqa: E402
+from app.utils.gql import TARGET_ACTION_DICT  # noqa: E402
+
+BlockData = Tuple[List[dict], List[str]]
+
+# type_id -> relative frequency
+DEFAULT_ACTION_MIX = {
+    "hack_and_slash22": 40,
+    "hack_and_slash_sweep10": 15,
+    "battle": 20,
+    "raid7": 5,
+    "wanted": 5,
+    "explore_adventure_boss": 10,
+    "sweep_adventure_boss": 5,
+}
+STAGES_PER_WORLD = 50
+MAX_STAGE = 500
+ADVENTURE_BOSS_SEASON = 1
+
+
+def _address(seed: str) -> str:
+    return "0x" + hashlib.sha1(seed.encode()).hexdigest()
+
+
+class SyntheticChain:
+    def __init__(
+        self,
+        avatar_count: int = 10000,
+        skew: float = 1.1,
+        tx_per_block: int = 20,
+        action_mix: Optional[Dict[str, float]] = None,
+        failure_rate: float = 0.01,
+        seed: int = 0,
+    ):
+        self.avatar_count = avatar_count
+        self.skew = skew
+        self.tx_per_block = tx_per_block
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        self.action_mix = action_mix or DEFAULT_ACTION_MIX
+        unknown = set(self.action_mix) - set(DEFAULT_ACTION_MIX)
+        if unknown:
+            raise ValueError(f"Unknown action type: {', '.join(sorted(unknown))}")
+        self._type_list = list(self.action_mix)
+        self._type_weights = list(itertools.accumulate(self.action_mix.values()))
+
+        self._avatar_weights = list(
+            itertools.accumulate(1 / (i + 1) ** skew for i in range(avatar_count))
+        )
+        self._agent_list = [_address(f"agent{i}") for i in range(avatar_count)]
+        self._avatar_list = [_address(f"avatar{i}") for i in range(avatar_count)]
+        self._cleared_stage = [0] * avatar_count
+        self._battle_count = 0
+
+        self._arena_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    @property
+    def arena_public_key(self) -> str:
+        """Base64 encoded public key PEM, same format as `TRACKER_ARENA_SERVICE_JWT_PUBLIC_KEY`"""
+        return base64.b64encode(
+            self._arena_key.public_key().public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            )
+        ).decode()
+
+    def _pick_avatar(self) -> int:
+        return bisect.bisect_left(
+            self._avatar_weights, self.random.random() * self._avatar_weights[-1]
+        )
+
+    def _battle_token(self) -> str:
+        self._battle_count += 1
+        return jwt.encode(
+            {
+                "bid": self.seed * 10**9 + self._battle_count,
+                "iss": "planetarium arena service",
+                "aud": "NineChronicles headless",
+            },
+            self._arena_key,
+            algorithm="RS256",
+        )
+
+    def _next_stage(self, i: int) -> int:
+        stage_id = min(self._cleared_stage[i] + self.random.randint(0, 1), MAX_STAGE)
+        self._cleared_stage[i] = stage_id
+        return max(stage_id, 1)
+
+    def action(self, type_id: str, i: int) -> dict:
+        """Action payload of `type_id` made by `i`th avatar"""
+        avatar_addr = self._avatar_list[i]
+        action_id = f"{self.random.getrandbits(128):032x}"
+        rune = [[1, 10001]]
+        if type_id == "hack_and_slash22":
+            stage_id = self._next_stage(i)
+            values = {
+                "apStoneCount": 0,
+                "avatarAddress": avatar_addr,
+                "costumes": [],
+                "equipments": [],
+                "foods": [],
+                "r": rune,
+                "stageId": stage_id,
+                "totalPlayCount": self.random.choice((1, 1, 1, 5, 24)),
+                "worldId": (stage_id - 1) // STAGES_PER_WORLD + 1,
+            }
+        elif type_id == "hack_and_slash_sweep10":
+            stage_id = max(self._cleared_stage[i], 1)
+            values = {
+                "actionPoint": self.random.choice((0, 5, 60, 120)),
+                "apStoneCount": self.random.choice((0, 0, 1, 10)),
+                "avatarAddress": avatar_addr,
+                "costumes": [],
+                "equipments": [],
+                "runeInfos": rune,
+                "stageId": stage_id,
+                "worldId": (stage_id - 1) // STAGES_PER_WORLD + 1,
+            }
+        elif type_id == "battle":
+            values = {
+                "maa": avatar_addr,
+                "arp": "PLANETARIUM",
+                "m": self._battle_token(),
+                "costumes": [],
+                "equipments": [],
+                "r": rune,
+            }
+        elif type_id == "raid7":
+            values = {
+                "a": avatar_addr,
+                "c": [],
+                "e": [],
+                "f": [],
+                "p": False,
+                "r": rune,
+            }
+        elif type_id == "wanted":
+            values = {
+                "a": avatar_addr,
+                "b": [
+                    {"decimalPlaces": 2, "minters": None, "ticker": "NCG"},
+                    str(self.random.choice((100, 100, 200, 500, 1000))),
+                ],
+                "s": str(ADVENTURE_BOSS_SEASON),
+            }
+        elif type_id == "explore_adventure_boss":
+            values = {
+                "avatarAddress": avatar_addr,
+                "costumes": [],
+                "equipments": [],
+                "foods": [],
+                "r": rune,
+                "season": str(ADVENTURE_BOSS_SEASON),
+            }
+        elif type_id == "sweep_adventure_boss":
+            values = {
+                "a": avatar_addr,
+                "c": [],
+                "e": [],
+                "r": rune,
+                "s": str(ADVENTURE_BOSS_SEASON),
+            }
+        else:
+            raise ValueError(f"Unknown action type: {type_id}")
+        values["id"] = action_id
+        return {"type_id": type_id, "values": values}
+
+    def transaction(self, type_id: Optional[str] = None) -> dict:
+        if type_id is None:
+            type_id = self._type_list[
+                bisect.bisect_left(
+                    self._type_weights, self.random.random() * self._type_weights[-1]
+                )
+            ]
+        i = self._pick_avatar()
+        return {
+            "id": f"{self.random.getrandbits(256):064x}",
+            "signer": self._agent_list[i],
+            "actions": [{"json": json.dumps(self.action(type_id, i))}],
+        }
+
+    def block(self) -> BlockData:
+        """Returns (tx_data, tx_result_list) of next block, like `fetch_block_data` of tracker"""
+        tx_data = [self.transaction() for _ in range(self.tx_per_block)]
+        tx_result_list = [
+            "FAILURE" if self.random.random() < self.failure_rate else "SUCCESS"
+            for _ in tx_data
+        ]
+        return tx_data, tx_result_list
+
+    def blocks(self, count: int) -> Iterator[BlockData]:
+        for _ in range(count):
+            yield self.block()
+
+
+def filter_block(data: BlockData, action_regex: str) -> BlockData:
+    """Leaves transactions headless returns for `actionType` of `ncTransactions`"""
+    pattern = re.compile(action_regex)
+    tx_data, tx_result_list = [], []
+    for tx, status in zip(*data):
+        type_id = json.loads(tx["actions"][0]["json"])["type_id"]
+        if pattern.fullmatch(type_id):
+            tx_data.append(tx)
+            tx_result_list.append(status)
+    return tx_data, tx_result_list
+
+
+def write_blocks(
+    path: str,
+    planet_id: str,
+    blocks: Iterable[BlockData],
+    start: int,
+    segment_blocks: int = 10000,
+):
+    """Writes blocks from `start` to block cache, filtered for every pass type."""
+    cache = BlockCache(path, segment_blocks)
+    try:
+        for block_index, data in enumerate(blocks, start=start):
+            for action_regex in TARGET_ACTION_DICT.values():
+                cache.put(
+                    planet_id,
+                    block_index,
+                    action_regex,
+                    filter_block(data, action_regex),
+                )
+    finally:
+        cache.close()
+
+
+def write_block_cache(
+    path: str,
+    planet_id: str,
+    chain: SyntheticChain,
+    start: int,
+    count: int,
+    segment_blocks: int = 10000,
+) -> dict:
+    """Writes `count` blocks of `chain` from `start` with `meta.json` and returns written meta."""
+    write_blocks(path, planet_id, chain.blocks(count), start, segment_blocks)
+
+    meta = {
+        "planet_id": planet_id,
+        "start": start,
+        "block_count": count,
+        "avatar_count": chain.avatar_count,
+        "skew": chain.skew,
+        "tx_per_block": chain.tx_per_block,
+        "action_mix": chain.action_mix,
+        "failure_rate": chain.failure_rate,
+        "seed": chain.seed,
+        "arena_public_key": chain.arena_public_key,
+    }
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def parse_action_mix(value: str) -> Dict[str, float]:
+    """`hack_and_slash22=40,battle=20` -> {"hack_and_slash22": 40, "battle": 20}"""
+    result = {}
+    for item in value.split(","):
+        type_id, weight = item.split("=")
+        result[type_id.strip()] = float(weight)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic blocks")
+    parser.add_argument("out_dir", help="Block cache directory to write")
+    parser.add_argument("--planet-id", default="0x000000000000")
+    parser.add_argument("--start", type=int, default=1)
+    parser.add_argument("--blocks", type=int, default=1000)
+    parser.add_argument("--tx-per-block", type=int, default=20)
+    parser.add_argument("--avatars", type=int, default=10000)
+    parser.add_argument("--skew", type=float, default=1.1, help="0 for uniform")
+    parser.add_argument(
+        "--action-mix",
+        type=parse_action_mix,
+        default=None,
+        help="e.g. hack_and_slash22=40,battle=20 (default: all action types)",
+    )
+    parser.add_argument("--failure-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if os.path.exists(os.path.join(args.out_dir, args.planet_id)):
+        parser.error(f"{args.out_dir} already has blocks of {args.planet_id}")
+
+    started = time.perf_counter()
+    chain = SyntheticChain(
+        avatar_count=args.avatars,
+        skew=args.skew,
+        tx_per_block=args.tx_per_block,
+        action_mix=args.action_mix,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    write_block_cache(args.out_dir, args.planet_id, chain, args.start, args.blocks)
+    print(
+        f"{args.blocks} blocks ({args.start}~{args.start + args.blocks - 1}) "
+        f"written to {args.out_dir} in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()